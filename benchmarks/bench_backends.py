@@ -0,0 +1,104 @@
+"""
+MODESYS Benchmark: PyTorch vs ONNX Runtime / OpenVINO
+Corre ambos backends sobre el mismo clip y compara latencia y cajas.
+
+Uso:
+    python benchmarks/bench_backends.py --input clip.mp4 --frames 200 --threads 8
+    python benchmarks/bench_backends.py --input clip.mp4 --backends torch onnx openvino
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(CURRENT_DIR)
+os.chdir(ROOT_DIR)
+sys.path.append(ROOT_DIR)
+
+import numpy as np
+
+from core.config_manager import ConfigManager
+from core.video_decoder import open_video
+from core.detection_metrics import MatchAccumulator
+
+
+def _boxes(dets, key):
+    # "faces" -> DetectionSet.of_type("face")
+    return dets["detections"].of_type(key[:-1]).bbox
+
+
+def run_backend(backend, frames, args):
+    from core.yolo_processor import YOLOProcessor
+    config = ConfigManager(config_dir=tempfile.mkdtemp(prefix="modesys_bench_"))
+    config.set("models.backend", backend)
+    config.set("models.cpu_threads", args.threads)
+    classes = [c.strip() for c in args.classes.split(",") if c.strip()]
+
+    proc = YOLOProcessor(config)
+    proc.hud = None
+    # Warm-up (grafos, allocators, text encoder de YOLO-World)
+    proc.detect_frame(frames[0], True, True, bool(classes), classes)
+
+    results, times = [], []
+    for f in frames:
+        t0 = time.perf_counter()
+        results.append(proc.detect_frame(f, True, True, bool(classes), classes))
+        times.append((time.perf_counter() - t0) * 1000)
+    return results, np.array(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", required=True)
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--classes", default="")
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx"])
+    parser.add_argument("--out", default="")
+    args = parser.parse_args()
+
+    cap = open_video(args.input)
+    frames = []
+    while len(frames) < args.frames:
+        ret, f = cap.read()
+        if not ret: break
+        frames.append(f)
+    cap.release()
+    if not frames:
+        print("❌ No se pudieron leer frames del clip")
+        return
+
+    report = {"input": args.input, "frames": len(frames), "threads": args.threads, "backends": {}}
+    reference = None
+    for backend in args.backends:
+        print(f"⏱  {backend} ...")
+        dets, times = run_backend(backend, frames, args)
+        entry = {
+            "mean_ms": float(times.mean()), "p50_ms": float(np.percentile(times, 50)),
+            "p95_ms": float(np.percentile(times, 95)), "fps": float(1000.0 / times.mean())
+        }
+        if reference is None:
+            reference = dets
+        else:
+            for key in ("faces", "persons", "objects"):
+                acc = MatchAccumulator()
+                for r, t in zip(reference, dets): acc.add(_boxes(r, key), _boxes(t, key))
+                entry[key] = acc.summary()
+        report["backends"][backend] = entry
+
+    print("")
+    print(f"{'BACKEND':<10} {'MEAN ms':>9} {'P95 ms':>9} {'FPS':>7}   AGREEMENT vs " + args.backends[0])
+    for name, e in report["backends"].items():
+        agree = "  ".join(f"{k[0].upper()}: IoU {e[k]['mean_iou']:.3f} R {e[k]['recall']:.3f}" for k in ("faces", "persons", "objects") if k in e)
+        print(f"{name:<10} {e['mean_ms']:>9.1f} {e['p95_ms']:>9.1f} {e['fps']:>7.1f}   {agree or '(reference)'}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+MODESYS Benchmark: pipeline completo con clips sintéticos y detectores simulados
+Corre VideoEngine de punta a punta para cada perfil de salida, más microbenchmarks
+de cada módulo del HUD y del writer JSON. No necesita pesos, GPU ni red.
+
+Uso:
+    python benchmarks/bench_pipeline.py                                   # guarda benchmarks/results/<commit>.json
+    python benchmarks/bench_pipeline.py --resolutions 1920x1080 --densities 5 50 --frames 60
+    python benchmarks/bench_pipeline.py --compare benchmarks/results/abc1234.json --tolerance 0.15
+Con --compare sale con código 1 si algún caso es más lento que la referencia (apto para CI).
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import subprocess
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(CURRENT_DIR)
+os.chdir(ROOT_DIR)
+sys.path.append(ROOT_DIR)
+
+import numpy as np
+
+from core.config_manager import ConfigManager
+from core.detections import FrameResult
+from core.layer_export import LAYER_FILES
+from core.json_export import json_path, tracks_path, dump_json, dump_tracks
+from benchmarks.synthetic import make_clip, synthetic_detections, StubProcessor, StubDepthProcessor
+
+PROFILES = ("Final Render", "Compositing Ready", "JSON Only")
+RESULTS_DIR = os.path.join(CURRENT_DIR, "results")
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def _config(tmp, args, **overrides):
+    config = ConfigManager(config_dir=tempfile.mkdtemp(prefix="cfg_", dir=tmp))
+    config.set("output.output_dir", os.path.join(tmp, "out"))
+    config.set("performance.cache_enabled", False)
+    config.set("performance.render_workers", args.workers)
+    config.set("models.use_objects", True)
+    config.set("models.use_depth", args.depth)
+    for k, v in overrides.items(): config.set(k, v)
+    return config
+
+
+def bench_engine(clip, profile, density, tmp, args):
+    from core.video_engine import VideoEngine
+    config = _config(tmp, args, **{"output.profile": profile, "output.custom_filename": f"bench_{int(time.time() * 1000)}"})
+    # Siempre un stub: con depth_processor=None, setup_render() cargaría el modelo real de profundidad
+    # (descarga de HF + init de GPU/CPU) aunque models.use_depth esté apagado
+    engine = VideoEngine(config, processor=StubProcessor(config, density, args.infer_ms),
+                         depth_processor=StubDepthProcessor())
+    result = {}
+    engine.processing_finished.connect(lambda r: result.update(r))
+    frames = []
+    engine.progress_updated.connect(lambda p, f, fps: frames.append(f))
+
+    engine.setup_render(clip)
+    t0 = time.perf_counter()
+    engine.run()  # síncrono: sin hilo ni event loop
+    wall = time.perf_counter() - t0
+    if "error" in result: raise RuntimeError(result["error"])
+    n = max(1, frames[-1] if frames else 0)
+    return {"frames": n, "wall_s": wall, "ms_per_frame": wall * 1000 / n, "fps": n / wall}
+
+
+def bench_hud_modules(width, height, density, args):
+    from core.hud_renderer import HUDRenderer
+    config = ConfigManager(config_dir=tempfile.mkdtemp(prefix="modesys_bench_"))
+    hud = HUDRenderer(config)
+    frame = np.full((height, width, 3), 64, np.uint8)
+    out = {}
+    for layer in list(LAYER_FILES) + ["video"]:
+        times = []
+        for i in range(args.micro_frames):
+            fr = FrameResult(frame, synthetic_detections(i, width, height, density), i)
+            t0 = time.perf_counter()
+            if layer == "video": hud.render_hud(frame, fr, {"fps": 25})
+            else: hud.render_layer(width, height, fr, {"fps": 25}, layer)
+            times.append((time.perf_counter() - t0) * 1000)
+        out[layer] = {"ms_per_frame": float(np.median(times))}
+    return out
+
+
+def bench_json_writer(width, height, density, args, tmp):
+    frames = [synthetic_detections(i, width, height, density) for i in range(args.micro_frames * 10)]
+    t0 = time.perf_counter()
+    entries = [{"index": i, "timestamp": i / 25, "detections": d.to_json_entries()} for i, d in enumerate(frames)]
+    t1 = time.perf_counter()
+    with open(os.path.join(tmp, "bench.json"), "w", encoding="utf-8") as f:
+        json.dump({"frames": entries}, f, indent=2)
+    t2 = time.perf_counter()
+    n = len(frames)
+    out = {"entries_ms_per_frame": (t1 - t0) * 1000 / n, "dump_ms_per_frame": (t2 - t1) * 1000 / n,
+           "ms_per_frame": (t2 - t0) * 1000 / n, "bytes": {"pretty": os.path.getsize(os.path.join(tmp, "bench.json"))}}
+    # Formatos compactos (output.json_format / json_tracks): tiempo de escritura y tamaño
+    data = {"metadata": {"width": width, "height": height, "fps": 25},
+            "frames": [dict(e, detections=[dict(d, track_id=k) for k, d in enumerate(e["detections"])]) for e in entries]}
+    for fmt in ("minified", "gzip"):
+        path = json_path(tmp, "bench", fmt)
+        t = time.perf_counter()
+        dump_json(data, path, fmt)
+        out[f"{fmt}_ms_per_frame"] = (time.perf_counter() - t) * 1000 / n
+        out["bytes"][fmt] = os.path.getsize(path)
+    path = tracks_path(json_path(tmp, "bench"))
+    t = time.perf_counter()
+    dump_tracks(data, path)
+    out["tracks_ms_per_frame"] = (time.perf_counter() - t) * 1000 / n
+    out["bytes"]["tracks"] = os.path.getsize(path)
+    return out
+
+
+def compare(results, baseline, tolerance):
+    """Lista de (caso, ms actual, ms referencia, ratio) más lentos que la referencia + tolerancia."""
+    regressions = []
+    for key, cur in results.items():
+        ref = baseline.get(key)
+        if not ref or not ref.get("ms_per_frame"): continue
+        ratio = cur["ms_per_frame"] / ref["ms_per_frame"]
+        if ratio > 1.0 + tolerance:
+            regressions.append((key, cur["ms_per_frame"], ref["ms_per_frame"], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--resolutions", nargs="+", default=["1280x720", "1920x1080", "3840x2160"])
+    parser.add_argument("--densities", nargs="+", type=int, default=[5, 50])
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES))
+    parser.add_argument("--frames", type=int, default=48)
+    parser.add_argument("--micro_frames", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=1, help="performance.render_workers del engine")
+    parser.add_argument("--infer_ms", type=float, default=0.0, help="Latencia simulada del detector")
+    parser.add_argument("--depth", action="store_true")
+    parser.add_argument("--skip_engine", action="store_true")
+    parser.add_argument("--out", default="")
+    parser.add_argument("--compare", default="")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="modesys_bench_")
+    results = {}
+    for res in args.resolutions:
+        width, height = (int(v) for v in res.lower().split("x"))
+        clip = make_clip(os.path.join(tmp, f"clip_{res}.mp4"), width, height, args.frames) if not args.skip_engine else None
+        for density in args.densities:
+            tag = f"{res}/d{density}"
+            if clip:
+                for profile in args.profiles:
+                    print(f"⏱  engine {profile} {tag} ...")
+                    results[f"engine/{profile}/{tag}"] = bench_engine(clip, profile, density, tmp, args)
+            for layer, r in bench_hud_modules(width, height, density, args).items():
+                results[f"hud/{layer}/{tag}"] = r
+            results[f"json/{tag}"] = bench_json_writer(width, height, density, args, tmp)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(), "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(), "platform": platform.platform(),
+            "cpu_count": os.cpu_count(), "args": vars(args)
+        },
+        "results": results
+    }
+
+    print("")
+    print(f"{'CASE':<48} {'MS/FRAME':>10} {'FPS':>8}")
+    for key, r in results.items():
+        fps = f"{r['fps']:>8.1f}" if "fps" in r else f"{'':>8}"
+        print(f"{key:<48} {r['ms_per_frame']:>10.2f} {fps}")
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{report['meta']['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 {out}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline.get("results", {}), args.tolerance)
+        print(f"\nComparado con {baseline.get('meta', {}).get('commit', args.compare)} (tolerancia {args.tolerance * 100:.0f}%)")
+        for key, cur, ref, ratio in regressions:
+            print(f"❌ {key}: {ref:.2f} -> {cur:.2f} ms/frame (x{ratio:.2f})")
+        if regressions: sys.exit(1)
+        print("✅ Sin regresiones")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Clips sintéticos y detectores simulados para los benchmarks de MODESYS.
+Sin pesos ni red: las cajas son deterministas (función del índice de frame) y se mueven suavemente,
+así el HUD (constelación, minimapa, collage) trabaja igual que con detecciones reales.
+"""
+import os
+import time
+
+import cv2
+import numpy as np
+
+from core.detections import DetectionSet, FrameResult, TYPE_CODES
+from core.hud_renderer import HUDRenderer
+
+OBJECT_LABELS = ("cell phone", "laptop", "cup", "backpack")
+
+
+def make_clip(path, width, height, frames, fps=25):
+    """Fondo con gradiente + rectángulos en movimiento (comprime como un clip real, no como ruido)."""
+    if os.path.exists(path): return path
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    yy, xx = np.mgrid[0:height, 0:width]
+    base = np.dstack([(xx * 255 // max(1, width - 1)), (yy * 255 // max(1, height - 1)), np.full_like(xx, 96)]).astype(np.uint8)
+    rng = np.random.default_rng(0)
+    blobs = rng.random((12, 4))
+    for i in range(frames):
+        frame = base.copy()
+        for bx, by, vx, vy in blobs:
+            cx = int(((bx + 0.01 * i * (vx - 0.5)) % 1.0) * width)
+            cy = int(((by + 0.01 * i * (vy - 0.5)) % 1.0) * height)
+            r = max(4, height // 20)
+            cv2.rectangle(frame, (cx - r, cy - r), (cx + r, cy + r), (int(255 * vx), int(255 * vy), 200), -1)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def synthetic_detections(frame_idx, width, height, density, seed=0):
+    """`density` cajas por frame (≈20% caras, 60% personas, 20% objetos) en coordenadas de la fuente."""
+    rng = np.random.default_rng(seed)
+    n = max(0, int(density))
+    base = rng.random((n, 4))
+    t = frame_idx * 0.004
+    cx = (base[:, 0] + t * (base[:, 2] - 0.5)) % 1.0 * width
+    cy = (base[:, 1] + t * (base[:, 3] - 0.5)) % 1.0 * height
+    size = (0.04 + 0.12 * base[:, 2]) * height
+    w = size * np.where(base[:, 3] > 0.5, 0.6, 1.0)
+    bbox = np.stack([cx - w / 2, cy - size / 2, cx + w / 2, cy + size / 2], axis=1)
+    bbox[:, [0, 2]] = bbox[:, [0, 2]].clip(0, width)
+    bbox[:, [1, 3]] = bbox[:, [1, 3]].clip(0, height)
+
+    kind = np.arange(n) % 5
+    type_code = np.where(kind == 0, TYPE_CODES["face"], np.where(kind == 4, TYPE_CODES["object"], TYPE_CODES["person"]))
+    labels = ("face", "person") + OBJECT_LABELS
+    label_id = np.where(type_code == TYPE_CODES["face"], 0,
+                        np.where(type_code == TYPE_CODES["person"], 1, 2 + np.arange(n) % len(OBJECT_LABELS)))
+    conf = 0.5 + 0.5 * base[:, 0]
+    return DetectionSet(bbox, conf, type_code, label_id, None, labels)
+
+
+class StubProcessor:
+    """Misma interfaz que YOLOProcessor (la que usa VideoEngine), sin modelos."""
+
+    def __init__(self, config_manager, density=10, infer_ms=0.0):
+        self.config = config_manager
+        self.hud = HUDRenderer(config_manager)
+        self.density = density
+        self.infer_ms = infer_ms
+        self._frame = 0
+
+    def model_identity(self):
+        return {"backend": "stub", "precision": "fp32", "files": [], "density": self.density}
+
+    def prepare_inference_frame(self, frame):
+        size = int(self.config.get("models.inference_size", 0) or 0)
+        h, w = frame.shape[:2]
+        if size <= 0 or max(h, w) <= size: return frame, 1.0
+        s = size / float(max(h, w))
+        return cv2.resize(frame, (int(round(w * s)), int(round(h * s))), interpolation=cv2.INTER_AREA), s
+
+    def tiling_settings(self):
+        return None
+
+    def detect_frame(self, frame, use_faces, use_persons, use_objects, custom_classes, scale=1.0,
+                     full_frame=None, full_scale=None):
+        t0 = time.perf_counter()
+        if self.infer_ms: time.sleep(self.infer_ms / 1000.0)
+        h, w = frame.shape[:2]
+        dets = synthetic_detections(self._frame, w / scale, h / scale, self.density)
+        self._frame += 1
+        active = [t for t, on in (("face", use_faces), ("person", use_persons), ("object", use_objects)) if on]
+        dets = dets.of_types(active)
+        latency = (time.perf_counter() - t0) * 1000
+        return {"detections": dets, "meta": {
+            "latency": latency, "device": "STUB", "avg_conf": float(dets.conf.mean()) if len(dets) else 0.0,
+            "tags": ["person"], "timings": {"stub_infer": latency, "total": latency}
+        }}
+
+    def _make_frame_result(self, frame, raw_detections, frame_number):
+        fr = FrameResult(frame, raw_detections.get("detections"), frame_number)
+        fr.stats_meta = raw_detections.get("meta", {})
+        return fr
+
+    def draw_detections(self, frame, raw_detections, frame_number, fps):
+        return self.hud.render_hud(frame, self._make_frame_result(frame, raw_detections, frame_number), {"fps": fps})
+
+
+class StubDepthProcessor:
+    """Mapa de profundidad sintético (gradiente vertical) con la interfaz estimate/finalize de DepthProcessor."""
+
+    def __init__(self):
+        self.pipe = None
+        self.alpha = 0.8
+        self.prev_depth_map = None
+
+    def estimate(self, frame):
+        h, w = frame.shape[:2]
+        return np.repeat(np.linspace(0, 255, h, dtype=np.float32)[:, None], w, axis=1).astype(np.uint8)
+
+    def finalize(self, depth_uint8, out_size):
+        out_w, out_h = out_size
+        if depth_uint8.shape[:2] != (out_h, out_w):
+            depth_uint8 = cv2.resize(depth_uint8, (out_w, out_h), interpolation=cv2.INTER_LINEAR)
+        return cv2.cvtColor(depth_uint8, cv2.COLOR_GRAY2BGR)
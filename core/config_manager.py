@@ -26,7 +26,26 @@ class ConfigManager:
                 "custom_classes": ["cell phone", "laptop"],
                 "face_confidence": 0.4,
                 "person_confidence": 0.5,
-                "object_confidence": 0.3
+                "object_confidence": 0.3,
+                # Lado largo del frame de inferencia (0 = nativo). Los modelos trabajan a 640:
+                # se reduce una sola vez para todos y las cajas vuelven a la resolución original.
+                "inference_size": 640,
+                "backend": "torch",  # torch | onnx | openvino (ver tools/export_onnx.py)
+                "cpu_threads": 0,    # hilos intra-op en CPU (0 = automático)
+                "precision": "fp32", # fp32 | int8 (ver tools/quantize_models.py)
+                # Caras pequeñas en planos 4K/6K: tiles a resolución completa además de la pasada normal
+                "face_tiling": False,
+                "tile_size": 640,
+                "tile_overlap": 0.2,
+                "tile_around_persons": False,  # sólo tiles alrededor de las personas detectadas
+                "tile_batch": 8,               # tiles (o recortes de la cascada) por pasada del modelo
+                # Cascada: el modelo de caras sólo corre sobre las personas detectadas (requiere use_persons)
+                "face_cascade": False,
+                "cascade_expand": 0.15,        # margen alrededor de cada persona (fracción de su caja)
+                # Tracker IoU: rellena track_id en el JSON (los crops deduplicados lo activan siempre)
+                "tracking": False,
+                "track_iou": 0.3,
+                "track_max_age": 15            # frames que un track sobrevive sin detección
             },
             "modules": {
                 "constellation": {
@@ -77,7 +96,10 @@ class ConfigManager:
                     "border_thick": 1,
                     "border_color": "#FFFFFF",
                     "gap_pct": 5,
-                    "opacity": 80
+                    "opacity": 80,
+                    "refresh_frames": 5,  # la miniatura de un track se recorta de nuevo cada N frames...
+                    "refresh_iou": 0.6,   # ...o antes si su caja cambia mucho (IoU con la cacheada por debajo)
+                    "slot_hold_frames": 15  # frames que un track ausente conserva su hueco del collage
                 },
                 "timecode": {
                     "enabled": True,
@@ -99,10 +121,44 @@ class ConfigManager:
             },
             "output": {
                 "save_crops": True,
+                "crop_mode": "all",       # all (JPG por cara y frame) | best (top-K por track) | interval (1 cada N frames por track)
+                "crop_top_k": 3,
+                "crop_every_n": 30,
+                "crop_metric": "sharpness",  # sharpness | conf
+                "crop_atlas": False,      # además: páginas de atlas + celdas en crops_faces/index.json
                 "output_dir": "",
                 "custom_filename": "",
                 "profile": "Final Render",
-                "codec": "H.264"
+                "codec": "H.264",
+                "encoder": "auto",   # auto | ffmpeg | opencv
+                "preset": "medium",
+                "crf": 20,
+                "hw_accel": False,
+                "layer_format": "png",  # capas Compositing: png (secuencias) | prores4444 | qtrle (un .mov con alfa por capa)
+                "json_format": "pretty",  # pretty (indent=2) | minified | gzip (.json.gz minificado)
+                "json_tracks": False,     # además: <nombre>.tracks.jsonl, una línea por track con keyframes (importador de AE)
+                "ffmpeg_path": ""
+            },
+            "performance": {
+                "decode_backend": "auto",  # auto | pyav | opencv
+                "decode_threads": 0,       # 0 = automático
+                "cache_enabled": True,     # detecciones/profundidad en <output_dir>/.modesys_cache
+                "render_workers": 0,       # procesos de render del HUD (0 = automático, 1 = un solo hilo)
+                "profile": False,          # tiempos por etapa -> <nombre>_profile.csv/.json + _trace.json
+                "progress_interval_ms": 250,  # agrupa las señales de progreso (GUI y pipe de After Effects)
+                "motion_gate": False,      # planos estáticos: reutilizar detecciones si no hay movimiento
+                "motion_threshold": 0.01,  # fracción de la miniatura (64 px) que tiene que cambiar para re-inferir
+                "motion_max_skip": 12,     # máximo de frames seguidos sin inferir
+                "scene_detect": True,      # cortes de plano: reinician suavizado de profundidad / motion gate
+                "scene_threshold": 0.45,   # distancia de Bhattacharyya entre histogramas HSV de frames seguidos
+                "scene_min_shot": 8        # frames mínimos entre cortes (flashes, fundidos rápidos)
+            },
+            "preview": {
+                "decode_max_side": 1280,   # 0 = resolución nativa
+                "inference_size": 640,     # lado largo de la inferencia del preview (0 = la del decode)
+                "cache_mb": 512,           # presupuesto de la cache de frames + miniaturas
+                "read_ahead": 48,          # frames decodificados por delante del playhead
+                "config_debounce_ms": 80   # espera tras el último cambio de un slider antes de refrescar
             },
             "style": { "global_margin": 40 }
         }
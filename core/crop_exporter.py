@@ -0,0 +1,151 @@
+"""
+Crop Exporter MODESYS
+Feat: Crops de caras deduplicados por track: top-K por nitidez (varianza del Laplaciano) o confianza,
+      o uno cada N frames por track.
+Feat: Atlas opcional (páginas en rejilla) + índice JSON (track, frame, bbox, score, celda del atlas).
+"""
+
+import os
+import json
+
+import cv2
+import numpy as np
+
+CROP_MODES = ("all", "best", "interval")
+ATLAS_CELL = 160   # lado de cada celda del atlas
+ATLAS_COLS = 16    # celdas por fila (página de 2560 px de ancho)
+ATLAS_ROWS = 16
+_SHARP_SIDE = 64   # la nitidez se mide sobre una versión reducida (comparable entre tamaños de cara)
+
+
+def sharpness(crop):
+    g = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+    h, w = g.shape[:2]
+    s = _SHARP_SIDE / float(max(h, w, 1))
+    if s < 1.0: g = cv2.resize(g, (max(1, int(w * s)), max(1, int(h * s))), interpolation=cv2.INTER_AREA)
+    return float(cv2.Laplacian(g, cv2.CV_64F).var())
+
+
+class CropExporter:
+    """
+    add(frame, detections, idx) en cada frame (caras con track_id); finish() escribe los JPG elegidos,
+    el atlas y `index.json` en `out_dir`. Los candidatos se guardan como JPEG en memoria (KB por cara).
+    candidates() / merge() permiten repartir el trabajo por bloques (re-render desde JSON).
+    """
+
+    def __init__(self, out_dir, mode="best", top_k=3, every_n=30, metric="sharpness", atlas=False):
+        self.out_dir = out_dir
+        self.mode = mode if mode in CROP_MODES else "best"
+        self.top_k = max(1, int(top_k))
+        self.every_n = max(1, int(every_n))
+        self.metric = metric
+        self.atlas = atlas
+        self._entries = {}     # track -> [entrada]
+        self._last_kept = {}   # track -> frame del último crop (modo interval)
+
+    @classmethod
+    def from_config(cls, out_dir, config_manager):
+        return cls(out_dir,
+                   config_manager.get("output.crop_mode", "all"),
+                   config_manager.get("output.crop_top_k", 3),
+                   config_manager.get("output.crop_every_n", 30),
+                   config_manager.get("output.crop_metric", "sharpness"),
+                   config_manager.get("output.crop_atlas", False))
+
+    def _score(self, crop, conf):
+        if self.metric == "conf": return float(conf)
+        return sharpness(crop)
+
+    def _offer(self, entry):
+        """Devuelve True si la entrada se queda (para no codificar JPEG de más)."""
+        track = entry["track_id"]
+        kept = self._entries.setdefault(track, [])
+        if self.mode == "interval":
+            last = self._last_kept.get(track)
+            if last is not None and entry["frame"] - last < self.every_n: return False
+            self._last_kept[track] = entry["frame"]
+            kept.append(entry)
+            return True
+        if len(kept) >= self.top_k:
+            worst = min(range(len(kept)), key=lambda i: kept[i]["score"])
+            if entry["score"] <= kept[worst]["score"]: return False
+            kept.pop(worst)
+        kept.append(entry)
+        return True
+
+    def add(self, frame, detections, frame_idx):
+        faces = detections.of_type("face")
+        if not len(faces): return
+        height, width = frame.shape[:2]
+        boxes = faces.bbox.astype(int).tolist()
+        for i, (x1, y1, x2, y2) in enumerate(boxes):
+            x1, y1, x2, y2 = max(0, x1), max(0, y1), min(width, x2), min(height, y2)
+            if x2 <= x1 or y2 <= y1: continue
+            crop = frame[y1:y2, x1:x2]
+            track = int(faces.track_id[i])
+            if track < 0: track = -(frame_idx * 1000 + i) - 1  # sin tracker: cada cara es su propio "track"
+            entry = {"track_id": track, "frame": frame_idx, "conf": float(faces.conf[i]),
+                     "bbox": [x1, y1, x2, y2], "score": self._score(crop, faces.conf[i])}
+            if self._offer(entry):
+                entry["jpeg"] = cv2.imencode(".jpg", crop)[1].tobytes()
+
+    def candidates(self):
+        return [e for kept in self._entries.values() for e in kept]
+
+    def merge(self, entries):
+        for e in sorted(entries, key=lambda e: e["frame"]):
+            jpeg = e.get("jpeg")
+            if self._offer(dict(e)) and jpeg is not None:
+                self._entries[e["track_id"]][-1]["jpeg"] = jpeg
+
+    def _write_atlas(self, entries):
+        per_page = ATLAS_COLS * ATLAS_ROWS
+        pages = []
+        for p in range(0, len(entries), per_page):
+            chunk = entries[p:p + per_page]
+            rows = -(-len(chunk) // ATLAS_COLS)
+            page = np.zeros((rows * ATLAS_CELL, min(len(chunk), ATLAS_COLS) * ATLAS_CELL, 3), np.uint8)
+            name = f"atlas_{len(pages):03d}.jpg"
+            for k, e in enumerate(chunk):
+                img = cv2.imdecode(np.frombuffer(e["jpeg"], np.uint8), cv2.IMREAD_COLOR)
+                h, w = img.shape[:2]
+                s = ATLAS_CELL / float(max(h, w))
+                img = cv2.resize(img, (max(1, int(w * s)), max(1, int(h * s))),
+                                 interpolation=cv2.INTER_AREA if s < 1 else cv2.INTER_LINEAR)
+                h, w = img.shape[:2]
+                cx, cy = (k % ATLAS_COLS) * ATLAS_CELL, (k // ATLAS_COLS) * ATLAS_CELL
+                ox, oy = cx + (ATLAS_CELL - w) // 2, cy + (ATLAS_CELL - h) // 2
+                page[oy:oy + h, ox:ox + w] = img
+                e["atlas"] = {"page": name, "x": ox, "y": oy, "w": w, "h": h}
+            cv2.imwrite(os.path.join(self.out_dir, name), page)
+            pages.append(name)
+        return pages
+
+    def finish(self):
+        """Escribe crops + atlas + index.json. Devuelve la ruta del índice (None si no hubo caras)."""
+        entries = sorted((e for e in self.candidates() if "jpeg" in e), key=lambda e: (e["track_id"] < 0, abs(e["track_id"]), e["frame"]))
+        if not entries: return None
+        os.makedirs(self.out_dir, exist_ok=True)
+        for e in entries:
+            tag = f"track_{e['track_id']:05d}" if e["track_id"] >= 0 else f"untracked_{-e['track_id'] - 1}"
+            e["file"] = f"{tag}_frame_{e['frame']:05d}.jpg"
+            with open(os.path.join(self.out_dir, e["file"]), "wb") as f:
+                f.write(e["jpeg"])
+        pages = self._write_atlas(entries) if self.atlas else []
+
+        index = {
+            "mode": self.mode, "metric": self.metric,
+            "top_k": self.top_k if self.mode == "best" else None,
+            "every_n": self.every_n if self.mode == "interval" else None,
+            "atlas_pages": pages,
+            "crops": []
+        }
+        for e in entries:
+            item = {"file": e["file"], "track_id": e["track_id"] if e["track_id"] >= 0 else None, "frame": e["frame"],
+                    "conf": round(e["conf"], 4), "score": round(e["score"], 3), "bbox": e["bbox"]}
+            if "atlas" in e: item["atlas"] = e["atlas"]
+            index["crops"].append(item)
+        path = os.path.join(self.out_dir, "index.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=2)
+        return path
@@ -7,13 +7,19 @@ import cv2
 import torch
 import numpy as np
 import os
+from pathlib import Path
 from PIL import Image
 
+DEPTH_MODEL_ID = "depth-anything/Depth-Anything-V2-Small-hf"
+# Generado por tools/quantize_models.py --depth (torch dynamic quantization, sólo CPU)
+DEPTH_INT8_PATH = Path("models") / "depth-anything-v2-small.int8.pt"
+
 class DepthProcessor:
     def __init__(self, config_manager):
         self.config = config_manager
         self.device = self._get_optimal_device()
         self.pipe = None
+        self.int8_loaded = False  # True sólo si se cargó DEPTH_INT8_PATH (sin fallback a FP32)
         
         # --- ANTI-FLICKER VARIABLES ---
         self.prev_depth_map = None # Memoria del frame anterior
@@ -40,11 +46,14 @@ class DepthProcessor:
         try:
             from transformers import pipeline
             print(f"⏳ Cargando Depth Anything V2 (Small)...")
+
+            if self.config.get("models.precision", "fp32") == "int8":
+                if self._load_int8(pipeline): return
             
             # Usamos el pipeline oficial de Transformers. 
             self.pipe = pipeline(
                 task="depth-estimation", 
-                model="depth-anything/Depth-Anything-V2-Small-hf", 
+                model=DEPTH_MODEL_ID, 
                 device=self.device
             )
             
@@ -54,7 +63,52 @@ class DepthProcessor:
             print(f"❌ Error cargando Depth Model: {e}")
             print("Asegúrate de instalar: pip install transformers")
 
-    def process_frame(self, frame):
+    def _load_int8(self, pipeline):
+        """Modelo INT8 dinámico (Linear -> qint8). Sólo corre en CPU."""
+        if not DEPTH_INT8_PATH.exists():
+            print(f"⚠️ {DEPTH_INT8_PATH} no existe, usando FP32. Ejecuta tools/quantize_models.py --depth")
+            return False
+        try:
+            from transformers import AutoImageProcessor
+            model = torch.load(str(DEPTH_INT8_PATH), map_location="cpu", weights_only=False)
+            model.eval()
+            self.device = "cpu"
+            self.pipe = pipeline(
+                task="depth-estimation",
+                model=model,
+                image_processor=AutoImageProcessor.from_pretrained(DEPTH_MODEL_ID),
+                device="cpu"
+            )
+            self.int8_loaded = True
+            print(f"✅ Modelo de Profundidad INT8 cargado en CPU")
+            return True
+        except Exception as e:
+            print(f"❌ Error cargando Depth INT8 ({e}), usando FP32.")
+            return False
+
+    def process_frame(self, frame, out_size=None):
+        """
+        `frame` puede ser el frame de inferencia ya reducido; `out_size` (w, h) es el
+        tamaño final del pase de profundidad (por defecto, el del frame recibido).
+        """
+        out_w, out_h = out_size if out_size else (frame.shape[1], frame.shape[0])
+        depth = self.estimate(frame)
+        if depth is None:
+            # Fallback en caso de error: devuelve original
+            return frame if frame.shape[:2] == (out_h, out_w) else cv2.resize(frame, (out_w, out_h))
+        return self.finalize(depth, (out_w, out_h))
+
+    def finalize(self, depth_uint8, out_size):
+        """Mapa suavizado (resolución de inferencia) -> frame BGR del tamaño de salida."""
+        out_w, out_h = out_size
+        # Escalar al tamaño de salida (el suavizado se hace a resolución de inferencia)
+        if depth_uint8.shape[:2] != (out_h, out_w):
+            depth_uint8 = cv2.resize(depth_uint8, (out_w, out_h), interpolation=cv2.INTER_LINEAR)
+        # Convertir a 3 canales (BGR) para video
+        return cv2.cvtColor(depth_uint8, cv2.COLOR_GRAY2BGR)
+
+    def estimate(self, frame):
+        """Mapa de profundidad uint8 suavizado, al tamaño de `frame`. None si falla la inferencia."""
         # Si el modelo falló, devolvemos gris plano para no romper el video
         if self.pipe is None: 
             return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
@@ -71,7 +125,7 @@ class DepthProcessor:
             # 3. Convertir a Array NumPy
             current_depth = np.array(raw_depth)
 
-            # 4. Redimensionar AL TAMAÑO DEL VIDEO (Importante para pixel-perfect)
+            # 4. Redimensionar al tamaño del frame de entrada (Importante para pixel-perfect)
             # A veces el modelo devuelve un tamaño distinto, lo ajustamos antes de mezclar
             if current_depth.shape[:2] != frame.shape[:2]:
                 current_depth = cv2.resize(current_depth, (frame.shape[1], frame.shape[0]))
@@ -82,7 +136,7 @@ class DepthProcessor:
             # Convertimos a float32 para precisión matemática
             current_depth_f = current_depth.astype(np.float32)
 
-            if self.prev_depth_map is None:
+            if self.prev_depth_map is None or self.prev_depth_map.shape != current_depth_f.shape:
                 # Primer frame: no hay con qué mezclar
                 self.prev_depth_map = current_depth_f
             else:
@@ -94,14 +148,8 @@ class DepthProcessor:
             # ---------------------------------------------------------
 
             # 6. Convertir resultado final a uint8 (0-255)
-            final_depth_uint8 = self.prev_depth_map.astype(np.uint8)
-
-            # 7. Convertir a 3 canales (BGR) para video
-            depth_bgr = cv2.cvtColor(final_depth_uint8, cv2.COLOR_GRAY2BGR)
-            
-            return depth_bgr
+            return self.prev_depth_map.astype(np.uint8)
 
         except Exception as e:
             print(f"Error procesando frame depth: {e}")
-            # Fallback en caso de error: devuelve original
-            return frame
\ No newline at end of file
+            return None
@@ -0,0 +1,68 @@
+"""
+Métricas de comparación de detecciones MODESYS
+Feat: Matching greedy por IoU entre una referencia y un candidato (mismo frame).
+Usado por los benchmarks de backends y por la verificación de modelos cuantizados.
+"""
+
+import numpy as np
+
+
+def iou_matrix(a, b):
+    """IoU entre dos arrays xyxy [N, 4] y [M, 4]."""
+    a = np.asarray(a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float32).reshape(-1, 4)
+    if not len(a) or not len(b): return np.zeros((len(a), len(b)), np.float32)
+    ix1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    iy1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    ix2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    iy2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def match_boxes(ref, test, iou_thr=0.5):
+    """
+    Emparejamiento greedy (mayor IoU primero).
+    Devuelve (ious_emparejados, n_ref, n_test).
+    """
+    m = iou_matrix(ref, test)
+    matched = []
+    if m.size:
+        used_r, used_t = set(), set()
+        for flat in np.argsort(-m, axis=None):
+            r, t = divmod(int(flat), m.shape[1])
+            if m[r, t] < iou_thr: break
+            if r in used_r or t in used_t: continue
+            used_r.add(r); used_t.add(t)
+            matched.append(float(m[r, t]))
+    return matched, m.shape[0], m.shape[1]
+
+
+class MatchAccumulator:
+    """Acumula matches frame a frame y resume mean IoU / recall / precisión."""
+
+    def __init__(self, iou_thr=0.5):
+        self.iou_thr = iou_thr
+        self.ious = []
+        self.n_ref = 0
+        self.n_test = 0
+
+    def add(self, ref, test):
+        ious, n_ref, n_test = match_boxes(ref, test, self.iou_thr)
+        self.ious.extend(ious)
+        self.n_ref += n_ref
+        self.n_test += n_test
+
+    def summary(self):
+        n_match = len(self.ious)
+        return {
+            "mean_iou": float(np.mean(self.ious)) if self.ious else 0.0,
+            "matched": n_match,
+            "ref_boxes": self.n_ref,
+            "test_boxes": self.n_test,
+            # Recall del candidato tomando la referencia como verdad
+            "recall": n_match / self.n_ref if self.n_ref else 1.0,
+            "precision": n_match / self.n_test if self.n_test else 1.0,
+        }
@@ -0,0 +1,179 @@
+"""
+Contenedores de detecciones MODESYS
+Feat: DetectionSet columnar (NumPy) usado de punta a punta: processor -> HUD -> exporters.
+Feat: Filas ordenadas por tipo, así las vistas por tipo son slices (sin copias ni string matching).
+"""
+
+import numpy as np
+
+TYPE_NAMES = ("face", "person", "object")
+TYPE_CODES = {name: code for code, name in enumerate(TYPE_NAMES)}
+
+
+class DetectionSet:
+    """
+    Columnas:
+      bbox      [N, 4] float32  xyxy en coordenadas de la fuente
+      conf      [N]    float32
+      type_code [N]    uint8    índice en TYPE_NAMES (filas ordenadas por este campo)
+      label_id  [N]    int32    índice en `labels`
+      track_id  [N]    int32    -1 = sin track
+      parent    [N]    int32    persona que contiene la fila (índice entre las filas person), -1 = ninguna
+    """
+
+    __slots__ = ("bbox", "conf", "type_code", "label_id", "track_id", "parent", "labels", "_bounds")
+
+    def __init__(self, bbox=None, conf=None, type_code=None, label_id=None, track_id=None, labels=(),
+                 parent=None, _sorted=False):
+        self.bbox = np.zeros((0, 4), np.float32) if bbox is None else np.asarray(bbox, dtype=np.float32).reshape(-1, 4)
+        n = len(self.bbox)
+        self.conf = np.zeros(n, np.float32) if conf is None else np.asarray(conf, dtype=np.float32).reshape(-1)
+        self.type_code = np.zeros(n, np.uint8) if type_code is None else np.asarray(type_code, dtype=np.uint8).reshape(-1)
+        self.label_id = np.zeros(n, np.int32) if label_id is None else np.asarray(label_id, dtype=np.int32).reshape(-1)
+        self.track_id = np.full(n, -1, np.int32) if track_id is None else np.asarray(track_id, dtype=np.int32).reshape(-1)
+        self.parent = np.full(n, -1, np.int32) if parent is None else np.asarray(parent, dtype=np.int32).reshape(-1)
+        self.labels = tuple(labels)
+
+        if not _sorted and n > 1 and np.any(np.diff(self.type_code.astype(np.int16)) < 0):
+            # Orden estable: las filas person conservan su orden relativo (y con él los índices de `parent`)
+            order = np.argsort(self.type_code, kind="stable")
+            self.bbox, self.conf, self.type_code = self.bbox[order], self.conf[order], self.type_code[order]
+            self.label_id, self.track_id, self.parent = self.label_id[order], self.track_id[order], self.parent[order]
+
+        self._bounds = np.searchsorted(self.type_code, np.arange(len(TYPE_NAMES) + 1), side="left")
+
+    # --- Constructores ---
+    @classmethod
+    def from_type(cls, type_name, bbox, conf, labels, label_id=None, parent=None):
+        """Todas las filas del mismo tipo. `labels` = vocabulario; label_id por fila (default 0)."""
+        bbox = np.asarray(bbox, dtype=np.float32).reshape(-1, 4)
+        n = len(bbox)
+        code = np.full(n, TYPE_CODES[type_name], np.uint8)
+        lid = np.zeros(n, np.int32) if label_id is None else label_id
+        return cls(bbox, conf, code, lid, None, labels, parent, _sorted=True)
+
+    @classmethod
+    def concat(cls, sets):
+        sets = [s for s in sets if s is not None and len(s)]
+        if not sets: return cls()
+        if len(sets) == 1: return sets[0]
+        # Unificar vocabularios de labels
+        vocab, remapped = [], []
+        for s in sets:
+            lut = []
+            for l in s.labels:
+                if l not in vocab: vocab.append(l)
+                lut.append(vocab.index(l))
+            remapped.append(np.array(lut or [0], np.int32)[s.label_id])
+        return cls(
+            np.concatenate([s.bbox for s in sets]),
+            np.concatenate([s.conf for s in sets]),
+            np.concatenate([s.type_code for s in sets]),
+            np.concatenate(remapped),
+            np.concatenate([s.track_id for s in sets]),
+            vocab,
+            np.concatenate([s.parent for s in sets])
+        )
+
+    @classmethod
+    def from_json_entries(cls, entries):
+        """Inverso de `to_json_entries` (re-render del HUD desde un JSON exportado)."""
+        if not entries: return cls()
+        # `parent` en el JSON = posición de la persona en la lista -> índice entre las filas person
+        first_person = next((i for i, e in enumerate(entries) if e.get("type") == "person"), 0)
+        vocab, label_id, rows, parent = [], [], [], []
+        for e in entries:
+            parent.append(-1 if e.get("parent") is None else e["parent"] - first_person)
+            r = e["rect"]
+            rows.append((r["cx"] - r["w"] / 2, r["cy"] - r["h"] / 2, r["cx"] + r["w"] / 2, r["cy"] + r["h"] / 2,
+                         e.get("conf", 0.0), TYPE_CODES.get(e.get("type"), TYPE_CODES["object"]),
+                         -1 if e.get("track_id") is None else e["track_id"]))
+            label = e.get("label", "unknown")
+            if label not in vocab: vocab.append(label)
+            label_id.append(vocab.index(label))
+        rows = np.array(rows, np.float64)
+        return cls(rows[:, :4], rows[:, 4], rows[:, 5], label_id, rows[:, 6], vocab, parent)
+
+    # --- Acceso ---
+    def __len__(self):
+        return len(self.bbox)
+
+    def __bool__(self):
+        return len(self.bbox) > 0
+
+    def _slice(self, sl):
+        return DetectionSet(self.bbox[sl], self.conf[sl], self.type_code[sl], self.label_id[sl],
+                            self.track_id[sl], self.labels, self.parent[sl], _sorted=True)
+
+    def of_type(self, type_name):
+        """Vista (slice, sin copia) de las filas de un tipo."""
+        code = TYPE_CODES[type_name]
+        return self._slice(slice(self._bounds[code], self._bounds[code + 1]))
+
+    def of_types(self, type_names):
+        if set(type_names) >= set(TYPE_NAMES): return self
+        return DetectionSet.concat([self.of_type(t) for t in TYPE_NAMES if t in type_names])
+
+    def count(self, type_name):
+        code = TYPE_CODES[type_name]
+        return int(self._bounds[code + 1] - self._bounds[code])
+
+    def subset(self, idx):
+        return DetectionSet(self.bbox[idx], self.conf[idx], self.type_code[idx], self.label_id[idx],
+                            self.track_id[idx], self.labels, self.parent[idx])
+
+    @property
+    def centers(self):
+        return ((self.bbox[:, :2] + self.bbox[:, 2:]) / 2).astype(np.int32)
+
+    def label_array(self):
+        if not len(self): return np.zeros(0, dtype=object)
+        return np.asarray(self.labels, dtype=object)[self.label_id]
+
+    def type_name(self, i):
+        return TYPE_NAMES[self.type_code[i]]
+
+    def scaled(self, factor):
+        out = self.subset(slice(None))
+        out.bbox = self.bbox * np.float32(factor)
+        return out
+
+    # --- Exporters ---
+    def to_json_entries(self):
+        """
+        Entradas `detections` del JSON de MODESYS (rect centrado, track_id None si no hay).
+        `parent` (sólo si hay) = posición de la persona contenedora en la misma lista.
+        """
+        if not len(self): return []
+        wh = self.bbox[:, 2:] - self.bbox[:, :2]
+        c = self.bbox[:, :2] + wh / 2
+        rect = np.concatenate([wh, c], axis=1).astype(np.float64).tolist()
+        labels = self.label_array().tolist()
+        conf = self.conf.astype(np.float64).tolist()
+        tracks = self.track_id.tolist()
+        types = [TYPE_NAMES[t] for t in self.type_code.tolist()]
+        entries = [
+            {
+                "label": labels[i],
+                "type": types[i],
+                "conf": conf[i],
+                "track_id": tracks[i] if tracks[i] >= 0 else None,
+                "rect": {"w": r[0], "h": r[1], "cx": r[2], "cy": r[3]}
+            }
+            for i, r in enumerate(rect)
+        ]
+        n_persons = self.count("person")
+        if n_persons and np.any(self.parent >= 0):
+            first_person = int(self._bounds[TYPE_CODES["person"]])
+            for i, p in enumerate(self.parent.tolist()):
+                if 0 <= p < n_persons: entries[i]["parent"] = first_person + p
+        return entries
+
+
+class FrameResult:
+    def __init__(self, frame, detections, frame_number):
+        self.frame = frame
+        self.detections = detections if detections is not None else DetectionSet()
+        self.frame_number = frame_number
+        self.frame_rgb = None
+        self.stats_meta = {}
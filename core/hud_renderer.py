@@ -4,6 +4,7 @@ Feat: Advanced Techy Stats with conditional latency alerts.
 Feat: Constellation overlay module (Mesh, Sequential, Hub).
 Feat: Bezier Curve mathematical implementation for Constellation links.
 Feat: Geometric node outlines controlled by UI Slider.
+Feat: Collage con miniaturas cacheadas por track (refresco cada N frames o con cambio de caja) y huecos estables.
 """
 
 import cv2
@@ -13,12 +14,20 @@ from pathlib import Path
 import platform
 import logging
 import math
+from core.detections import TYPE_NAMES
+from core.detection_metrics import iou_matrix
+
+COLLAGE_SLOTS = 5
 
 class HUDRenderer:
     def __init__(self, config_manager):
         self.config = config_manager
         self.font_path = Path("fonts/telegrama.otf")
         self.REF_H = 1080.0 
+        self._thumbs = {}  # track_id -> (bbox, frame, (lado, opacidad), miniatura RGBA) del collage
+        self._slots = {}   # track_id -> hueco del collage (persistente mientras el track siga vivo)
+        self._slot_seen = {}  # track_id -> último frame en que se vio
+        self._collage_calls = 0
     
     def _get_font(self, size_px: int) -> ImageFont.FreeTypeFont:
         final_size = max(10, int(size_px))
@@ -63,40 +72,36 @@ class HUDRenderer:
             if not cfg.get("enabled", True): return
             if not detections: return
 
-            for det in detections:
-                t = str(det.type).lower()
-                color = "#FFFFFF"
-                thickness = 2
-                
-                if "face" in t: 
-                    color = cfg.get("face_color", "#00FFFF")
-                    thickness = int(cfg.get("face_thick", 2))
-                elif "person" in t: 
-                    color = cfg.get("person_color", "#00FF00")
-                    thickness = int(cfg.get("person_thick", 2))
-                elif "object" in t: 
-                    color = cfg.get("object_color", "#FFFF00")
-                    thickness = int(cfg.get("object_thick", 2))
-                
-                c_rgb = self._hex_to_rgb(color)
-                
-                draw.rectangle(det.bbox, outline=c_rgb + (255,), width=thickness)
-                
-                if cfg.get("show_crosshair", True):
-                    cx, cy = det.center
-                    ch = 10
-                    draw.line([(cx - ch, cy), (cx + ch, cy)], fill=c_rgb + (200,), width=thickness)
-                    draw.line([(cx, cy - ch), (cx, cy + ch)], fill=c_rgb + (200,), width=thickness)
+            base_sz = 12
+            font_size = self._get_responsive_size(base_sz, h_screen, cfg.get("label_scale", 100))
+            font = self._get_font(font_size)
+            txt_col = cfg.get("label_text_color", "#000000")
+            show_crosshair = cfg.get("show_crosshair", True)
+            defaults = {"face": "#00FFFF", "person": "#00FF00", "object": "#FFFF00"}
+
+            for t in TYPE_NAMES:
+                dets = detections.of_type(t)
+                if not dets: continue
                 
-                label = f"{det.label} {det.confidence:.2f}"
-                base_sz = 12
-                font_size = self._get_responsive_size(base_sz, h_screen, cfg.get("label_scale", 100))
-                font = self._get_font(font_size)
+                c_rgb = self._hex_to_rgb(cfg.get(f"{t}_color", defaults[t]))
+                thickness = int(cfg.get(f"{t}_thick", 2))
+                boxes = dets.bbox.tolist()
+                centers = dets.centers.tolist()
+                labels = dets.label_array().tolist()
+                confs = dets.conf.tolist()
                 
-                lb = draw.textbbox((det.bbox[0], det.bbox[1]), label, font=font)
-                draw.rectangle([(det.bbox[0], lb[1]), (lb[2]+4, lb[3])], fill=c_rgb + (255,))
-                txt_col = cfg.get("label_text_color", "#000000")
-                draw.text((det.bbox[0]+2, lb[1]), label, fill=txt_col, font=font)
+                for bbox, (cx, cy), lbl, conf in zip(boxes, centers, labels, confs):
+                    draw.rectangle(bbox, outline=c_rgb + (255,), width=thickness)
+                    
+                    if show_crosshair:
+                        ch = 10
+                        draw.line([(cx - ch, cy), (cx + ch, cy)], fill=c_rgb + (200,), width=thickness)
+                        draw.line([(cx, cy - ch), (cx, cy + ch)], fill=c_rgb + (200,), width=thickness)
+                    
+                    label = f"{lbl} {conf:.2f}"
+                    lb = draw.textbbox((bbox[0], bbox[1]), label, font=font)
+                    draw.rectangle([(bbox[0], lb[1]), (lb[2]+4, lb[3])], fill=c_rgb + (255,))
+                    draw.text((bbox[0]+2, lb[1]), label, fill=txt_col, font=font)
                 
         except Exception as e:
             logging.error(f"[HUD BBOX ERROR] {e}")
@@ -144,7 +149,7 @@ class HUDRenderer:
         if not cfg.get("enabled", False): return
         
         target_types = cfg.get("targets", ["face", "person", "object"])
-        valid_points = [d.center for d in detections if str(d.type).lower() in target_types]
+        valid_points = [tuple(p) for p in detections.of_types(target_types).centers.tolist()]
         
         if len(valid_points) < 2: return
         
@@ -246,13 +251,16 @@ class HUDRenderer:
                 vx = int(x + i*sw); draw.line([(vx, y), (vx, y + map_h)], fill=grid_color, width=1)
                 hy = int(y + i*sh); draw.line([(x, hy), (x + map_w, hy)], fill=grid_color, width=1)
             base_dot = cfg.get("dot_size", 3); pt_sz = self._get_responsive_size(base_dot, h_screen)
-            for det in detections:
-                mx = x + int((det.center[0] / w_screen) * map_w); my = y + int((det.center[1] / h_screen) * map_h)
-                color = "#FFFFFF"; t = str(det.type).lower()
-                if "face" in t: color = self.config.get("modules.bboxes.face_color", "#00FFFF")
-                elif "person" in t: color = self.config.get("modules.bboxes.person_color", "#00FF00")
-                elif "object" in t: color = self.config.get("modules.bboxes.object_color", "#FFFF00")
-                draw.rectangle([(mx-pt_sz, my-pt_sz), (mx+pt_sz, my+pt_sz)], fill=color)
+            defaults = {"face": "#00FFFF", "person": "#00FF00", "object": "#FFFF00"}
+            for t in TYPE_NAMES:
+                dets = detections.of_type(t)
+                if not dets: continue
+                color = self.config.get(f"modules.bboxes.{t}_color", defaults[t])
+                c = dets.centers
+                mxs = (x + (c[:, 0] / w_screen) * map_w).astype(int).tolist()
+                mys = (y + (c[:, 1] / h_screen) * map_h).astype(int).tolist()
+                for mx, my in zip(mxs, mys):
+                    draw.rectangle([(mx-pt_sz, my-pt_sz), (mx+pt_sz, my+pt_sz)], fill=color)
         except Exception: pass
 
     def draw_timecode(self, draw, w_screen, h_screen, frame_number, fps):
@@ -294,31 +302,94 @@ class HUDRenderer:
                 curr_y += line_height
         except Exception: pass
 
-    def draw_collage(self, combined_image, draw_final, w_screen, h_screen, detections, base_image):
+    def _collage_thumb(self, frame_bgr, box, size, opac, track_id, frame_number, cfg):
+        """Miniatura RGBA de una cara. Con track_id se reutiliza hasta `refresh_frames` o un cambio de caja grande."""
+        cached = self._thumbs.get(track_id) if track_id >= 0 and frame_number is not None else None
+        if cached is not None:
+            c_box, c_frame, c_key, c_img = cached
+            if (c_key == (size, opac) and abs(frame_number - c_frame) < max(1, int(cfg.get("refresh_frames", 5)))
+                    and iou_matrix(c_box[None], box[None])[0, 0] >= cfg.get("refresh_iou", 0.6)):
+                return c_img
+        bx1, by1, bx2, by2 = box.astype(int).tolist()
+        h_img, w_img = frame_bgr.shape[:2]
+        bx1, by1, bx2, by2 = max(0, bx1), max(0, by1), min(w_img, bx2), min(h_img, by2)
+        if bx2 <= bx1 or by2 <= by1: return None
+        # Recorte y resize en BGR con cv2: sólo la miniatura pasa a RGBA para pegarla con PIL
+        crop = frame_bgr[by1:by2, bx1:bx2]
+        interp = cv2.INTER_AREA if (bx2 - bx1) > size else cv2.INTER_LINEAR
+        thumb = cv2.cvtColor(cv2.resize(crop, (size, size), interpolation=interp), cv2.COLOR_BGR2RGBA)
+        if opac < 255: thumb[..., 3] = opac
+        img = Image.fromarray(thumb)
+        if track_id >= 0 and frame_number is not None:
+            self._thumbs[track_id] = (box.copy(), frame_number, (size, opac), img)
+        return img
+
+    def _collage_slots(self, track_ids, now, hold):
+        """
+        {hueco: índice de cara}. Cada track conserva su hueco desde que aparece hasta `hold` frames
+        después de desaparecer; los nuevos toman el hueco libre más bajo (los más antiguos primero).
+        Las caras sin track (-1) ocupan los huecos que queden libres, en orden de detección.
+        """
+        present = {}
+        for i, t in enumerate(track_ids):
+            if t >= 0 and t not in present: present[t] = i
+        for t in present: self._slot_seen[t] = now
+        for t in [t for t, seen in self._slot_seen.items() if t not in present and abs(now - seen) > hold]:
+            self._slot_seen.pop(t, None)
+            self._slots.pop(t, None)
+
+        free = [s for s in range(COLLAGE_SLOTS) if s not in self._slots.values()]
+        for t in sorted(t for t in present if t not in self._slots):
+            if not free: break
+            self._slots[t] = free.pop(0)
+        layout = {self._slots[t]: i for t, i in present.items() if t in self._slots}
+        untracked = [i for i, t in enumerate(track_ids) if t < 0]
+        for s, i in zip(free, untracked): layout[s] = i
+        return layout
+
+    def draw_collage(self, combined_image, draw_final, w_screen, h_screen, detections, frame_bgr, frame_number=None):
         try:
             cfg = self.config.get("modules.collage", {})
-            if not cfg.get("enabled", True): return
-            faces = [d for d in detections if "face" in str(d.type).lower()]
-            if not faces: return
+            if not cfg.get("enabled", True) or frame_bgr is None: return
+            faces = detections.of_type("face")
+            self._collage_calls += 1
+            now = frame_number if frame_number is not None else self._collage_calls
+            ids = faces.track_id.tolist()
+            layout = self._collage_slots(ids, now, int(cfg.get("slot_hold_frames", 15)))
+            if not layout:
+                self._thumbs.clear()
+                return
             thumb_size = int(h_screen * (cfg.get("thumb_size_pct", 15) / 100.0))
+            if thumb_size <= 0: return
             gap = int(thumb_size * (cfg.get("gap_pct", 5) / 100.0))
-            count = min(len(faces), 5); col_h = count * (thumb_size + gap) - gap
+            # Columna de alto fijo: un hueco no se mueve cuando otro track entra o sale
+            col_h = COLLAGE_SLOTS * (thumb_size + gap) - gap
             x, y = self._get_anchor_pos(w_screen, h_screen, thumb_size, col_h, cfg.get("position", "bottom_right"))
             border_col = cfg.get("border_color", "#FFFFFF"); border_th = int(cfg.get("border_thick", 1))
             opac = int(cfg.get("opacity", 100) * 2.55)
-            for i, face in enumerate(faces[:count]):
+            for slot, i in sorted(layout.items()):
                 try:
-                    bx1, by1, bx2, by2 = map(int, face.bbox)
-                    bx1 = max(0, bx1); by1 = max(0, by1); bx2 = min(w_screen, bx2); by2 = min(h_screen, by2)
-                    if bx2 > bx1 and by2 > by1:
-                        crop = base_image.crop((bx1, by1, bx2, by2)).resize((thumb_size, thumb_size))
-                        if opac < 255: crop.putalpha(opac)
-                        curr_y = y + i * (thumb_size + gap)
-                        combined_image.paste(crop, (x, curr_y), crop if opac < 255 else None)
-                        if border_th > 0: draw_final.rectangle([(x, curr_y), (x+thumb_size, curr_y+thumb_size)], outline=border_col, width=border_th)
+                    thumb = self._collage_thumb(frame_bgr, faces.bbox[i], thumb_size, opac, int(ids[i]), frame_number, cfg)
+                    if thumb is None: continue
+                    curr_y = y + slot * (thumb_size + gap)
+                    combined_image.paste(thumb, (x, curr_y), thumb if opac < 255 else None)
+                    if border_th > 0: draw_final.rectangle([(x, curr_y), (x+thumb_size, curr_y+thumb_size)], outline=border_col, width=border_th)
                 except: pass
+            # Fuera de cuadro = fuera de la caché
+            visible = {ids[i] for i in layout.values()}
+            for t in [t for t in self._thumbs if t not in visible]: del self._thumbs[t]
         except: pass
 
+    def _frame_stats(self, frame_result, video_info):
+        dets = frame_result.detections
+        return {
+            "frame": frame_result.frame_number,
+            "fps": video_info.get("fps", 0),
+            "faces": dets.count("face"),
+            "persons": dets.count("person"),
+            "objects": dets.count("object")
+        }
+
     def render_hud(self, frame: np.ndarray, frame_result, video_info: dict) -> np.ndarray:
         if frame is None: return frame
         h, w = frame.shape[:2]
@@ -330,13 +401,7 @@ class HUDRenderer:
             overlay = Image.new("RGBA", base_image.size, (0,0,0,0))
             draw = ImageDraw.Draw(overlay)
             
-            stats = {
-                "frame": frame_result.frame_number,
-                "fps": video_info.get("fps", 0),
-                "faces": len([d for d in frame_result.detections if "face" in str(d.type).lower()]),
-                "persons": len([d for d in frame_result.detections if "person" in str(d.type).lower()]),
-                "objects": len([d for d in frame_result.detections if "object" in str(d.type).lower()])
-            }
+            stats = self._frame_stats(frame_result, video_info)
 
             self.draw_constellation(draw, w, h, frame_result.detections)
             self._draw_bboxes(draw, h, frame_result.detections)
@@ -347,7 +412,7 @@ class HUDRenderer:
 
             combined = Image.alpha_composite(base_image, overlay)
             draw_final = ImageDraw.Draw(combined)
-            self.draw_collage(combined, draw_final, w, h, frame_result.detections, base_image)
+            self.draw_collage(combined, draw_final, w, h, frame_result.detections, frame, frame_result.frame_number)
             
             return cv2.cvtColor(np.array(combined.convert("RGB")), cv2.COLOR_RGB2BGR)
         except Exception as e:
@@ -355,29 +420,17 @@ class HUDRenderer:
             return frame
 
     def render_layer(self, w, h, frame_result, video_info, layer_type="all"):
-        base_image = None
-        if layer_type in ["hud", "all", "collage"] and hasattr(frame_result, 'frame_rgb'):
-             base_image = Image.fromarray(frame_result.frame_rgb).convert("RGBA")
         overlay = Image.new("RGBA", (w, h), (0, 0, 0, 0))
         draw = ImageDraw.Draw(overlay)
         
-        stats = {
-            "frame": frame_result.frame_number,
-            "fps": video_info.get("fps", 0),
-            "faces": len([d for d in frame_result.detections if "face" in str(d.type).lower()]),
-            "persons": len([d for d in frame_result.detections if "person" in str(d.type).lower()]),
-            "objects": len([d for d in frame_result.detections if "object" in str(d.type).lower()])
-        }
+        stats = self._frame_stats(frame_result, video_info)
         
         if layer_type == "bbox_faces":
-            dets = [d for d in frame_result.detections if "face" in str(d.type).lower()]
-            self._draw_bboxes(draw, h, dets)
+            self._draw_bboxes(draw, h, frame_result.detections.of_type("face"))
         elif layer_type == "bbox_persons":
-            dets = [d for d in frame_result.detections if "person" in str(d.type).lower()]
-            self._draw_bboxes(draw, h, dets)
+            self._draw_bboxes(draw, h, frame_result.detections.of_type("person"))
         elif layer_type == "bbox_objects":
-            dets = [d for d in frame_result.detections if "object" in str(d.type).lower()]
-            self._draw_bboxes(draw, h, dets)
+            self._draw_bboxes(draw, h, frame_result.detections.of_type("object"))
         elif layer_type == "constellation":
             self.draw_constellation(draw, w, h, frame_result.detections)
             
@@ -389,7 +442,7 @@ class HUDRenderer:
             self.draw_timecode(draw, w, h, frame_result.frame_number, video_info.get("fps", 30))
         elif layer_type == "custom_msg":
             self.draw_custom_message(draw, w, h)
-        elif layer_type == "collage" and base_image:
-            self.draw_collage(overlay, draw, w, h, frame_result.detections, base_image)
+        elif layer_type == "collage" and frame_result.frame is not None:
+            self.draw_collage(overlay, draw, w, h, frame_result.detections, frame_result.frame, frame_result.frame_number)
             
         return cv2.cvtColor(np.array(overlay), cv2.COLOR_RGBA2BGRA)
\ No newline at end of file
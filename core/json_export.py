@@ -0,0 +1,88 @@
+"""
+JSON Export MODESYS
+Feat: JSON del proyecto indentado (legible), minificado o comprimido con gzip (.json.gz).
+Feat: Esquema compacto por track para After Effects (JSON Lines): una cabecera y una línea por track con
+      arrays de keyframes (frames, cx, cy, w, h, conf) en vez de listas de detecciones por frame.
+      El importador lee línea a línea: nunca parsea el proyecto entero de una vez.
+"""
+
+import os
+import gzip
+import json
+
+JSON_FORMATS = ("pretty", "minified", "gzip")
+TRACKS_SCHEMA = "modesys.tracks/1"
+_COMPACT = (",", ":")
+
+
+def json_format(config_manager):
+    fmt = config_manager.get("output.json_format", "pretty")
+    return fmt if fmt in JSON_FORMATS else "pretty"
+
+
+def json_path(project_dir, filename, fmt="pretty"):
+    return os.path.join(project_dir, f"{filename}.json" + (".gz" if fmt == "gzip" else ""))
+
+
+def tracks_path(path):
+    """`<nombre>.json[.gz]` -> `<nombre>.tracks.jsonl[.gz]` (misma compresión que el JSON principal)."""
+    gz = path.endswith(".gz")
+    base = path[:-3] if gz else path
+    if base.endswith(".json"): base = base[:-5]
+    return base + ".tracks.jsonl" + (".gz" if gz else "")
+
+
+def _open(path, mode):
+    if path.endswith(".gz"): return gzip.open(path, mode + "t", encoding="utf-8", compresslevel=6)
+    return open(path, mode, encoding="utf-8")
+
+
+def dump_json(data, path, fmt="pretty"):
+    with _open(path, "w") as f:
+        if fmt == "pretty": json.dump(data, f, indent=2)
+        else: json.dump(data, f, separators=_COMPACT)
+
+
+def load_json(path):
+    """JSON del proyecto en cualquiera de los formatos (gzip por extensión)."""
+    with _open(path, "r") as f:
+        return json.load(f)
+
+
+def build_tracks(data):
+    """
+    (cabecera, tracks) a partir del JSON por frames. Cada track: id, type, label y arrays paralelos
+    f (frame), cx, cy, w, h, conf. Las detecciones sin track_id no entran (cuenta en `untracked`).
+    """
+    tracks = {}
+    untracked = 0
+    for entry in data.get("frames", []):
+        idx = entry["index"]
+        for d in entry.get("detections") or []:
+            tid = d.get("track_id")
+            if tid is None:
+                untracked += 1
+                continue
+            tr = tracks.get(tid)
+            if tr is None:
+                tr = tracks[tid] = {"id": tid, "type": d.get("type"), "label": d.get("label"),
+                                    "f": [], "cx": [], "cy": [], "w": [], "h": [], "conf": []}
+            r = d["rect"]
+            tr["f"].append(idx)
+            tr["cx"].append(round(r["cx"], 1)); tr["cy"].append(round(r["cy"], 1))
+            tr["w"].append(round(r["w"], 1)); tr["h"].append(round(r["h"], 1))
+            tr["conf"].append(round(d["conf"], 3))
+
+    header = {"schema": TRACKS_SCHEMA, "metadata": data.get("metadata", {}),
+              "tracks": len(tracks), "untracked": untracked}
+    return header, [tracks[t] for t in sorted(tracks)]
+
+
+def dump_tracks(data, path):
+    """Escribe el esquema por track en `path` (.jsonl o .jsonl.gz). Devuelve el número de tracks."""
+    header, tracks = build_tracks(data)
+    with _open(path, "w") as f:
+        f.write(json.dumps(header, separators=_COMPACT) + "\n")
+        for tr in tracks:
+            f.write(json.dumps(tr, separators=_COMPACT) + "\n")
+    return len(tracks)
@@ -0,0 +1,285 @@
+"""
+Exportador de capas Compositing MODESYS
+Feat: Secuencias PNG por capa (bboxes, constelación, módulos HUD) y crops de caras.
+Feat: Re-render del HUD desde un JSON ya exportado: sin inferencia y sin decodificar video
+      (sólo se decodifica si hay collage o crops), repartido por bloques de frames entre procesos.
+Feat: Capas como un video con alfa por capa (output.layer_format: prores4444 | qtrle) en vez de PNGs.
+"""
+
+import os
+import math
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+
+from core.detections import DetectionSet, FrameResult
+from core.hud_renderer import HUDRenderer
+from core.scene_detector import plan_chunks
+from core.crop_exporter import CropExporter
+from core.tracker import IoUTracker
+from core.json_export import load_json
+from core.video_writer import create_layer_writer, layer_format, concat_videos, find_ffmpeg
+
+# capa -> (subcarpeta dentro del proyecto, prefijo de archivo)
+LAYER_FILES = {
+    "bbox_faces": (os.path.join("BBoxes", "seq_faces"), "faces"),
+    "bbox_persons": (os.path.join("BBoxes", "seq_persons"), "persons"),
+    "bbox_objects": (os.path.join("BBoxes", "seq_objects"), "objects"),
+    "constellation": (os.path.join("HUD_Elements", "seq_constellation"), "const"),
+    "minimap": (os.path.join("HUD_Elements", "seq_minimap"), "minimap"),
+    "stats": (os.path.join("HUD_Elements", "seq_stats"), "stats"),
+    "timecode": (os.path.join("HUD_Elements", "seq_timecode"), "timecode"),
+    "custom_msg": (os.path.join("HUD_Elements", "seq_custom_msg"), "custom_msg"),
+    "collage": (os.path.join("HUD_Elements", "seq_collage"), "collage"),
+}
+HUD_MODULES = ["minimap", "stats", "timecode", "custom_msg", "collage"]
+# Capas que necesitan los píxeles de la fuente
+PIXEL_LAYERS = {"collage"}
+
+
+def compositing_dirs(project_dir):
+    dirs = {layer: os.path.join(project_dir, sub) for layer, (sub, _) in LAYER_FILES.items()}
+    dirs["crops_faces"] = os.path.join(project_dir, "crops_faces")
+    return dirs
+
+
+def layer_video_path(project_dir, layer):
+    """<proyecto>/BBoxes/faces.mov, <proyecto>/HUD_Elements/minimap.mov, ..."""
+    sub, prefix = LAYER_FILES[layer]
+    return os.path.join(project_dir, os.path.dirname(sub), f"{prefix}.mov")
+
+
+def open_layer_writers(paths, fps, size, config):
+    """
+    {capa: writer} para output.layer_format de video; {} con "png".
+    Si alguna capa no abre (sin FFmpeg), todas vuelven a PNG: un proyecto no mezcla formatos.
+    """
+    if layer_format(config) == "png": return {}
+    writers = {}
+    for layer, path in paths.items():
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        w = create_layer_writer(path, fps, size, config)
+        if w is None:
+            for opened in writers.values(): opened.release()
+            print("⚠️ Capas en video no disponibles (¿FFmpeg instalado?), usando secuencias PNG.")
+            return {}
+        writers[layer] = w
+    return writers
+
+
+def enabled_layers(config):
+    layers = []
+    if config.get("modules.bboxes.enabled", True):
+        layers += ["bbox_faces", "bbox_persons", "bbox_objects"]
+    if config.get("modules.constellation.enabled", False):
+        layers.append("constellation")
+    layers += [mod for mod in HUD_MODULES if config.get(f"modules.{mod}.enabled", False)]
+    return layers
+
+
+def write_frame_layers(hud, width, height, frame_result, video_info, layers, comp_dirs, timings=None, sinks=None):
+    """
+    `timings` (opcional): lista a la que se añade (etapa, inicio, ms) del render y de la escritura de cada capa.
+    `sinks` (opcional): {capa: callable(img_bgra)} -> la capa va ahí (writer de video, memoria compartida)
+    en vez de a un PNG.
+    """
+    for layer in layers:
+        t0 = time.perf_counter()
+        img = hud.render_layer(width, height, frame_result, video_info, layer)
+        t1 = time.perf_counter()
+        if sinks and layer in sinks:
+            sinks[layer](img)
+            stage = f"encode.{layer}"
+        else:
+            prefix = LAYER_FILES[layer][1]
+            cv2.imwrite(os.path.join(comp_dirs[layer], f"{prefix}_{frame_result.frame_number:05d}.png"), img)
+            stage = f"png.{layer}"
+        if timings is not None:
+            timings.append((f"hud.{layer}", t0, (t1 - t0) * 1000))
+            timings.append((stage, t1, (time.perf_counter() - t1) * 1000))
+
+
+def write_face_crops(frame, detections, crops_dir, frame_idx):
+    height, width = frame.shape[:2]
+    for i, face_box in enumerate(detections.of_type("face").bbox.astype(int).tolist()):
+        fx1, fy1, fx2, fy2 = face_box
+        fx1, fy1 = max(0, fx1), max(0, fy1)
+        fx2, fy2 = min(width, fx2), min(height, fy2)
+        if fx2 > fx1 and fy2 > fy1:
+            cv2.imwrite(os.path.join(crops_dir, f"frame_{frame_idx:05d}_face_{i}.jpg"), frame[fy1:fy2, fx1:fx2])
+
+
+def frame_meta(raw_detections):
+    """Meta por frame que se guarda en el JSON (panel de stats al re-renderizar)."""
+    meta = raw_detections.get("meta", {})
+    return {
+        "latency": round(float(meta.get("latency", 0.0)), 2),
+        "device": meta.get("device", "CPU"),
+        "avg_conf": round(float(meta.get("avg_conf", 0.0)), 4),
+        "tags": list(meta.get("tags", []))
+    }
+
+
+# ---------------------------------------------------------
+# RE-RENDER DESDE JSON
+# ---------------------------------------------------------
+_WORKER = {}
+
+
+def _init_worker(config_manager):
+    # Un proceso por núcleo: OpenCV en un solo hilo para no sobre-suscribir la CPU
+    cv2.setNumThreads(1)
+    _WORKER["config"] = config_manager
+    _WORKER["hud"] = HUDRenderer(config_manager)
+
+
+def _render_chunk(task):
+    entries, width, height, fps, layers, comp_dirs, source, save_crops, segments = task
+    hud, config = _WORKER["hud"], _WORKER["config"]
+    video_info = {"fps": fps}
+    cap = None
+    if source:
+        from core.video_decoder import open_video
+        cap = open_video(source, config)
+
+    # Capas en video: cada bloque escribe su segmento (se concatenan en orden al final)
+    writers = open_layer_writers(segments, fps, (width, height), config) if segments else {}
+    if segments and not writers: raise RuntimeError("No se pudo abrir el encoder de capas")
+    sinks = {layer: w.write for layer, w in writers.items()}
+    # Crops deduplicados: cada bloque devuelve sus candidatos y el proceso principal elige entre todos
+    exporter = None
+    if save_crops and config.get("output.crop_mode", "all") != "all":
+        exporter = CropExporter.from_config(comp_dirs["crops_faces"], config)
+
+    done = 0
+    try:
+        for entry in entries:
+            idx = entry["index"]
+            fr = FrameResult(None, DetectionSet.from_json_entries(entry.get("detections")), idx)
+            fr.stats_meta = entry.get("meta", {})
+            frame = None
+            if cap is not None:
+                ret, frame = cap.read_at(idx)
+                if ret: fr.frame = frame
+                else: frame = None
+            write_frame_layers(hud, width, height, fr, video_info, layers, comp_dirs, sinks=sinks)
+            if save_crops and frame is not None:
+                if exporter is not None:
+                    exporter.add(frame, fr.detections, idx)
+                else: write_face_crops(frame, fr.detections, comp_dirs["crops_faces"], idx)
+            done += 1
+    finally:
+        if cap is not None: cap.release()
+        for w in writers.values(): w.release()
+    return done, exporter.candidates() if exporter is not None else []
+
+
+def _track_entries(entries, shots, config_manager):
+    """
+    Rellena track_id en las entradas del JSON (en memoria) con un único tracker sobre todos los frames,
+    reiniciado en los cortes de plano. Se hace antes de repartir bloques: los ids no dependen del bloque.
+    """
+    id_tracker = IoUTracker.from_config(config_manager, force=True)
+    cuts = {s["start"] for s in shots or []}
+    for entry in entries:
+        if entry["index"] in cuts: id_tracker.reset()
+        dets = entry.get("detections")
+        if dets: entry["detections"] = id_tracker.update(DetectionSet.from_json_entries(dets)).to_json_entries()
+
+
+def rerender_from_json(json_path, config_manager, project_dir=None, workers=0, progress_cb=None, should_stop=None):
+    """
+    Regenera las secuencias de capas de un proyecto "Compositing Ready" a partir de su JSON.
+    progress_cb(frames_hechos, total); should_stop() -> True cancela los bloques pendientes.
+    Con un bloque fallido o cancelado el resultado lleva "error" (y "cancelled"), como VideoEngine:
+    las capas quedarían con huecos y no se unen los segmentos ni se escriben los crops.
+    """
+    data = load_json(json_path)
+    meta = data.get("metadata", {})
+    entries = data.get("frames", [])
+    width, height = int(meta["width"]), int(meta["height"])
+    fps = meta.get("fps", 30) or 30
+    project_dir = project_dir or os.path.dirname(os.path.abspath(json_path))
+
+    layers = enabled_layers(config_manager)
+    save_crops = config_manager.get("output.save_crops", True)
+    source = meta.get("source", "")
+    if (PIXEL_LAYERS.intersection(layers) or save_crops) and not os.path.exists(source):
+        print(f"⚠️ Fuente no encontrada ({source}): se omiten collage y crops")
+        layers = [l for l in layers if l not in PIXEL_LAYERS]
+        save_crops = False
+    needs_pixels = bool(PIXEL_LAYERS.intersection(layers)) or save_crops
+
+    comp_dirs = compositing_dirs(project_dir)
+    video_layers = []
+    if layer_format(config_manager) != "png":
+        if find_ffmpeg(config_manager): video_layers = list(layers)
+        else: print("⚠️ Capas en video no disponibles (¿FFmpeg instalado?), usando secuencias PNG.")
+    for key in [l for l in layers if l not in video_layers] + (["crops_faces"] if save_crops else []):
+        os.makedirs(comp_dirs[key], exist_ok=True)
+
+    total = len(entries)
+    if not total or not (layers or save_crops):
+        return {"output_dir": project_dir, "json_file": json_path, "frames": 0}
+
+    # JSON sin track_id (tracking apagado en esa pasada): sin tracks cada cara sería su propio "track"
+    # para los crops deduplicados y se guardarían todas
+    if (save_crops and config_manager.get("output.crop_mode", "all") != "all"
+            and not any(d.get("track_id") is not None for e in entries for d in e.get("detections") or [])):
+        _track_entries(entries, meta.get("shots"), config_manager)
+
+    workers = int(workers or config_manager.get("performance.render_workers", 0) or 0) or (os.cpu_count() or 1)
+    # Bloques contiguos: con decodificación, cada bloque hace un solo seek y lee secuencialmente.
+    # Si el JSON trae planos, los bloques terminan en los cortes (el seek cae en un cambio de plano).
+    chunk = max(1, min(256 if needs_pixels else 64, math.ceil(total / (workers * 4))))
+    chunks = plan_chunks(total, meta.get("shots"), chunk)
+    segments = [
+        {layer: f"{os.path.splitext(layer_video_path(project_dir, layer))[0]}.part{k:04d}.mov" for layer in video_layers}
+        for k in range(len(chunks))
+    ]
+    tasks = [
+        (entries[a:b], width, height, fps, layers, comp_dirs, source if needs_pixels else "", save_crops, segments[k])
+        for k, (a, b) in enumerate(chunks)
+    ]
+
+    done = 0
+    failed = cancelled = False
+    crop_candidates = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(config_manager,)) as pool:
+        futures = [pool.submit(_render_chunk, t) for t in tasks]
+        for fut in as_completed(futures):
+            try:
+                n, candidates = fut.result()
+                done += n
+                crop_candidates += candidates
+            except Exception as e:
+                failed = True
+                logging.error(f"[HUD-ONLY] Bloque fallido: {e}")
+            if progress_cb: progress_cb(done, total)
+            if should_stop and should_stop():
+                cancelled = True
+                for f in futures: f.cancel()
+                break
+
+    result = {"output_dir": project_dir, "json_file": json_path, "frames": done}
+    if failed or cancelled:
+        result["error"] = (f"Re-render cancelado ({done}/{total} frames)" if cancelled
+                           else f"Re-render incompleto: {done}/{total} frames (ver log)")
+        result["cancelled"] = cancelled
+        return result
+    if crop_candidates:
+        crop_exporter = CropExporter.from_config(comp_dirs["crops_faces"], config_manager)
+        crop_exporter.merge(crop_candidates)
+        result["crops_index"] = crop_exporter.finish()
+    if video_layers:
+        # Segmentos -> un .mov por capa (sin recodificar)
+        result["layer_videos"] = {}
+        for layer in video_layers:
+            parts = [seg[layer] for seg in segments if os.path.exists(seg[layer])]
+            path = layer_video_path(project_dir, layer)
+            if concat_videos(parts, path, config_manager):
+                result["layer_videos"][layer] = path
+                for p in parts: os.remove(p)
+    return result
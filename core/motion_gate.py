@@ -0,0 +1,73 @@
+"""
+Motion Gate MODESYS
+Feat: Puerta de inferencia para planos estáticos (cámaras fijas, vigilancia): puntuación de movimiento
+      barata sobre una miniatura en grises contra el último frame inferido.
+Feat: Por debajo del umbral se reutilizan las detecciones anteriores, con un máximo de frames seguidos
+      sin inferir (la antigüedad de las cajas queda acotada).
+"""
+
+import cv2
+import numpy as np
+
+GATE_SIDE = 64     # lado largo de la miniatura de comparación
+_CELL_DELTA = 12   # diferencia de gris (0-255) a partir de la cual una celda cuenta como "movida"
+
+
+class MotionGate:
+    """
+    should_infer(frame) -> True si hay que correr los detectores en este frame.
+    La referencia es el último frame inferido (no el anterior): el movimiento lento se acumula
+    hasta superar el umbral en vez de perderse frame a frame.
+    """
+
+    def __init__(self, threshold=0.01, max_skip=12, side=GATE_SIDE):
+        self.threshold = float(threshold)  # fracción de celdas movidas
+        self.max_skip = max(0, int(max_skip))
+        self.side = side
+        self.reference = None
+        self.skipped = 0
+        self.last_score = 0.0
+        self.inferred = 0
+        self.carried = 0
+
+    @classmethod
+    def from_config(cls, config_manager):
+        """None si performance.motion_gate está desactivado."""
+        if not config_manager.get("performance.motion_gate", False): return None
+        return cls(config_manager.get("performance.motion_threshold", 0.01),
+                   config_manager.get("performance.motion_max_skip", 12))
+
+    def settings(self):
+        return {"threshold": self.threshold, "max_skip": self.max_skip, "side": self.side}
+
+    def _thumb(self, frame):
+        h, w = frame.shape[:2]
+        # Submuestreo por stride antes del INTER_AREA: en 4K el resize completo sería la parte cara
+        step = max(1, max(h, w) // (self.side * 4))
+        if step > 1: frame = frame[::step, ::step]
+        h, w = frame.shape[:2]
+        s = self.side / float(max(h, w))
+        small = cv2.resize(frame, (max(1, int(w * s)), max(1, int(h * s))), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+
+    def score(self, thumb):
+        if self.reference is None or self.reference.shape != thumb.shape: return 1.0
+        diff = cv2.absdiff(thumb, self.reference)
+        return float(np.count_nonzero(diff > _CELL_DELTA)) / diff.size
+
+    def should_infer(self, frame):
+        thumb = self._thumb(frame)
+        self.last_score = self.score(thumb)
+        if self.last_score >= self.threshold or self.skipped >= self.max_skip:
+            self.reference = thumb
+            self.skipped = 0
+            self.inferred += 1
+            return True
+        self.skipped += 1
+        self.carried += 1
+        return False
+
+    def reset(self):
+        """Olvida la referencia (el siguiente frame se infiere siempre)."""
+        self.reference = None
+        self.skipped = 0
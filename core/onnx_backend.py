@@ -0,0 +1,185 @@
+"""
+ONNX / OpenVINO Backend MODESYS
+Feat: Detectores YOLOv8 exportados a ONNX ejecutados con ONNX Runtime (CPU) u OpenVINO.
+Feat: Hilos intra-op configurables para granjas de render sin GPU.
+Feat: Pre/post-proceso propio (letterbox + NMS) equivalente al de Ultralytics.
+"""
+
+import ast
+import json
+import logging
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+try:
+    import openvino as ov
+except ImportError:
+    ov = None
+
+# Offset por clase para NMS por clase en una sola pasada (mismo truco que Ultralytics)
+_MAX_WH = 7680
+
+
+def int8_model_name(name):
+    """"modelo.onnx" -> "modelo.int8.onnx" (salida de tools/quantize_models.py)."""
+    p = Path(name)
+    return str(p.with_name(f"{p.stem}.int8{p.suffix}"))
+
+
+def onnx_available(engine="onnx"):
+    if engine == "openvino": return ov is not None or ort is not None
+    return ort is not None
+
+
+class OnnxDetector:
+    """
+    Envuelve un YOLOv8 exportado (salida [1, 4 + nc, N]).
+    `predict()` devuelve arrays (xyxy, conf, cls) en coordenadas del frame recibido.
+    """
+
+    def __init__(self, model_path, engine="onnx", threads=0, imgsz=640):
+        self.model_path = Path(model_path)
+        self.engine = engine
+        self.imgsz = imgsz
+        self.names = {}
+        self._session = None
+        self._compiled = None
+
+        if engine == "openvino" and ov is not None:
+            core = ov.Core()
+            cfg = {"INFERENCE_NUM_THREADS": int(threads)} if threads else {}
+            self._compiled = core.compile_model(str(self.model_path), "CPU", cfg)
+            shape = list(self._compiled.input(0).get_partial_shape())
+            self._static_hw = self._static_dims([d.get_length() if d.is_static else None for d in shape])
+            meta = {}
+        else:
+            if ort is None: raise ImportError("onnxruntime no instalado (pip install onnxruntime)")
+            opts = ort.SessionOptions()
+            opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            if threads: opts.intra_op_num_threads = int(threads)
+            providers = ["CPUExecutionProvider"]
+            if engine == "openvino" and "OpenVINOExecutionProvider" in ort.get_available_providers():
+                providers.insert(0, "OpenVINOExecutionProvider")
+            self._session = ort.InferenceSession(str(self.model_path), sess_options=opts, providers=providers)
+            inp = self._session.get_inputs()[0]
+            self._input_name = inp.name
+            self._static_hw = self._static_dims(inp.shape)
+            meta = self._session.get_modelmeta().custom_metadata_map or {}
+
+        if self._static_hw: self.imgsz = self._static_hw[0]
+        self._load_names(meta)
+
+    @staticmethod
+    def _static_dims(shape):
+        try:
+            h, w = shape[2], shape[3]
+            if isinstance(h, int) and isinstance(w, int): return (h, w)
+        except (IndexError, TypeError): pass
+        return None
+
+    def _load_names(self, meta):
+        # 1. Sidecar JSON escrito por tools/export_onnx.py (vocabulario fijo de YOLO-World)
+        sidecar = self.model_path.with_suffix(".json")
+        if sidecar.exists():
+            try:
+                data = json.loads(sidecar.read_text(encoding="utf-8"))
+                self.names = {int(k): v for k, v in data.get("names", {}).items()}
+                return
+            except Exception as e:
+                logging.error(f"[ONNX] Sidecar inválido {sidecar}: {e}")
+        # 2. Metadata embebida por Ultralytics en el export
+        if "names" in meta:
+            try: self.names = {int(k): v for k, v in ast.literal_eval(meta["names"]).items()}
+            except Exception: pass
+
+    def _letterbox(self, img):
+        h, w = img.shape[:2]
+        th, tw = self._static_hw or (self.imgsz, self.imgsz)
+        r = min(th / h, tw / w)
+        nw, nh = int(round(w * r)), int(round(h * r))
+        dw, dh = (tw - nw) / 2.0, (th - nh) / 2.0
+        if (nw, nh) != (w, h):
+            img = cv2.resize(img, (nw, nh), interpolation=cv2.INTER_LINEAR)
+        top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+        left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+        img = cv2.copyMakeBorder(img, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114))
+        return img, r, (left, top)
+
+    def _preprocess(self, frames):
+        blobs, params = [], []
+        for f in frames:
+            img, r, pad = self._letterbox(f)
+            blobs.append(img)
+            params.append((r, pad, f.shape[:2]))
+        # BGR -> RGB, HWC -> CHW, [0, 1]
+        batch = np.ascontiguousarray(np.stack(blobs)[..., ::-1].transpose(0, 3, 1, 2), dtype=np.float32) / 255.0
+        return batch, params
+
+    def _run(self, batch):
+        if self._compiled is not None:
+            return self._compiled([batch])[self._compiled.output(0)]
+        return self._session.run(None, {self._input_name: batch})[0]
+
+    @staticmethod
+    def _postprocess(pred, r, pad, shape, conf, iou, max_det, classes):
+        pred = pred.T  # [N, 4 + nc]
+        scores_all = pred[:, 4:]
+        cls = scores_all.argmax(1)
+        scores = scores_all[np.arange(len(cls)), cls]
+        keep = scores >= conf
+        if classes is not None:
+            keep &= np.isin(cls, classes)
+        pred, scores, cls = pred[keep], scores[keep], cls[keep]
+        if not len(pred):
+            return np.zeros((0, 4), np.float32), np.zeros(0, np.float32), np.zeros(0, np.int32)
+
+        cx, cy, bw, bh = pred[:, 0], pred[:, 1], pred[:, 2], pred[:, 3]
+        xyxy = np.stack([cx - bw / 2, cy - bh / 2, cx + bw / 2, cy + bh / 2], axis=1)
+
+        # NMS por clase
+        off = xyxy + (cls[:, None] * _MAX_WH)
+        nms_boxes = np.stack([off[:, 0], off[:, 1], off[:, 2] - off[:, 0], off[:, 3] - off[:, 1]], axis=1)
+        idx = cv2.dnn.NMSBoxes(nms_boxes.tolist(), scores.tolist(), conf, iou)
+        idx = np.array(idx).reshape(-1)[:max_det] if len(idx) else np.zeros(0, np.int64)
+        xyxy, scores, cls = xyxy[idx], scores[idx], cls[idx]
+
+        # Deshacer letterbox
+        xyxy[:, [0, 2]] = (xyxy[:, [0, 2]] - pad[0]) / r
+        xyxy[:, [1, 3]] = (xyxy[:, [1, 3]] - pad[1]) / r
+        h, w = shape
+        xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, w)
+        xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, h)
+        return xyxy.astype(np.float32), scores.astype(np.float32), cls.astype(np.int32)
+
+    def predict_batch(self, frames, conf=0.25, iou=0.7, max_det=300, classes=None):
+        if not frames: return []
+        batch, params = self._preprocess(frames)
+        # Export con batch fijo = 1: una inferencia por imagen
+        if self._static_batch_one():
+            preds = [self._run(batch[i:i + 1])[0] for i in range(len(frames))]
+        else:
+            preds = list(self._run(batch))
+        return [self._postprocess(p, *prm, conf, iou, max_det, classes) for p, prm in zip(preds, params)]
+
+    def predict(self, frame, conf=0.25, iou=0.7, max_det=300, classes=None):
+        return self.predict_batch([frame], conf=conf, iou=iou, max_det=max_det, classes=classes)[0]
+
+    def _static_batch_one(self):
+        try:
+            if self._session is not None:
+                return self._session.get_inputs()[0].shape[0] == 1
+            d = self._compiled.input(0).get_partial_shape()[0]
+            return d.is_static and d.get_length() == 1
+        except Exception:
+            return True
+
+    def class_ids_for(self, labels):
+        lookup = {v: k for k, v in self.names.items()}
+        return [lookup[l] for l in labels if l in lookup]
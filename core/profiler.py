@@ -0,0 +1,160 @@
+"""
+Profiler de etapas MODESYS
+Feat: Tiempos por frame y por etapa (decode, inferencia, depth, HUD por capa, encode, JSON).
+Feat: Contadores (profundidad de colas) y pico de RSS.
+Feat: Exporta CSV, JSON y Chrome Trace (chrome://tracing / Perfetto) + tabla resumen por consola.
+Feat: Totales acumulados por grupo de etapa siempre activos (utilización en el progreso).
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+def current_rss_mb():
+    """Memoria residente actual (MB). psutil si está; /proc en Linux; si no, el pico."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except Exception:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except Exception:
+        return peak_rss_mb()
+
+
+def peak_rss_mb():
+    """Pico de memoria residente del proceso (MB)."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux: KB | macOS: bytes
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    except Exception:
+        return 0.0
+
+
+class StageProfiler:
+    """
+    Uso:
+        prof.frame = idx
+        with prof.stage("decode"): ...
+        prof.add("detect.face_infer", ms)          # tiempos medidos fuera (meta del detector, workers)
+        prof.counter("writer_queue", writer.queue_depth())
+    Desactivado no guarda eventos, pero mantiene `totals` (ms acumulados por grupo:
+    "detect.face_infer" -> "detect") para la utilización por etapa del ProgressTracker.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.frame = -1
+        self.events = []    # (frame, stage, start_s, dur_ms, tid)
+        self.counters = []  # (frame, name, t_s, value)
+        self.totals = {}    # grupo -> ms acumulados
+        self._t0 = time.perf_counter()
+        self._pid = os.getpid()
+
+    @contextmanager
+    def stage(self, name):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            dur = (time.perf_counter() - t) * 1000
+            group = name.split(".", 1)[0]
+            self.totals[group] = self.totals.get(group, 0.0) + dur
+            if self.enabled: self.events.append((self.frame, name, t, dur, self._pid))
+
+    def add(self, name, dur_ms, start=None, tid=None, frame=None):
+        group = name.split(".", 1)[0]
+        self.totals[group] = self.totals.get(group, 0.0) + dur_ms
+        if not self.enabled: return
+        start = start if start is not None else time.perf_counter() - dur_ms / 1000
+        self.events.append((self.frame if frame is None else frame, name, start, dur_ms, tid or self._pid))
+
+    def counter(self, name, value):
+        if self.enabled: self.counters.append((self.frame, name, time.perf_counter(), value))
+
+    # --- Resumen ---
+    def summary(self):
+        by_stage = {}
+        for _, name, _, dur, _ in self.events:
+            by_stage.setdefault(name, []).append(dur)
+        wall = (time.perf_counter() - self._t0) * 1000
+        rows = []
+        for name, durs in by_stage.items():
+            d = np.asarray(durs)
+            rows.append({
+                "stage": name, "count": int(len(d)), "total_ms": float(d.sum()), "mean_ms": float(d.mean()),
+                "p50_ms": float(np.percentile(d, 50)), "p95_ms": float(np.percentile(d, 95)), "max_ms": float(d.max()),
+                "share": float(d.sum() / wall) if wall else 0.0
+            })
+        rows.sort(key=lambda r: r["total_ms"], reverse=True)
+        peaks = {}
+        for _, name, _, v in self.counters:
+            peaks[name] = max(peaks.get(name, v), v)
+        return {"wall_ms": wall, "peak_rss_mb": peak_rss_mb(), "stages": rows, "counter_peaks": peaks}
+
+    def print_summary(self, summary=None):
+        s = summary or self.summary()
+        # Con render pool, las etapas de los workers corren en paralelo: %WALL puede sumar > 100
+        print("")
+        print(f"{'STAGE':<28} {'N':>6} {'TOTAL s':>9} {'MEAN ms':>9} {'P95 ms':>9} {'MAX ms':>9} {'%WALL':>6}")
+        for r in s["stages"]:
+            print(f"{r['stage']:<28} {r['count']:>6} {r['total_ms'] / 1000:>9.2f} {r['mean_ms']:>9.2f} "
+                  f"{r['p95_ms']:>9.2f} {r['max_ms']:>9.2f} {r['share'] * 100:>5.1f}%")
+        extra = " | ".join(f"{k} máx {v}" for k, v in s["counter_peaks"].items())
+        print(f"⏱  Wall {s['wall_ms'] / 1000:.1f} s | Pico RSS {s['peak_rss_mb']:.0f} MB" + (f" | {extra}" if extra else ""))
+
+    # --- Export ---
+    def write(self, out_dir, basename):
+        """Escribe <basename>_profile.csv / _profile.json / _trace.json. Devuelve las rutas."""
+        if not self.enabled: return {}
+        summary = self.summary()
+        paths = {
+            "csv": os.path.join(out_dir, f"{basename}_profile.csv"),
+            "json": os.path.join(out_dir, f"{basename}_profile.json"),
+            "trace": os.path.join(out_dir, f"{basename}_trace.json"),
+        }
+        with open(paths["csv"], "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["frame", "stage", "start_ms", "dur_ms", "tid"])
+            for frame, name, start, dur, tid in self.events:
+                w.writerow([frame, name, round((start - self._t0) * 1000, 3), round(dur, 3), tid])
+
+        per_frame = {}
+        for frame, name, _, dur, _ in self.events:
+            stages = per_frame.setdefault(frame, {})
+            stages[name] = stages.get(name, 0.0) + dur
+        with open(paths["json"], "w", encoding="utf-8") as f:
+            json.dump({
+                "summary": summary,
+                "frames": [{"index": k, "stages": v} for k, v in sorted(per_frame.items())],
+                "counters": [{"frame": fr, "name": n, "value": v} for fr, n, _, v in self.counters]
+            }, f, indent=2)
+
+        events = [
+            {"name": name, "cat": name.split(".")[0], "ph": "X", "pid": self._pid, "tid": tid,
+             "ts": (start - self._t0) * 1e6, "dur": dur * 1000, "args": {"frame": frame}}
+            for frame, name, start, dur, tid in self.events
+        ]
+        events += [
+            {"name": name, "ph": "C", "pid": self._pid, "ts": (t - self._t0) * 1e6, "args": {name: value}}
+            for _, name, t, value in self.counters
+        ]
+        with open(paths["trace"], "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return paths
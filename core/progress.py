@@ -0,0 +1,104 @@
+"""
+Modelo de progreso MODESYS
+Feat: FPS de procesamiento real (EMA por ventana de tiempo), ETA y tiempo transcurrido.
+Feat: Utilización por etapa (ms de cada grupo / wall de la ventana) y memoria residente.
+Feat: Emisión de progreso agrupada por intervalo (menos señales cross-thread y repaints) + valor final exacto.
+"""
+
+import time
+
+from core.profiler import current_rss_mb, peak_rss_mb
+
+
+def format_duration(seconds):
+    if seconds is None or seconds != seconds or seconds == float("inf"): return "--:--"
+    seconds = int(round(seconds))
+    h, rem = divmod(seconds, 3600)
+    m, s = divmod(rem, 60)
+    return f"{h:d}:{m:02d}:{s:02d}" if h else f"{m:02d}:{s:02d}"
+
+
+class ProgressTracker:
+    """
+    update(frame_idx, totals) se llama en cada frame; devuelve un dict de stats
+    cada `interval` segundos (None entre medias). El total del contenedor puede ser una estimación
+    (VFR, PyAV sin frames): el último frame no se detecta aquí, el llamador pasa `force=True`.
+    `totals` = StageProfiler.totals (ms acumulados por grupo de etapa).
+    """
+
+    def __init__(self, total_frames, interval=0.5, smoothing=0.3):
+        self.total = max(1, int(total_frames))
+        self.interval = interval
+        self.smoothing = smoothing
+        self.fps = 0.0
+        self._start = time.perf_counter()
+        self._last_t = self._start
+        self._last_frame = 0
+        self._last_totals = {}
+
+    def update(self, frame_idx, totals=None, force=False):
+        now = time.perf_counter()
+        dt = now - self._last_t
+        if not force and dt < self.interval:
+            return None
+
+        frames = frame_idx - self._last_frame
+        if dt > 0 and frames > 0:
+            inst = frames / dt
+            self.fps = inst if self.fps == 0.0 else self.smoothing * inst + (1 - self.smoothing) * self.fps
+
+        utilisation = {}
+        if totals:
+            wall_ms = dt * 1000
+            for group, ms in totals.items():
+                delta = ms - self._last_totals.get(group, 0.0)
+                if wall_ms > 0 and delta > 0: utilisation[group] = round(delta / wall_ms, 3)
+            self._last_totals = dict(totals)
+
+        self._last_t, self._last_frame = now, frame_idx
+        elapsed = now - self._start
+        remaining = max(0, self.total - frame_idx)
+        eta = remaining / self.fps if self.fps > 0 else None
+        rss = current_rss_mb()
+        return {
+            "frame": frame_idx,
+            "total_frames": self.total,
+            "percent": min(100.0, frame_idx * 100.0 / self.total),
+            "fps": round(self.fps, 2),
+            "avg_fps": round(frame_idx / elapsed, 2) if elapsed > 0 else 0.0,
+            "elapsed_s": round(elapsed, 1),
+            "eta_s": round(eta, 1) if eta is not None else None,
+            "eta": format_duration(eta),
+            "utilisation": utilisation,
+            "rss_mb": round(rss, 1),
+            "peak_rss_mb": round(max(rss, peak_rss_mb()), 1)
+        }
+
+
+class ProgressThrottle:
+    """
+    Agrupa actualizaciones de progreso por intervalo de tiempo: `update(*args)` guarda el último
+    valor y sólo llama a `emit` si pasó `interval` desde la última emisión. `flush()` emite el
+    valor exacto pendiente (llamar al final del render).
+    """
+
+    def __init__(self, emit, interval=0.25):
+        self.emit = emit
+        self.interval = interval
+        self._last_emit = 0.0
+        self._pending = None
+
+    def update(self, *args):
+        now = time.perf_counter()
+        if now - self._last_emit >= self.interval:
+            self._last_emit = now
+            self._pending = None
+            self.emit(*args)
+        else:
+            self._pending = args
+
+    def flush(self):
+        if self._pending is not None:
+            args, self._pending = self._pending, None
+            self._last_emit = time.perf_counter()
+            self.emit(*args)
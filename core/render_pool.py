@@ -0,0 +1,160 @@
+"""
+Render Pool MODESYS
+Feat: Etapa de render (HUD completo + capas Compositing + crops) repartida entre procesos.
+Feat: Frames de entrada/salida en memoria compartida (slots fijos): sólo viajan las detecciones.
+Feat: Salida ordenada hacia el writer aunque los workers terminen desordenados.
+Feat: Capas Compositing en video (BGRA) también por memoria compartida hacia sus writers.
+"""
+
+import os
+import time
+import logging
+from functools import partial
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from core.detections import FrameResult
+from core.hud_renderer import HUDRenderer
+from core.layer_export import write_frame_layers, write_face_crops
+
+# Tope de memoria compartida (entrada + salida de todos los slots)
+_MAX_SHM_BYTES = 2 << 30
+
+_WORKER = {}
+
+
+def _init_worker(config_manager, shm_name, slots, shape, layer_shm_name=None, n_video_layers=0):
+    cv2.setNumThreads(1)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    buf = np.ndarray((slots, 2) + shape, dtype=np.uint8, buffer=shm.buf)
+    _WORKER.update(shm=shm, buf=buf, hud=HUDRenderer(config_manager), layer_buf=None)
+    if layer_shm_name:
+        lshm = shared_memory.SharedMemory(name=layer_shm_name)
+        _WORKER["layer_shm"] = lshm
+        _WORKER["layer_buf"] = np.ndarray((slots, n_video_layers) + shape[:2] + (4,), dtype=np.uint8, buffer=lshm.buf)
+
+
+def _render_task(task):
+    slot, idx, detections, meta, fps, draw_video, layers, comp_dirs, crops_dir, video_layers = task
+    hud, buf = _WORKER["hud"], _WORKER["buf"]
+    frame = buf[slot, 0]
+    h, w = frame.shape[:2]
+
+    timings = []  # (etapa, inicio perf_counter, ms) -> profiler del proceso principal
+    fr = FrameResult(frame, detections, idx)
+    fr.stats_meta = meta
+    if layers:
+        # Capas en video: al slot BGRA; el proceso principal las pasa a su writer en orden
+        sinks = {layer: partial(np.copyto, _WORKER["layer_buf"][slot, j]) for j, layer in enumerate(video_layers)}
+        write_frame_layers(hud, w, h, fr, {"fps": fps}, layers, comp_dirs, timings, sinks)
+    if crops_dir:
+        t = time.perf_counter()
+        write_face_crops(frame, detections, crops_dir, idx)
+        timings.append(("crops", t, (time.perf_counter() - t) * 1000))
+    if draw_video:
+        t = time.perf_counter()
+        buf[slot, 1] = hud.render_hud(frame, fr, {"fps": fps})
+        timings.append(("hud.video", t, (time.perf_counter() - t) * 1000))
+    return os.getpid(), timings
+
+
+def resolve_workers(config_manager):
+    n = int(config_manager.get("performance.render_workers", 0) or 0)
+    # Auto: dejamos un núcleo para decodificación + inferencia
+    return n if n > 0 else max(1, (os.cpu_count() or 1) - 1)
+
+
+class RenderPool:
+    """
+    submit() copia el frame a un slot libre y encola el render; los frames renderizados
+    salen por `on_output(idx, frame_bgr)` en orden de índice. Si no hay slots libres,
+    submit() espera al frame más antiguo (contrapresión natural frente a decode/inferencia).
+    `layer_sinks` = {capa: callable(img_bgra)} para las capas que van a video en vez de a PNG.
+    """
+
+    def __init__(self, config_manager, width, height, workers=None, on_output=None,
+                 layers=None, comp_dirs=None, crops_dir=None, fps=30, profiler=None, layer_sinks=None):
+        self.shape = (height, width, 3)
+        self.workers = workers or resolve_workers(config_manager)
+        self.layer_sinks = layer_sinks or {}
+        self.video_layers = [l for l in (layers or []) if l in self.layer_sinks]
+        frame_bytes = 2 * height * width * 3
+        layer_bytes = len(self.video_layers) * height * width * 4
+        # El tope cubre los dos bloques (frames + capas BGRA), cada uno contado una sola vez
+        self.slots = max(2, min(self.workers + 2, _MAX_SHM_BYTES // (frame_bytes + layer_bytes)))
+        self.on_output = on_output
+        self.layers = layers or []
+        self.comp_dirs = comp_dirs or {}
+        self.crops_dir = crops_dir
+        self.fps = fps
+        self.profiler = profiler
+
+        self._shm = shared_memory.SharedMemory(create=True, size=self.slots * frame_bytes)
+        self._buf = np.ndarray((self.slots, 2) + self.shape, dtype=np.uint8, buffer=self._shm.buf)
+        self._layer_shm, self._layer_buf = None, None
+        if self.video_layers:
+            n = len(self.video_layers)
+            self._layer_shm = shared_memory.SharedMemory(create=True, size=self.slots * layer_bytes)
+            self._layer_buf = np.ndarray((self.slots, n, height, width, 4), dtype=np.uint8, buffer=self._layer_shm.buf)
+        self._free = deque(range(self.slots))
+        self._pending = deque()  # (idx, slot, future) en orden de envío
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker,
+            initargs=(config_manager, self._shm.name, self.slots, self.shape,
+                      self._layer_shm.name if self._layer_shm else None, len(self.video_layers))
+        )
+
+    def submit(self, idx, frame, detections, meta):
+        while not self._free:
+            self._drain_one()
+        slot = self._free.popleft()
+        self._buf[slot, 0] = frame
+        task = (slot, idx, detections, meta, self.fps, self.on_output is not None,
+                self.layers, self.comp_dirs, self.crops_dir, self.video_layers)
+        self._pending.append((idx, slot, self._pool.submit(_render_task, task)))
+        # Sacar lo que ya esté listo sin bloquear
+        while self._pending and self._pending[0][2].done():
+            self._drain_one()
+
+    def queue_depth(self):
+        return len(self._pending)
+
+    def _drain_one(self):
+        idx, slot, fut = self._pending.popleft()
+        try:
+            pid, timings = fut.result()
+            if self.profiler is not None:
+                for name, start, ms in timings:
+                    self.profiler.add(name, ms, start=start, tid=pid, frame=idx)
+            out = self._buf[slot, 1]
+            ok = True
+        except Exception as e:
+            logging.error(f"[RENDER POOL] Frame {idx}: {e}")
+            out = self._buf[slot, 0]  # Fallback: frame sin HUD
+            ok = False
+        if self.on_output is not None:
+            # Copia: el slot se reutiliza en cuanto se libera
+            self.on_output(idx, out.copy())
+        for j, layer in enumerate(self.video_layers):
+            # Frame transparente si el worker falló: la capa no se desincroniza del video
+            img = self._layer_buf[slot, j].copy() if ok else np.zeros(self._layer_buf.shape[2:], np.uint8)
+            self.layer_sinks[layer](img)
+        self._free.append(slot)
+
+    def close(self):
+        try:
+            while self._pending:
+                self._drain_one()
+        finally:
+            self._pool.shutdown(wait=True)
+            del self._buf
+            self._shm.close()
+            self._shm.unlink()
+            if self._layer_shm is not None:
+                del self._layer_buf
+                self._layer_shm.close()
+                self._layer_shm.unlink()
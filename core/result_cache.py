@@ -0,0 +1,200 @@
+"""
+Cache de resultados MODESYS
+Feat: Detecciones y mapas de profundidad por frame guardados junto a la salida del proyecto.
+Feat: Clave = huella del video fuente + identidad de los modelos + umbrales + prompts.
+Feat: Re-render con los mismos ajustes de detección = sólo decodificar y redibujar el HUD.
+
+Layout:  <output_dir>/.modesys_cache/<clave>/{key.json, det_00000.npz, depth_00000.npz, ...}
+Cada .npz agrupa un bloque de frames consecutivos (lectura secuencial = un archivo por bloque).
+"""
+
+import os
+import json
+import hashlib
+import logging
+from pathlib import Path
+
+import numpy as np
+
+from core.detections import DetectionSet
+
+CACHE_DIRNAME = ".modesys_cache"
+_FINGERPRINT_BYTES = 1 << 20  # 1 MB de cabecera + 1 MB de cola
+
+
+def source_fingerprint(path):
+    """Huella barata del archivo: tamaño + mtime + sha1 de la cabecera y la cola."""
+    st = os.stat(path)
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        h.update(f.read(_FINGERPRINT_BYTES))
+        if st.st_size > _FINGERPRINT_BYTES:
+            f.seek(max(_FINGERPRINT_BYTES, st.st_size - _FINGERPRINT_BYTES))
+            h.update(f.read(_FINGERPRINT_BYTES))
+    return {"name": os.path.basename(path), "size": st.st_size, "mtime": int(st.st_mtime), "sha1": h.hexdigest()}
+
+
+def cache_key(settings):
+    return hashlib.sha1(json.dumps(settings, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+class _ChunkStore:
+    """
+    Bloques de `chunk_size` frames en .npz. Se mantiene un solo bloque en memoria:
+    el render es secuencial, así que cada archivo se lee/escribe una vez.
+    """
+
+    def __init__(self, directory, prefix, chunk_size):
+        self.dir = Path(directory)
+        self.prefix = prefix
+        self.chunk_size = chunk_size
+        self._chunk = None
+        self._items = {}
+        self._dirty = False
+
+    def _path(self, chunk):
+        return self.dir / f"{self.prefix}_{chunk:05d}.npz"
+
+    def _switch(self, chunk):
+        if chunk == self._chunk: return
+        self.flush()
+        self._chunk, self._items = chunk, {}
+        path = self._path(chunk)
+        if path.exists():
+            try:
+                with np.load(path, allow_pickle=False) as data:
+                    self._items = self._unpack(data)
+            except Exception as e:
+                logging.error(f"[CACHE] Bloque corrupto {path.name}, se descarta: {e}")
+
+    def get(self, idx):
+        self._switch(idx // self.chunk_size)
+        return self._items.get(idx)
+
+    def put(self, idx, item):
+        self._switch(idx // self.chunk_size)
+        self._items[idx] = item
+        self._dirty = True
+
+    def flush(self):
+        if not self._dirty or not self._items: return
+        self.dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(self._chunk)
+        tmp = path.with_suffix(".tmp")
+        try:
+            with open(tmp, "wb") as f:
+                self._save(f, self._pack(self._items))
+            os.replace(tmp, path)
+        except Exception as e:
+            logging.error(f"[CACHE] No se pudo escribir {path.name}: {e}")
+        self._dirty = False
+
+    def _save(self, f, arrays):
+        np.savez(f, **arrays)
+
+    def _pack(self, items):
+        raise NotImplementedError
+
+    def _unpack(self, data):
+        raise NotImplementedError
+
+
+class _DetectionStore(_ChunkStore):
+    def _pack(self, items):
+        frames = sorted(items)
+        vocab, sets, metas = [], [], []
+        for i in frames:
+            dets, meta = items[i]
+            lut = []
+            for l in dets.labels:
+                if l not in vocab: vocab.append(l)
+                lut.append(vocab.index(l))
+            sets.append((dets, np.array(lut or [0], np.int32)[dets.label_id]))
+            metas.append(json.dumps(meta))
+        return {
+            "frames": np.array(frames, np.int64),
+            "counts": np.array([len(d) for d, _ in sets], np.int64),
+            "bbox": np.concatenate([d.bbox for d, _ in sets]),
+            "conf": np.concatenate([d.conf for d, _ in sets]),
+            "type_code": np.concatenate([d.type_code for d, _ in sets]),
+            "label_id": np.concatenate([l for _, l in sets]),
+            "track_id": np.concatenate([d.track_id for d, _ in sets]),
+            "parent": np.concatenate([d.parent for d, _ in sets]),
+            "labels": np.array(vocab, dtype=str),
+            "meta": np.array(metas, dtype=str)
+        }
+
+    def _unpack(self, data):
+        labels = data["labels"].tolist()
+        bounds = np.concatenate([[0], np.cumsum(data["counts"])])
+        cols = [data[k] for k in ("bbox", "conf", "type_code", "label_id", "track_id")]
+        # Chunks anteriores a la columna parent
+        parent = data["parent"] if "parent" in data.files else np.full(len(cols[0]), -1, np.int32)
+        items = {}
+        for j, (idx, meta) in enumerate(zip(data["frames"].tolist(), data["meta"].tolist())):
+            sl = slice(bounds[j], bounds[j + 1])
+            items[idx] = (DetectionSet(*(c[sl] for c in cols), labels, parent[sl], _sorted=True), json.loads(meta))
+        return items
+
+
+class _DepthStore(_ChunkStore):
+    def _save(self, f, arrays):
+        # Mapas uint8 suaves: comprimen muy bien
+        np.savez_compressed(f, **arrays)
+
+    def _pack(self, items):
+        frames = sorted(items)
+        return {"frames": np.array(frames, np.int64), "maps": np.stack([items[i] for i in frames])}
+
+    def _unpack(self, data):
+        return dict(zip(data["frames"].tolist(), data["maps"]))
+
+
+class ResultCache:
+    """
+    Detecciones (DetectionSet + meta) y mapas de profundidad (uint8, resolución de inferencia)
+    por índice de frame. Claves separadas: cambiar el detector no invalida la profundidad y viceversa.
+    """
+
+    def __init__(self, root, det_settings=None, depth_settings=None, chunk_size=128, depth_chunk_size=32):
+        self.root = Path(root)
+        self.det = self._open(_DetectionStore, "det", det_settings, chunk_size)
+        self.depth = self._open(_DepthStore, "depth", depth_settings, depth_chunk_size)
+        self.hits = {"det": 0, "depth": 0}
+
+    def _open(self, store_cls, prefix, settings, chunk_size):
+        if settings is None: return None
+        directory = self.root / f"{prefix}_{cache_key(settings)}"
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            key_file = directory / "key.json"
+            if not key_file.exists():
+                key_file.write_text(json.dumps(settings, indent=2, sort_keys=True, default=str), encoding="utf-8")
+        except OSError as e:
+            logging.error(f"[CACHE] Sin cache '{prefix}' ({directory}): {e}")
+            return None
+        return store_cls(directory, prefix, chunk_size)
+
+    def get_detections(self, idx):
+        """{"detections": DetectionSet, "meta": {...}} o None."""
+        item = self.det.get(idx) if self.det else None
+        if item is None: return None
+        self.hits["det"] += 1
+        return {"detections": item[0], "meta": item[1]}
+
+    def put_detections(self, idx, raw):
+        if not self.det: return
+        meta = {k: v for k, v in raw.get("meta", {}).items() if k != "timings"}
+        self.det.put(idx, (raw["detections"], meta))
+
+    def get_depth(self, idx):
+        item = self.depth.get(idx) if self.depth else None
+        if item is not None: self.hits["depth"] += 1
+        return item
+
+    def put_depth(self, idx, depth_map):
+        if self.depth and depth_map is not None: self.depth.put(idx, depth_map)
+
+    def flush(self):
+        for store in (self.det, self.depth):
+            if store: store.flush()
@@ -0,0 +1,71 @@
+"""
+Inferencia por tiles MODESYS
+Feat: Rejilla de tiles con solape sobre el frame a resolución completa (caras pequeñas en planos 4K/6K).
+Feat: Tiles restringidos a las regiones de las personas detectadas (opcional).
+Feat: Fusión de cajas entre tiles con NMS (las caras cortadas por el borde de un tile se resuelven en el vecino).
+"""
+
+import cv2
+import numpy as np
+
+
+def _axis_starts(length, tile, step):
+    if length <= tile: return [0]
+    starts = list(range(0, length - tile, step))
+    starts.append(length - tile)  # el último tile pegado al borde (sin tiles recortados)
+    return starts
+
+
+def tile_grid(width, height, tile, overlap=0.2, origin=(0, 0)):
+    """Tiles (x1, y1, x2, y2) de lado `tile` que cubren width x height, con `overlap` (fracción) entre vecinos."""
+    step = max(1, int(tile * (1.0 - overlap)))
+    ox, oy = origin
+    return [(ox + x, oy + y, ox + min(x + tile, width), oy + min(y + tile, height))
+            for y in _axis_starts(height, tile, step) for x in _axis_starts(width, tile, step)]
+
+
+def _merge_regions(boxes):
+    """Une las regiones que se solapan (pocas personas por frame: O(n²) basta)."""
+    boxes = [list(b) for b in boxes]
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(boxes)):
+            for j in range(i + 1, len(boxes)):
+                a, b = boxes[i], boxes[j]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    boxes[i] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                    del boxes[j]
+                    merged = True
+                    break
+            if merged: break
+    return boxes
+
+
+def person_tiles(person_xyxy, width, height, tile, overlap=0.2, pad=0.15):
+    """Tiles sólo alrededor de las personas (cajas ampliadas `pad`, unidas si se solapan)."""
+    if not len(person_xyxy): return []
+    xyxy = np.asarray(person_xyxy, np.float32)
+    wh = xyxy[:, 2:] - xyxy[:, :2]
+    grown = np.concatenate([xyxy[:, :2] - wh * pad, xyxy[:, 2:] + wh * pad], axis=1)
+    grown[:, [0, 2]] = grown[:, [0, 2]].clip(0, width)
+    grown[:, [1, 3]] = grown[:, [1, 3]].clip(0, height)
+
+    tiles = set()
+    for x1, y1, x2, y2 in _merge_regions(grown.astype(int).tolist()):
+        rw, rh = x2 - x1, y2 - y1
+        if rw <= 0 or rh <= 0: continue
+        # Regiones más chicas que un tile: tile completo centrado (mismo contexto que la rejilla)
+        cx = min(max(0, x1 - max(0, tile - rw) // 2), max(0, width - tile))
+        cy = min(max(0, y1 - max(0, tile - rh) // 2), max(0, height - tile))
+        for t in tile_grid(max(rw, min(tile, width)), max(rh, min(tile, height)), tile, overlap, (cx, cy)):
+            tiles.add((t[0], t[1], min(t[2], width), min(t[3], height)))
+    return sorted(tiles)
+
+
+def merge_nms(xyxy, conf, iou=0.5):
+    """Índices que sobreviven al NMS entre tiles (y la pasada de frame completo)."""
+    if not len(xyxy): return np.zeros(0, np.int64)
+    boxes = np.concatenate([xyxy[:, :2], xyxy[:, 2:] - xyxy[:, :2]], axis=1)
+    idx = cv2.dnn.NMSBoxes(boxes.tolist(), conf.astype(float).tolist(), 0.0, iou)
+    return np.array(idx).reshape(-1) if len(idx) else np.zeros(0, np.int64)
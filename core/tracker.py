@@ -0,0 +1,80 @@
+"""
+Tracker MODESYS
+Feat: Tracker IoU greedy por tipo (cara / persona / objeto): rellena DetectionSet.track_id.
+Feat: Tracks que sobreviven `max_age` frames sin detección (oclusiones cortas, frames del motion gate).
+"""
+
+import numpy as np
+
+from core.detection_metrics import iou_matrix
+
+
+class IoUTracker:
+    """
+    update(detections) -> copia de `detections` con track_id asignado. Emparejamiento greedy por IoU
+    (mayor primero) sólo entre filas del mismo tipo; lo que no empareja abre un track nuevo.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_age=15):
+        self.iou_threshold = float(iou_threshold)
+        self.max_age = max(0, int(max_age))
+        self.next_id = 0
+        self._ids = np.zeros(0, np.int32)
+        self._boxes = np.zeros((0, 4), np.float32)
+        self._types = np.zeros(0, np.uint8)
+        self._age = np.zeros(0, np.int32)
+
+    @classmethod
+    def from_config(cls, config_manager, force=False):
+        """None si models.tracking está desactivado (salvo `force`: lo necesita otro módulo)."""
+        if not (force or config_manager.get("models.tracking", False)): return None
+        return cls(config_manager.get("models.track_iou", 0.3), config_manager.get("models.track_max_age", 15))
+
+    def settings(self):
+        return {"iou": self.iou_threshold, "max_age": self.max_age}
+
+    def update(self, detections):
+        n = len(detections)
+        track_id = np.full(n, -1, np.int32)
+        matched = np.zeros(len(self._ids), bool)
+
+        if n and len(self._ids):
+            iou = iou_matrix(self._boxes, detections.bbox)
+            iou[self._types[:, None] != detections.type_code[None, :]] = 0.0
+            ti, di = np.nonzero(iou >= self.iou_threshold)
+            for k in np.argsort(-iou[ti, di], kind="stable"):
+                t, d = ti[k], di[k]
+                if matched[t] or track_id[d] >= 0: continue
+                matched[t] = True
+                track_id[d] = self._ids[t]
+
+        # Tracks emparejados: caja nueva; el resto envejece y caduca pasado max_age
+        hit = track_id >= 0
+        if hit.any():
+            pos = {tid: i for i, tid in enumerate(self._ids.tolist())}
+            rows = np.array([pos[t] for t in track_id[hit].tolist()], np.int64)
+            self._boxes[rows] = detections.bbox[hit]
+        self._age = np.where(matched, 0, self._age + 1).astype(np.int32)
+        alive = self._age <= self.max_age
+        self._ids, self._boxes, self._types, self._age = self._ids[alive], self._boxes[alive], self._types[alive], self._age[alive]
+
+        new = ~hit
+        if new.any():
+            ids = np.arange(self.next_id, self.next_id + int(new.sum()), dtype=np.int32)
+            self.next_id += len(ids)
+            track_id[new] = ids
+            self._ids = np.concatenate([self._ids, ids])
+            self._boxes = np.concatenate([self._boxes, detections.bbox[new]])
+            self._types = np.concatenate([self._types, detections.type_code[new]])
+            self._age = np.concatenate([self._age, np.zeros(len(ids), np.int32)])
+
+        out = detections.subset(slice(None))
+        out.track_id = track_id
+        return out
+
+    def reset(self):
+        """Corte de plano: ningún track continúa (los ids no se reutilizan)."""
+        self._ids = np.zeros(0, np.int32)
+        self._boxes = np.zeros((0, 4), np.float32)
+        self._types = np.zeros(0, np.uint8)
+        self._age = np.zeros(0, np.int32)
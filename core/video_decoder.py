@@ -0,0 +1,229 @@
+"""
+Video Decoders MODESYS
+Feat: Backend de decodificación intercambiable (PyAV multihilo / OpenCV).
+Feat: Lectura secuencial sin re-seek; seek frame-accurate con índice de keyframes.
+Feat: Downscale opcional durante la decodificación (swscale en PyAV).
+"""
+
+import bisect
+import logging
+from abc import ABC, abstractmethod
+
+import cv2
+
+try:
+    import av
+except ImportError:
+    av = None
+
+
+def _fit_size(src_w, src_h, size=None, max_side=None):
+    """Resuelve el tamaño de salida: (w, h) explícito o lado largo máximo, manteniendo aspecto."""
+    if size:
+        return int(size[0]), int(size[1])
+    if max_side and max(src_w, src_h) > max_side:
+        s = max_side / float(max(src_w, src_h))
+        # Dimensiones pares para no pelear con swscale / yuv420p
+        return max(2, int(src_w * s) // 2 * 2), max(2, int(src_h * s) // 2 * 2)
+    return src_w, src_h
+
+
+class VideoDecoder(ABC):
+    """Interfaz común. `position` es el índice del próximo frame que devolverá read()."""
+
+    def __init__(self):
+        self.src_width = 0
+        self.src_height = 0
+        self.width = 0
+        self.height = 0
+        self.fps = 30.0
+        self.total_frames = 0
+        self.position = 0
+
+    @property
+    def scale(self):
+        """Factor salida/fuente (1.0 si no hay downscale)."""
+        return self.width / float(self.src_width) if self.src_width else 1.0
+
+    @abstractmethod
+    def isOpened(self): ...
+
+    @abstractmethod
+    def read(self): ...
+
+    @abstractmethod
+    def seek(self, idx): ...
+
+    @abstractmethod
+    def release(self): ...
+
+    def read_at(self, idx):
+        """Lee el frame `idx`. Si es el siguiente en secuencia no hay seek."""
+        if idx != self.position:
+            self.seek(idx)
+        return self.read()
+
+
+class OpenCVDecoder(VideoDecoder):
+    # Saltos cortos hacia delante: grab() es más barato que un seek de FFmpeg
+    FORWARD_GRAB_LIMIT = 30
+
+    def __init__(self, path, size=None, max_side=None, threads=0):
+        super().__init__()
+        params = []
+        if threads and hasattr(cv2, "CAP_PROP_N_THREADS"):
+            params = [cv2.CAP_PROP_N_THREADS, int(threads)]
+        self.cap = cv2.VideoCapture(path, cv2.CAP_ANY, params) if params else cv2.VideoCapture(path)
+
+        if self.cap.isOpened():
+            self.src_width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            self.src_height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+            self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.width, self.height = _fit_size(self.src_width, self.src_height, size, max_side)
+
+    def isOpened(self):
+        return self.cap is not None and self.cap.isOpened()
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if not ret: return False, None
+        self.position += 1
+        if (self.width, self.height) != (self.src_width, self.src_height):
+            frame = cv2.resize(frame, (self.width, self.height), interpolation=cv2.INTER_AREA)
+        return True, frame
+
+    def seek(self, idx):
+        idx = max(0, int(idx))
+        if self.position < idx <= self.position + self.FORWARD_GRAB_LIMIT:
+            while self.position < idx and self.cap.grab():
+                self.position += 1
+            return
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+        self.position = idx
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+
+class PyAVDecoder(VideoDecoder):
+    def __init__(self, path, size=None, max_side=None, threads=0):
+        super().__init__()
+        self.path = path
+        self.container = av.open(path)
+        self.stream = self.container.streams.video[0]
+        self.stream.thread_type = "AUTO"
+        if threads: self.stream.thread_count = int(threads)
+
+        ctx = self.stream.codec_context
+        self.src_width, self.src_height = ctx.width, ctx.height
+        rate = self.stream.average_rate or self.stream.guessed_rate
+        self.fps = float(rate) if rate else 30.0
+        self.time_base = float(self.stream.time_base)
+        self.start_pts = self.stream.start_time or 0
+
+        self.total_frames = int(self.stream.frames or 0)
+        if not self.total_frames and self.stream.duration:
+            self.total_frames = int(self.stream.duration * self.time_base * self.fps)
+
+        self.width, self.height = _fit_size(self.src_width, self.src_height, size, max_side)
+        self._iter = self.container.decode(self.stream)
+        self._pending = None
+        self._keyframes = None  # pts de keyframes (lazy)
+        self._gop_pts = None    # keyframe del GOP que se está decodificando
+
+    def isOpened(self):
+        return self.container is not None
+
+    def _pts_for(self, idx):
+        return self.start_pts + int(round(idx / (self.fps * self.time_base)))
+
+    def _index_for(self, pts):
+        return int(round((pts - self.start_pts) * self.time_base * self.fps))
+
+    def _build_keyframe_index(self):
+        """Demux sin decodificar: sólo recorre paquetes para anotar los pts de keyframes."""
+        kfs = []
+        try:
+            with av.open(self.path) as c:
+                s = c.streams.video[0]
+                for pkt in c.demux(s):
+                    if pkt.is_keyframe and pkt.pts is not None:
+                        kfs.append(pkt.pts)
+        except Exception as e:
+            logging.error(f"[DECODER] Error indexando keyframes: {e}")
+        kfs.sort()
+        self._keyframes = kfs or [self.start_pts]
+
+    def _keyframe_before(self, pts):
+        if self._keyframes is None: self._build_keyframe_index()
+        i = bisect.bisect_right(self._keyframes, pts) - 1
+        return self._keyframes[max(0, i)]
+
+    def _next_frame(self):
+        if self._pending is not None:
+            f, self._pending = self._pending, None
+            return f
+        try:
+            return next(self._iter)
+        except (StopIteration, av.error.EOFError):
+            return None
+
+    def _to_bgr(self, frame):
+        if (self.width, self.height) != (self.src_width, self.src_height):
+            return frame.to_ndarray(width=self.width, height=self.height, format="bgr24", interpolation="AREA")
+        return frame.to_ndarray(format="bgr24")
+
+    def read(self):
+        frame = self._next_frame()
+        if frame is None: return False, None
+        if frame.pts is not None:
+            self.position = self._index_for(frame.pts) + 1
+            if frame.key_frame: self._gop_pts = frame.pts
+        else:
+            self.position += 1
+        return True, self._to_bgr(frame)
+
+    def seek(self, idx):
+        idx = max(0, int(idx))
+        target = self._pts_for(idx)
+        kf = self._keyframe_before(target)
+
+        # Mismo GOP y por delante de la posición actual: decodificar hacia delante sin seek
+        if not (idx >= self.position and self._gop_pts == kf):
+            self.container.seek(kf, stream=self.stream, backward=True, any_frame=False)
+            self._iter = self.container.decode(self.stream)
+            self._pending = None
+            self._gop_pts = kf
+
+        while True:
+            frame = self._next_frame()
+            if frame is None: break
+            if frame.key_frame and frame.pts is not None: self._gop_pts = frame.pts
+            if frame.pts is None or frame.pts >= target - 1:
+                self._pending = frame
+                break
+        self.position = idx
+
+    def release(self):
+        if self.container is not None:
+            self.container.close()
+            self.container = None
+
+
+def open_video(path, config_manager=None, size=None, max_side=None):
+    """Abre el video con el backend de `performance.decode_backend` (auto | pyav | opencv)."""
+    backend = config_manager.get("performance.decode_backend", "auto") if config_manager else "auto"
+    threads = config_manager.get("performance.decode_threads", 0) if config_manager else 0
+
+    if backend in ("auto", "pyav") and av is not None:
+        try:
+            return PyAVDecoder(path, size=size, max_side=max_side, threads=threads)
+        except Exception as e:
+            logging.error(f"[DECODER] PyAV falló ({e}), usando OpenCV.")
+    elif backend == "pyav":
+        print("⚠️ PyAV no instalado (pip install av), usando OpenCV.")
+
+    return OpenCVDecoder(path, size=size, max_side=max_side, threads=threads)
@@ -1,10 +1,24 @@
 import cv2
 import time
-import json
 import os
+import logging
 import urllib.parse
 from PySide6.QtCore import QThread, Signal
-from core.yolo_processor import YOLOProcessor
+from core.video_writer import create_video_writer, video_extension
+from core.video_decoder import open_video
+from core.result_cache import ResultCache, CACHE_DIRNAME, source_fingerprint
+from core.render_pool import RenderPool, resolve_workers
+from core.profiler import StageProfiler
+from core.progress import ProgressTracker, ProgressThrottle
+from core.motion_gate import MotionGate
+from core.scene_detector import SceneDetector
+from core.tracker import IoUTracker
+from core.crop_exporter import CropExporter
+from core.json_export import json_format, json_path, tracks_path, dump_json, dump_tracks
+from core.layer_export import (
+    compositing_dirs, enabled_layers, write_frame_layers, write_face_crops, frame_meta, rerender_from_json,
+    layer_video_path, open_layer_writers
+)
 
 try:
     from core.depth_processor import DepthProcessor
@@ -13,17 +27,25 @@ except ImportError:
     print("⚠️ DepthProcessor no disponible (Falta instalar 'transformers'?)")
 
 class VideoEngine(QThread):
+    # (porcentaje, frame, FPS de procesamiento suavizado)
     progress_updated = Signal(int, int, float)
+    # dict de ProgressTracker: fps, eta, utilización por etapa, memoria
+    stats_updated = Signal(dict)
     processing_finished = Signal(dict)
 
-    def __init__(self, config_manager):
+    def __init__(self, config_manager, processor=None, depth_processor=None):
+        """`processor` / `depth_processor` inyectables (benchmarks con detectores simulados)."""
         super().__init__()
         self.config = config_manager
         self.running = False
         self.paused = False
         self.video_path = ""
-        self.processor = YOLOProcessor(config_manager)
-        self.depth_processor = None 
+        if processor is None:
+            # Import diferido: ultralytics + torch sólo cuando hace falta el detector real
+            from core.yolo_processor import YOLOProcessor
+            processor = YOLOProcessor(config_manager)
+        self.processor = processor
+        self.depth_processor = depth_processor
 
     def setup_render(self, video_path):
         self.video_path = video_path
@@ -38,6 +60,47 @@ class VideoEngine(QThread):
                 except Exception as e:
                     print(f"❌ Error iniciando DepthProcessor: {e}")
 
+    def _open_cache(self, cap, out_dir, use_flags, custom_classes, with_depth, gate=None, scenes=None):
+        """Cache de detecciones/profundidad compartida entre renders del mismo clip (ver core/result_cache.py)."""
+        if not self.config.get("performance.cache_enabled", True): return None
+        try:
+            source = source_fingerprint(self.video_path)
+        except OSError as e:
+            print(f"⚠️ Cache desactivada: {e}")
+            return None
+        infer_size = int(self.config.get("models.inference_size", 0) or 0)
+        det_settings = {
+            "source": source,
+            "decode": [cap.width, cap.height],
+            "inference_size": infer_size,
+            "models": self.processor.model_identity(),
+            "face_confidence": self.config.get("models.face_confidence", 0.4),
+            "person_confidence": self.config.get("models.person_confidence", 0.25),
+            "use": list(use_flags),
+            "classes": sorted({c.strip().lower() for c in (custom_classes or []) if c.strip()}),
+            "motion_gate": gate.settings() if gate else None,
+            "tiling": self.processor.tiling_settings(),
+            "cascade": [self.config.get("models.face_cascade", False), self.config.get("models.cascade_expand", 0.15)],
+            "scenes": scenes.settings() if scenes else None
+        }
+        depth_settings = None
+        if with_depth and getattr(self.depth_processor, "pipe", None) is not None:
+            from core.depth_processor import DEPTH_MODEL_ID
+            depth_settings = {
+                "source": source,
+                "decode": [cap.width, cap.height],
+                "inference_size": infer_size,
+                "model": DEPTH_MODEL_ID,
+                "precision": self.config.get("models.precision", "fp32"),
+                "alpha": self.depth_processor.alpha,
+                # El suavizado se reinicia en cada corte
+                "scenes": scenes.settings() if scenes else None
+            }
+        return ResultCache(os.path.join(out_dir, CACHE_DIRNAME), det_settings, depth_settings)
+
+    def _progress_interval(self):
+        return max(0, int(self.config.get("performance.progress_interval_ms", 250) or 0)) / 1000.0
+
     def run(self):
         final_path = self.video_path
         if not os.path.exists(final_path):
@@ -49,19 +112,27 @@ class VideoEngine(QThread):
             return
 
         self.video_path = final_path
-        cap = cv2.VideoCapture(self.video_path)
+        out_conf = self.config.get("output")
+        is_json_only = (out_conf.get("profile", "Final Render") == "JSON Only")
+
+        # JSON Only no necesita píxeles a resolución completa: decodificamos directo
+        # al tamaño de inferencia y las cajas se remapean a coordenadas de la fuente
+        # (salvo con tiles de caras, que trabajan sobre el frame completo).
+        infer_size = int(self.config.get("models.inference_size", 0) or 0)
+        tiling = self.config.get("models.face_tiling", False)
+        reduce_decode = is_json_only and infer_size > 0 and not tiling
+        cap = open_video(self.video_path, self.config, max_side=(infer_size if reduce_decode else None))
         
         if not cap.isOpened():
             self.processing_finished.emit({"error": "Could not open video file"})
             return
         
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        width = cap.src_width
+        height = cap.src_height
+        fps = cap.fps
+        total_frames = cap.total_frames
         if total_frames == 0: total_frames = 1
 
-        out_conf = self.config.get("output")
         # --- REBRANDING AQUÍ ---
         filename = out_conf.get("custom_filename") or f"MODESYS_{int(time.time())}"
         out_dir = out_conf.get("output_dir", "outputs")
@@ -69,50 +140,46 @@ class VideoEngine(QThread):
         project_dir = os.path.join(out_dir, filename)
         os.makedirs(project_dir, exist_ok=True)
         
-        save_path_json = os.path.join(project_dir, f"{filename}.json")
-        save_path_video = os.path.join(project_dir, f"{filename}.mp4")
-        save_path_depth = os.path.join(project_dir, f"{filename}_depth.mp4")
+        # output.json_format: pretty | minified | gzip (.json.gz); output.json_tracks: esquema por track para AE
+        json_fmt = json_format(self.config)
+        save_path_json = json_path(project_dir, filename, json_fmt)
+        save_tracks = out_conf.get("json_tracks", False)
+        ext = video_extension(out_conf.get("codec", "H.264"))
+        save_path_video = os.path.join(project_dir, f"{filename}{ext}")
+        save_path_depth = os.path.join(project_dir, f"{filename}_depth{ext}")
         
         profile = out_conf.get("profile", "Final Render")
         is_compositing = (profile == "Compositing Ready")
-        is_json_only = (profile == "JSON Only")
         save_crops = out_conf.get("save_crops", True)
 
         comp_dirs = {}
+        comp_layers = []
+        layer_writers = {}
         if is_compositing:
-            bbox_base = os.path.join(project_dir, "BBoxes")
-            hud_base = os.path.join(project_dir, "HUD_Elements")
-            
-            comp_dirs = {
-                "bbox_faces": os.path.join(bbox_base, "seq_faces"),
-                "bbox_persons": os.path.join(bbox_base, "seq_persons"),
-                "bbox_objects": os.path.join(bbox_base, "seq_objects"),
-                "constellation": os.path.join(hud_base, "seq_constellation"),
-                "minimap": os.path.join(hud_base, "seq_minimap"),
-                "stats": os.path.join(hud_base, "seq_stats"),
-                "timecode": os.path.join(hud_base, "seq_timecode"),
-                "custom_msg": os.path.join(hud_base, "seq_custom_msg"),
-                "collage": os.path.join(hud_base, "seq_collage"),
-                "crops_faces": os.path.join(project_dir, "crops_faces")
-            }
-            for d in comp_dirs.values():
-                os.makedirs(d, exist_ok=True)
+            comp_dirs = compositing_dirs(project_dir)
+            comp_layers = enabled_layers(self.config)
+            # output.layer_format: un .mov con alfa por capa (encoders en sus propios hilos) o secuencias PNG
+            layer_writers = open_layer_writers({l: layer_video_path(project_dir, l) for l in comp_layers},
+                                               fps, (width, height), self.config)
+            for key, d in comp_dirs.items():
+                if key not in layer_writers: os.makedirs(d, exist_ok=True)
+        layer_sinks = {layer: w.write for layer, w in layer_writers.items()}
+
+        # Crops: "all" = un JPG por cara y frame; "best" / "interval" = deduplicados por track (necesitan tracker)
+        crop_exporter = None
+        if is_compositing and save_crops and out_conf.get("crop_mode", "all") != "all":
+            crop_exporter = CropExporter.from_config(comp_dirs["crops_faces"], self.config)
         
         use_depth = self.config.get("models.use_depth", False)
 
         writer = None
         writer_depth = None 
 
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        try:
-            if out_conf.get("codec") == "H.265": fourcc = cv2.VideoWriter_fourcc(*'hevc')
-        except: pass
-
         if not is_json_only:
-            writer = cv2.VideoWriter(save_path_video, fourcc, fps, (width, height))
+            writer = create_video_writer(save_path_video, fps, (width, height), self.config)
             
         if use_depth and self.depth_processor and not is_json_only:
-            writer_depth = cv2.VideoWriter(save_path_depth, fourcc, fps, (width, height))
+            writer_depth = create_video_writer(save_path_depth, fps, (width, height), self.config)
 
         self.json_data = {
             "metadata": {
@@ -130,108 +197,255 @@ class VideoEngine(QThread):
         use_objects = self.config.get("models.use_objects")
         custom_classes = self.config.get("models.custom_classes")
 
+        # Instrumentación por etapa (performance.profile / headless --profile)
+        prof = StageProfiler(self.config.get("performance.profile", False))
+
+        # Render del HUD repartido en procesos (el hilo principal sigue con decode + inferencia)
+        render_pool = None
+        if not is_json_only and self.processor.hud and resolve_workers(self.config) > 1:
+            try:
+                render_pool = RenderPool(
+                    self.config, width, height,
+                    on_output=(lambda idx, img: writer.write(img)) if writer is not None else None,
+                    layers=comp_layers, comp_dirs=comp_dirs,
+                    crops_dir=comp_dirs["crops_faces"] if is_compositing and save_crops and crop_exporter is None else None,
+                    fps=fps, profiler=prof, layer_sinks=layer_sinks
+                )
+                print(f"🧵 Render pool: {render_pool.workers} procesos, {render_pool.slots} slots")
+            except Exception as e:
+                print(f"⚠️ Render pool no disponible, render en un solo hilo: {e}")
+
+        # Planos estáticos: reutilizar las detecciones del último frame inferido (performance.motion_gate)
+        gate = MotionGate.from_config(self.config)
+        if gate: self.json_data["metadata"]["motion_gate"] = gate.settings()
+        last_detections = None
+        # Cortes de plano: reinician el estado temporal y quedan en metadata.shots
+        scenes = SceneDetector.from_config(self.config)
+        id_tracker = IoUTracker.from_config(self.config, force=crop_exporter is not None or save_tracks)
+        if id_tracker: self.json_data["metadata"]["tracking"] = id_tracker.settings()
+
+        cache = self._open_cache(cap, out_dir, (use_faces, use_persons, use_objects), custom_classes,
+                                 writer_depth is not None, gate, scenes)
+
         frame_idx = 0
+        stage_totals = {}
+        tracker = ProgressTracker(total_frames)
+        progress_out = ProgressThrottle(self.progress_updated.emit, self._progress_interval())
         
-        while self.running and cap.isOpened():
-            if self.paused:
-                time.sleep(0.1)
-                continue
+        # Un error del loop (p. ej. el encoder murió) no deja el hilo sin respuesta: se libera todo y se reporta
+        run_error = None
+        try:
+            while self.running and cap.isOpened():
+                if self.paused:
+                    time.sleep(0.1)
+                    continue
 
-            ret, frame = cap.read()
-            if not ret: break
+                prof.frame = frame_idx
+                with prof.stage("decode"):
+                    ret, frame = cap.read()
+                if not ret: break
 
-            raw_detections = self.processor.detect_frame(
-                frame, use_faces, use_persons, use_objects, custom_classes
-            )
+                if scenes:
+                    with prof.stage("scene_detect"):
+                        cut = scenes.is_cut(frame)
+                    if cut:
+                        # No arrastrar profundidad ni detecciones de un plano al siguiente
+                        if self.depth_processor is not None: self.depth_processor.prev_depth_map = None
+                        if gate: gate.reset()
+                        if id_tracker: id_tracker.reset()
 
-            if writer_depth is not None:
-                try:
-                    depth_frame = self.depth_processor.process_frame(frame)
-                    writer_depth.write(depth_frame)
-                except Exception: pass
+                infer_frame = None
+                inferred = True
+                if gate:
+                    with prof.stage("motion_gate"):
+                        inferred = gate.should_infer(frame) or last_detections is None
+                if not inferred:
+                    # Mismas cajas; sin latencia ni tiempos (no hubo inferencia)
+                    raw_detections = {"detections": last_detections["detections"],
+                                      "meta": dict(last_detections.get("meta", {}), latency=0.0, timings={})}
+                else:
+                    raw_detections = cache.get_detections(frame_idx) if cache else None
+                if raw_detections is None:
+                    infer_frame, infer_scale = self.processor.prepare_inference_frame(frame)
+                    raw_detections = self.processor.detect_frame(
+                        infer_frame, use_faces, use_persons, use_objects, custom_classes,
+                        scale=cap.scale * infer_scale, full_frame=frame, full_scale=cap.scale
+                    )
+                    if cache: cache.put_detections(frame_idx, raw_detections)
+                if inferred: last_detections = raw_detections
+                for k, v in raw_detections.get("meta", {}).get("timings", {}).items():
+                    stage_totals[k] = stage_totals.get(k, 0.0) + v
+                    if k != "total": prof.add(f"detect.{k}", v)
+                if id_tracker:
+                    with prof.stage("track"):
+                        raw_detections = dict(raw_detections, detections=id_tracker.update(raw_detections["detections"]))
 
-            frame_entry = { "index": frame_idx, "timestamp": frame_idx / fps, "detections": [] }
-            
-            all_dets = []
-            if use_faces: all_dets.extend([{"type": "face", **d} for d in raw_detections.get("faces", [])])
-            if use_persons: all_dets.extend([{"type": "person", **d} for d in raw_detections.get("persons", [])])
-            if use_objects: all_dets.extend([{"type": "object", **d} for d in raw_detections.get("objects", [])])
-
-            for d in all_dets:
-                x1, y1, x2, y2 = d['bbox']
-                w_box = x2 - x1
-                h_box = y2 - y1
-                det_entry = {
-                    "label": d.get('label', 'unknown'),
-                    "type": d['type'],
-                    "conf": float(d.get('confidence', 0)),
-                    "track_id": d.get('track_id'),
-                    "rect": { "w": float(w_box), "h": float(h_box), "cx": float(x1 + w_box/2), "cy": float(y1 + h_box/2) }
-                }
-                frame_entry["detections"].append(det_entry)
-            
-            self.json_data["frames"].append(frame_entry)
-
-            if not is_json_only:
-                if is_compositing and self.processor.hud:
-                    frame_result = self.processor._make_frame_result(frame, raw_detections, frame_idx)
-                    frame_result.frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    video_info = {"fps": fps}
-                    
-                    if self.config.get("modules.bboxes.enabled", True):
-                        img_f = self.processor.hud.render_layer(width, height, frame_result, video_info, "bbox_faces")
-                        cv2.imwrite(os.path.join(comp_dirs["bbox_faces"], f"faces_{frame_idx:05d}.png"), img_f)
-                        
-                        img_p = self.processor.hud.render_layer(width, height, frame_result, video_info, "bbox_persons")
-                        cv2.imwrite(os.path.join(comp_dirs["bbox_persons"], f"persons_{frame_idx:05d}.png"), img_p)
-                        
-                        img_o = self.processor.hud.render_layer(width, height, frame_result, video_info, "bbox_objects")
-                        cv2.imwrite(os.path.join(comp_dirs["bbox_objects"], f"objects_{frame_idx:05d}.png"), img_o)
-                    
-                    if self.config.get("modules.constellation.enabled", False):
-                        img_c = self.processor.hud.render_layer(width, height, frame_result, video_info, "constellation")
-                        cv2.imwrite(os.path.join(comp_dirs["constellation"], f"const_{frame_idx:05d}.png"), img_c)
-                    
-                    hud_modules = ["minimap", "stats", "timecode", "custom_msg", "collage"]
-                    for mod in hud_modules:
-                        if self.config.get(f"modules.{mod}.enabled", False):
-                            img_h = self.processor.hud.render_layer(width, height, frame_result, video_info, mod)
-                            cv2.imwrite(os.path.join(comp_dirs[mod], f"{mod}_{frame_idx:05d}.png"), img_h)
-                    
-                    if save_crops:
-                        for i, face_det in enumerate(raw_detections.get("faces", [])):
-                            fx1, fy1, fx2, fy2 = map(int, face_det["bbox"])
-                            fx1, fy1 = max(0, fx1), max(0, fy1)
-                            fx2, fy2 = min(width, fx2), min(height, fy2)
-                            if fx2 > fx1 and fy2 > fy1:
-                                crop = frame[fy1:fy2, fx1:fx2]
-                                cv2.imwrite(os.path.join(comp_dirs["crops_faces"], f"frame_{frame_idx:05d}_face_{i}.jpg"), crop)
+                if writer_depth is not None:
+                    try:
+                        with prof.stage("depth"):
+                            depth_map = cache.get_depth(frame_idx) if cache else None
+                            if depth_map is None:
+                                if infer_frame is None:
+                                    infer_frame, _ = self.processor.prepare_inference_frame(frame)
+                                depth_map = self.depth_processor.estimate(infer_frame)
+                                if cache: cache.put_depth(frame_idx, depth_map)
+                            else:
+                                # Mantener el estado anti-flicker por si el siguiente frame no está en cache
+                                self.depth_processor.prev_depth_map = depth_map.astype("float32")
+                            # Fallback en caso de error: frame original
+                            depth_frame = self.depth_processor.finalize(depth_map, (width, height)) if depth_map is not None else frame
+                        with prof.stage("encode.depth"):
+                            writer_depth.write(depth_frame)
+                    except Exception: pass
+
+                with prof.stage("json.entry"):
+                    detections = raw_detections["detections"]
+                    active_types = [t for t, on in (("face", use_faces), ("person", use_persons), ("object", use_objects)) if on]
+                    frame_entry = {
+                        "index": frame_idx,
+                        "timestamp": frame_idx / fps,
+                        "detections": detections.of_types(active_types).to_json_entries(),
+                        "meta": frame_meta(raw_detections)
+                    }
+                    if gate: frame_entry["inferred"] = inferred
+                    self.json_data["frames"].append(frame_entry)
+
+                if crop_exporter is not None:
+                    with prof.stage("crops"):
+                        crop_exporter.add(frame, detections, frame_idx)
+
+                if render_pool is not None:
+                    with prof.stage("render_pool.submit"):
+                        render_pool.submit(frame_idx, frame, detections, raw_detections.get("meta", {}))
+                    prof.counter("render_pool_queue", render_pool.queue_depth())
+                elif not is_json_only:
+                    if is_compositing and self.processor.hud:
+                        frame_result = self.processor._make_frame_result(frame, raw_detections, frame_idx)
+                        layer_timings = [] if prof.enabled else None
+                        write_frame_layers(self.processor.hud, width, height, frame_result, {"fps": fps}, comp_layers, comp_dirs,
+                                           layer_timings, layer_sinks)
+                        for name, t0, ms in layer_timings or []: prof.add(name, ms, start=t0)
+                        if save_crops and crop_exporter is None:
+                            with prof.stage("crops"):
+                                write_face_crops(frame, detections, comp_dirs["crops_faces"], frame_idx)
                                 
+                    if writer is not None:
+                        with prof.stage("hud.video"):
+                            processed_frame = self.processor.draw_detections(frame, raw_detections, frame_idx, fps)
+                        with prof.stage("encode.video"):
+                            writer.write(processed_frame)
                 if writer is not None:
-                    processed_frame = self.processor.draw_detections(frame, raw_detections, frame_idx, fps)
-                    writer.write(processed_frame)
+                    prof.counter("writer_queue", writer.queue_depth())
 
-            frame_idx += 1
-            progress = int((frame_idx / total_frames) * 100)
-            self.progress_updated.emit(progress, frame_idx, fps)
+                frame_idx += 1
+                stats = tracker.update(frame_idx, prof.totals)
+                if stats: self.stats_updated.emit(stats)
+                progress = int((frame_idx / total_frames) * 100)
+                progress_out.update(progress, frame_idx, tracker.fps)
+        except Exception as e:
+            run_error = e
+            logging.error(f"[ENGINE] Frame {frame_idx}: {e}")
 
+        progress_out.flush()
+        final_stats = tracker.update(frame_idx, prof.totals, force=True)
+        self.stats_updated.emit(final_stats)
+        prof.frame = -1
         cap.release()
-        if writer is not None: writer.release()
-        if writer_depth is not None: writer_depth.release()
+        with prof.stage("render_pool.drain"):
+            try:
+                if render_pool is not None: render_pool.close()
+            except Exception as e:
+                run_error = run_error or e
+        if cache is not None:
+            cache.flush()
+            if cache.hits["det"] or cache.hits["depth"]:
+                print(f"♻️  Cache: detecciones {cache.hits['det']}/{frame_idx} | profundidad {cache.hits['depth']}/{frame_idx}")
+        if scenes:
+            self.json_data["metadata"]["shots"] = scenes.shots(frame_idx)
+            print(f"🎬 Planos detectados: {len(self.json_data['metadata']['shots'])}")
+        if gate:
+            self.json_data["metadata"]["motion_gate"].update(inferred_frames=gate.inferred, carried_frames=gate.carried)
+            print(f"🚦 Motion gate: {gate.inferred}/{frame_idx} frames inferidos ({gate.carried} reutilizados)")
+        if frame_idx and stage_totals and not prof.enabled:
+            print("⏱  Detección (ms/frame): " + " | ".join(f"{k} {v / frame_idx:.1f}" for k, v in stage_totals.items()))
+        with prof.stage("encode.flush"):
+            for w in [writer, writer_depth] + list(layer_writers.values()):
+                if w is None: continue
+                try:
+                    w.release()
+                except Exception as e:
+                    run_error = run_error or e
+        if run_error is not None:
+            self.processing_finished.emit({"error": f"Render interrumpido: {run_error}"})
+            return
         
         try:
-            with open(save_path_json, 'w', encoding='utf-8') as f:
-                json.dump(self.json_data, f, indent=2)
+            with prof.stage("json.dump"):
+                dump_json(self.json_data, save_path_json, json_fmt)
             
             result_data = {
                 "output_dir": project_dir, 
                 "json_file": save_path_json
             }
+            if save_tracks:
+                with prof.stage("json.tracks"):
+                    result_data["tracks_file"] = tracks_path(save_path_json)
+                    dump_tracks(self.json_data, result_data["tracks_file"])
             if not is_json_only: 
                 result_data["video_file"] = save_path_video
             if writer_depth:
                 result_data["depth_file"] = save_path_depth
+            if crop_exporter is not None:
+                with prof.stage("crops.finish"):
+                    index_path = crop_exporter.finish()
+                if index_path: result_data["crops_index"] = index_path
+            if layer_writers:
+                result_data["layer_videos"] = {layer: w.path for layer, w in layer_writers.items()}
+            result_data["stats"] = final_stats
+            if prof.enabled:
+                prof.print_summary()
+                result_data["profile_files"] = prof.write(project_dir, filename)
                 
             self.processing_finished.emit(result_data)
         except Exception as e:
-            self.processing_finished.emit({"error": str(e)})
\ No newline at end of file
+            self.processing_finished.emit({"error": str(e)})
+
+
+class HudRerenderEngine(QThread):
+    """Re-render de las capas Compositing desde un JSON exportado (sin inferencia). Mismas señales que VideoEngine."""
+    progress_updated = Signal(int, int, float)
+    stats_updated = Signal(dict)
+    processing_finished = Signal(dict)
+
+    def __init__(self, config_manager):
+        super().__init__()
+        self.config = config_manager
+        self.json_path = ""
+        self.running = False
+
+    def setup_render(self, json_path):
+        self.json_path = json_path
+        self.running = True
+
+    def run(self):
+        if not os.path.exists(self.json_path):
+            self.processing_finished.emit({"error": f"Invalid path: {self.json_path}"})
+            return
+        tracker = None
+        interval = max(0, int(self.config.get("performance.progress_interval_ms", 250) or 0)) / 1000.0
+        progress_out = ProgressThrottle(self.progress_updated.emit, interval)
+
+        def on_progress(done, total):
+            nonlocal tracker
+            if tracker is None: tracker = ProgressTracker(total)
+            stats = tracker.update(done, force=done >= total)
+            if stats: self.stats_updated.emit(stats)
+            progress_out.update(int(done / total * 100), done, tracker.fps)
+
+        try:
+            result = rerender_from_json(self.json_path, self.config, progress_cb=on_progress,
+                                        should_stop=lambda: not self.running)
+            progress_out.flush()
+            self.processing_finished.emit(result)
+        except Exception as e:
+            self.processing_finished.emit({"error": str(e)})
@@ -0,0 +1,313 @@
+"""
+Video Writers MODESYS
+Feat: FFmpeg pipe encoder (libx264 / libx265 / ProRes) con preset y CRF configurables.
+Feat: Escritura en hilo separado (cola acotada) para no bloquear el loop de inferencia.
+Feat: Fallback automático a cv2.VideoWriter cuando FFmpeg no está instalado.
+Feat: Capas con alfa (ProRes 4444 / QuickTime Animation) por pipe BGRA para el perfil Compositing Ready.
+"""
+
+import os
+import sys
+import shutil
+import queue
+import logging
+import threading
+import subprocess
+from abc import ABC, abstractmethod
+
+import cv2
+import numpy as np
+
+# Nombre normalizado -> extensión de contenedor
+CODEC_EXTENSIONS = {
+    "H.264": ".mp4",
+    "H.265": ".mp4",
+    "ProRes": ".mov",
+}
+
+# output.layer_format -> codec con canal alfa (todos en .mov)
+LAYER_CODECS = {
+    "prores4444": "ProRes4444",
+    "qtrle": "QTRLE",
+}
+
+_PROBE_SIZE = 256   # los encoders por hardware rechazan tamaños muy chicos
+_PROBED = {}        # (ffmpeg, args, alfa) -> el encoder funciona en esta máquina
+
+X264_PRESETS = ["ultrafast", "superfast", "veryfast", "faster", "fast", "medium", "slow", "slower", "veryslow"]
+
+
+def normalize_codec(name):
+    """Mapea los nombres de la UI ("H.265 (HEVC)", "ProRes 422 HQ"...) a una clave interna."""
+    n = str(name or "").upper()
+    if n.startswith("H.265") or "HEVC" in n: return "H.265"
+    if "PRORES" in n: return "ProRes"
+    return "H.264"
+
+
+def video_extension(codec_name):
+    return CODEC_EXTENSIONS.get(normalize_codec(codec_name), ".mp4")
+
+
+def find_ffmpeg(config_manager=None):
+    custom = config_manager.get("output.ffmpeg_path", "") if config_manager else ""
+    if custom and os.path.exists(custom): return custom
+    return shutil.which("ffmpeg")
+
+
+def probe_encoder(ffmpeg_bin, codec_args, alpha=False):
+    """
+    True si FFmpeg puede codificar con `codec_args` aquí (encoder compilado y, en hardware, GPU presente).
+    Un frame a `-f null`: con el pipe del writer el fallo sólo aparece después del primer write.
+    """
+    args = [a for a in codec_args if a not in ("-movflags", "+faststart")]
+    key = (ffmpeg_bin, tuple(args), alpha)
+    if key not in _PROBED:
+        channels = 4 if alpha else 3
+        cmd = [ffmpeg_bin, "-hide_banner", "-loglevel", "error",
+               "-f", "rawvideo", "-pix_fmt", "bgra" if alpha else "bgr24", "-s", f"{_PROBE_SIZE}x{_PROBE_SIZE}",
+               "-i", "-", "-frames:v", "1"] + args + ["-f", "null", "-"]
+        try:
+            proc = subprocess.run(cmd, input=bytes(_PROBE_SIZE * _PROBE_SIZE * channels),
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=20)
+            _PROBED[key] = proc.returncode == 0
+            if proc.returncode != 0:
+                logging.error(f"[FFMPEG] Encoder no disponible ({' '.join(args[:2])}): "
+                              f"{proc.stderr.decode(errors='ignore').strip()[-300:]}")
+        except Exception as e:
+            logging.error(f"[FFMPEG] No se pudo probar el encoder: {e}")
+            _PROBED[key] = False
+    return _PROBED[key]
+
+
+class _ThreadedWriter(ABC):
+    """Base: los frames entran a una cola y un hilo dedicado los codifica en orden."""
+
+    def __init__(self, queue_size=16):
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._error = None
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while True:
+            frame = self._queue.get()
+            if frame is None: break
+            if self._error is not None: continue
+            try:
+                self._write_sync(frame)
+            except Exception as e:
+                self._error = e
+                logging.error(f"[WRITER] {e}")
+
+    @abstractmethod
+    def _write_sync(self, frame):
+        """Codifica un frame (hilo del writer)."""
+
+    def _close(self):
+        pass
+
+    def write(self, frame):
+        """
+        El writer toma posesión del array: el llamador no debe mutarlo después.
+        Un error del hilo de codificación se relanza aquí (y en release()): el video quedaría truncado.
+        """
+        if self._error is not None: raise self._error
+        if frame is None or self._thread is None: return
+        self._queue.put(frame)
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def release(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        self._close()
+        if self._error is not None:
+            err, self._error = self._error, None
+            raise err
+
+
+class FFmpegWriter(_ThreadedWriter):
+    def __init__(self, path, fps, size, codec="H.264", preset="medium", crf=20,
+                 hw_accel=False, ffmpeg_bin="ffmpeg", queue_size=16):
+        super().__init__(queue_size)
+        self.path = path
+        self.size = (int(size[0]), int(size[1]))
+        # Los codecs de capas (con alfa) no pasan por normalize_codec
+        self.codec = codec if codec in LAYER_CODECS.values() else normalize_codec(codec)
+        self.alpha = self.codec in LAYER_CODECS.values()
+        self.proc = None
+
+        w, h = self.size
+        cmd = [
+            ffmpeg_bin, "-y", "-hide_banner", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgra" if self.alpha else "bgr24", "-s", f"{w}x{h}", "-r", f"{fps:.6f}",
+            "-i", "-", "-an",
+        ]
+        # yuv420p exige dimensiones pares
+        if self.codec in ("H.264", "H.265") and (w % 2 or h % 2):
+            cmd += ["-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2"]
+        codec_args = self._codec_args(self.codec, preset, int(crf), hw_accel)
+        cmd += codec_args
+        cmd.append(path)
+
+        if not probe_encoder(ffmpeg_bin, codec_args, self.alpha): return
+        try:
+            self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+            self._start()
+        except Exception as e:
+            logging.error(f"[FFMPEG] No se pudo iniciar el encoder: {e}")
+            self.proc = None
+
+    @staticmethod
+    def _codec_args(codec, preset, crf, hw_accel):
+        if codec == "ProRes4444":
+            return ["-c:v", "prores_ks", "-profile:v", "4", "-pix_fmt", "yuva444p10le",
+                    "-alpha_bits", "16", "-vendor", "apl0"]
+        if codec == "QTRLE":
+            # Sin pérdida; muy compacto con capas mayormente transparentes
+            return ["-c:v", "qtrle", "-pix_fmt", "argb"]
+        if codec == "ProRes":
+            return ["-c:v", "prores_ks", "-profile:v", "3", "-pix_fmt", "yuv422p10le", "-vendor", "apl0"]
+
+        if hw_accel:
+            if sys.platform == "darwin":
+                enc = "hevc_videotoolbox" if codec == "H.265" else "h264_videotoolbox"
+                quality = max(1, min(100, 100 - crf * 2))
+                args = ["-c:v", enc, "-q:v", str(quality), "-pix_fmt", "yuv420p"]
+            else:
+                enc = "hevc_nvenc" if codec == "H.265" else "h264_nvenc"
+                args = ["-c:v", enc, "-preset", "p4", "-rc", "vbr", "-cq", str(crf), "-pix_fmt", "yuv420p"]
+        else:
+            enc = "libx265" if codec == "H.265" else "libx264"
+            if preset not in X264_PRESETS: preset = "medium"
+            args = ["-c:v", enc, "-preset", preset, "-crf", str(crf), "-pix_fmt", "yuv420p"]
+
+        if codec == "H.265": args += ["-tag:v", "hvc1"] # QuickTime / AE
+        return args + ["-movflags", "+faststart"]
+
+    def isOpened(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def _write_sync(self, frame):
+        if frame.ndim == 2: frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        if self.alpha and frame.shape[2] == 3: frame = cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA)
+        elif not self.alpha and frame.shape[2] == 4: frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
+        if frame.shape[1] != self.size[0] or frame.shape[0] != self.size[1]:
+            frame = cv2.resize(frame, self.size)
+        self.proc.stdin.write(np.ascontiguousarray(frame).data)
+
+    def _close(self):
+        if self.proc is None: return
+        try:
+            self.proc.stdin.close()
+        except Exception: pass
+        err = self.proc.stderr.read().decode(errors="ignore").strip()
+        code = self.proc.wait()
+        if code != 0:
+            logging.error(f"[FFMPEG] Encoder terminó con código {code}: {err[-500:]}")
+            if self._error is None: self._error = RuntimeError(f"FFmpeg terminó con código {code}: {err[-200:]}")
+        self.proc = None
+
+
+class OpenCVWriter(_ThreadedWriter):
+    """Fallback sin FFmpeg. Intenta avc1/hvc1 y cae a mp4v si el build de OpenCV no los trae."""
+
+    def __init__(self, path, fps, size, codec="H.264", queue_size=16):
+        super().__init__(queue_size)
+        self.path = path
+        self.size = (int(size[0]), int(size[1]))
+        self.writer = None
+
+        codec = normalize_codec(codec)
+        candidates = {"H.264": ["avc1", "mp4v"], "H.265": ["hvc1", "mp4v"], "ProRes": ["apch", "mp4v"]}[codec]
+        for tag in candidates:
+            w = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*tag), fps, self.size)
+            if w.isOpened():
+                self.writer = w
+                break
+            w.release()
+
+        if self.writer is not None: self._start()
+
+    def isOpened(self):
+        return self.writer is not None and self.writer.isOpened()
+
+    def _write_sync(self, frame):
+        if frame.ndim == 2: frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        self.writer.write(frame)
+
+    def _close(self):
+        if self.writer is not None:
+            self.writer.release()
+            self.writer = None
+
+
+def create_video_writer(path, fps, size, config_manager):
+    """Crea el writer según `output.*`: FFmpeg si está disponible, si no OpenCV."""
+    out_conf = config_manager.get("output", {}) or {}
+    codec = out_conf.get("codec", "H.264")
+    backend = out_conf.get("encoder", "auto")
+
+    ffmpeg_bin = find_ffmpeg(config_manager) if backend in ("auto", "ffmpeg") else None
+    if ffmpeg_bin:
+        writer = FFmpegWriter(
+            path, fps, size, codec=codec,
+            preset=out_conf.get("preset", "medium"),
+            crf=out_conf.get("crf", 20),
+            hw_accel=out_conf.get("hw_accel", False),
+            ffmpeg_bin=ffmpeg_bin
+        )
+        if writer.isOpened(): return writer
+        writer.release()
+        print("⚠️ FFmpeg no pudo abrir el encoder, usando OpenCV.")
+    elif backend == "ffmpeg":
+        print("⚠️ FFmpeg no encontrado en PATH, usando OpenCV.")
+
+    return OpenCVWriter(path, fps, size, codec=codec)
+
+
+def layer_format(config_manager):
+    """"png" o una clave de LAYER_CODECS (output.layer_format); formatos desconocidos -> "png"."""
+    fmt = str(config_manager.get("output.layer_format", "png") or "png").lower()
+    return fmt if fmt in LAYER_CODECS else "png"
+
+
+def create_layer_writer(path, fps, size, config_manager, queue_size=4):
+    """
+    Writer de una capa Compositing con alfa (FFmpeg obligatorio: OpenCV no escribe alfa).
+    Cola corta: un frame BGRA 4K son ~33 MB y hay un writer por capa.
+    None si no hay FFmpeg o el encoder no arranca (el llamador vuelve a PNG).
+    """
+    fmt = layer_format(config_manager)
+    ffmpeg_bin = find_ffmpeg(config_manager)
+    if fmt == "png" or not ffmpeg_bin: return None
+    writer = FFmpegWriter(path, fps, size, codec=LAYER_CODECS[fmt], ffmpeg_bin=ffmpeg_bin, queue_size=queue_size)
+    if writer.isOpened(): return writer
+    writer.release()
+    return None
+
+
+def concat_videos(parts, path, config_manager=None):
+    """Une segmentos del mismo codec sin recodificar (concat demuxer de FFmpeg). True si salió bien."""
+    ffmpeg_bin = find_ffmpeg(config_manager)
+    if not ffmpeg_bin or not parts: return False
+    list_path = path + ".txt"
+    with open(list_path, "w", encoding="utf-8") as f:
+        for p in parts:
+            f.write("file '" + os.path.abspath(p).replace("'", "'\\''") + "'\n")
+    try:
+        proc = subprocess.run([ffmpeg_bin, "-y", "-hide_banner", "-loglevel", "error", "-f", "concat", "-safe", "0",
+                               "-i", list_path, "-c", "copy", path], stderr=subprocess.PIPE)
+        if proc.returncode != 0:
+            logging.error(f"[FFMPEG] concat: {proc.stderr.decode(errors='ignore')[-500:]}")
+            return False
+        return True
+    finally:
+        os.remove(list_path)
@@ -3,6 +3,8 @@ MODESYS YOLO Processor - V8.4.1
 - Feat: Precision latency tracking (ms)
 - Feat: Hardware device reporting for Advanced Stats
 - Feat: Dynamic confidence thresholding and max_det increased to 1000 for dense crowds.
+- Feat: Tiled face inference (batched tiles + NMS merge) for small faces in 4K/6K wide shots.
+- Feat: Cascade mode: face model only on batched person crops, faces linked to their parent person.
 """
 
 import cv2
@@ -13,23 +15,13 @@ import torch
 import os
 import time
 from pathlib import Path
+from core.onnx_backend import OnnxDetector, onnx_available, int8_model_name
+from core.detections import DetectionSet, FrameResult, TYPE_CODES
+from core.tiling import tile_grid, person_tiles, merge_nms
 
-class Detection:
-    def __init__(self, bbox, label, conf, type_id, center, track_id=None):
-        self.bbox = bbox
-        self.label = label
-        self.confidence = conf
-        self.type = type_id
-        self.center = center
-        self.track_id = track_id
-
-class FrameResult:
-    def __init__(self, frame, detections, frame_number):
-        self.frame = frame
-        self.detections = detections
-        self.frame_number = frame_number
-        self.frame_rgb = None
-        self.stats_meta = {}
+# Nombres de los modelos exportados por tools/export_onnx.py
+FACE_ONNX_NAME = "yolov8m-face-lindevs.onnx"
+WORLD_ONNX_NAME = "yolov8m-world-fixed.onnx"
 
 class YOLOProcessor:
     def __init__(self, config_manager):
@@ -38,8 +30,17 @@ class YOLOProcessor:
         self.model_face = None
         self.hud = None
         
+        # torch | onnx | openvino
+        self.backend = self.config.get("models.backend", "torch")
+        # fp32 | int8 (modelos cuantizados offline con tools/quantize_models.py)
+        self.precision = self.config.get("models.precision", "fp32")
+        self._warned_vocab = set()
+        self.model_files = []  # rutas cargadas (identidad para la cache de resultados)
         self.device = self._get_optimal_device()
 
+        cpu_threads = int(self.config.get("models.cpu_threads", 0) or 0)
+        if cpu_threads > 0: torch.set_num_threads(cpu_threads)
+
         base_path = os.getcwd()
         self.models_dir = Path(base_path) / "models"
         
@@ -68,7 +69,39 @@ class YOLOProcessor:
         if self.hud:
             self.hud.config = config_manager
 
+    def _resolve_model_path(self, name):
+        path = self.models_dir / name
+        if path.exists(): return path
+        return Path(name) if Path(name).exists() else None
+
+    def _load_onnx_model(self, name):
+        path = None
+        if self.precision == "int8":
+            path = self._resolve_model_path(int8_model_name(name))
+            if not path: print(f"⚠️ {int8_model_name(name)} no existe, usando FP32. Ejecuta tools/quantize_models.py")
+        path = path or self._resolve_model_path(name)
+        if not path: return None
+        try:
+            det = OnnxDetector(path, engine=self.backend, threads=self.config.get("models.cpu_threads", 0))
+            self.model_files.append(path)
+            print(f"🧩 MODESYS: {path.name} cargado con backend {self.backend.upper()}")
+            return det
+        except Exception as e:
+            logging.error(f"Error loading ONNX model {path}: {e}")
+            return None
+
     def _load_models(self):
+        if self.backend in ("onnx", "openvino"):
+            if onnx_available(self.backend):
+                self.model_face = self._load_onnx_model(FACE_ONNX_NAME)
+                self.model_yolo = self._load_onnx_model(WORLD_ONNX_NAME)
+            else:
+                print(f"⚠️ Backend {self.backend} no disponible (falta onnxruntime/openvino), usando PyTorch.")
+            # Lo que no exista exportado se carga con PyTorch
+            if self.model_face is not None and self.model_yolo is not None: return
+        elif self.precision == "int8":
+            print("⚠️ INT8 requiere models.backend = onnx | openvino. Usando PyTorch FP32.")
+
         _original_torch_load = torch.load
         def safe_load_patch(*args, **kwargs):
             if 'weights_only' not in kwargs: kwargs['weights_only'] = False
@@ -76,20 +109,18 @@ class YOLOProcessor:
         torch.load = safe_load_patch
 
         try:
-            name_world = "yolov8m-world.pt" 
-            path_world = self.models_dir / name_world
-            final_path_world = path_world if path_world.exists() else (Path(name_world) if Path(name_world).exists() else None)
+            final_path_world = self._resolve_model_path("yolov8m-world.pt")
 
-            if final_path_world:
+            if final_path_world and self.model_yolo is None:
                 self.model_yolo = YOLO(str(final_path_world))
+                self.model_files.append(final_path_world)
                 self.model_yolo.to(self.device)
             
-            name_face = "yolov8m-face-lindevs.pt"
-            path_face = self.models_dir / name_face
-            final_path_face = path_face if path_face.exists() else (Path(name_face) if Path(name_face).exists() else None)
+            final_path_face = self._resolve_model_path("yolov8m-face-lindevs.pt")
 
-            if final_path_face:
+            if final_path_face and self.model_face is None:
                 self.model_face = YOLO(str(final_path_face))
+                self.model_files.append(final_path_face)
                 self.model_face.to(self.device)
                 
         except Exception as e:
@@ -97,37 +128,158 @@ class YOLOProcessor:
         finally:
             torch.load = _original_torch_load
 
-    def detect_frame(self, frame, use_faces, use_persons, use_objects, custom_classes):
-        start_time = time.time()
+    def model_identity(self):
+        """Identifica los pesos cargados: nombre + tamaño + mtime de cada archivo."""
+        files = []
+        for p in self.model_files:
+            try:
+                st = Path(p).stat()
+                files.append([Path(p).name, st.st_size, int(st.st_mtime)])
+            except OSError:
+                files.append([str(p), 0, 0])
+        return {"backend": self.backend, "precision": self.precision, "files": sorted(files)}
+
+    def prepare_inference_frame(self, frame):
+        """
+        Downscale único a `models.inference_size` (lado largo, 0 = nativo).
+        El mismo frame reducido se comparte entre face, YOLO-World y depth.
+        Devuelve (frame_inferencia, escala_relativa_al_frame_recibido).
+        """
+        size = int(self.config.get("models.inference_size", 0) or 0)
+        if frame is None or size <= 0: return frame, 1.0
+        h, w = frame.shape[:2]
+        if max(h, w) <= size: return frame, 1.0
+        s = size / float(max(h, w))
+        small = cv2.resize(frame, (max(1, int(w * s)), max(1, int(h * s))), interpolation=cv2.INTER_AREA)
+        return small, s
+
+    def _predict_arrays(self, model, frame, conf, classes=None):
+        """
+        Una sola transferencia device->host por modelo: (xyxy [N,4], conf [N], cls [N]).
+        `classes` sólo aplica al backend ONNX (vocabulario fijo).
+        """
+        if isinstance(model, OnnxDetector):
+            return model.predict(frame, conf=conf, max_det=1000, classes=classes)
+        # max_det increased to 1000 for crowds
+        res = model.predict(frame, device=self.device, verbose=False, conf=conf, max_det=1000)[0]
+        data = res.boxes.data.detach().cpu().numpy()  # [N, 6] = x1, y1, x2, y2, conf, cls
+        return data[:, :4], data[:, 4], data[:, 5].astype(np.int32)
+
+    def _predict_batch_arrays(self, model, frames, conf):
+        """Varias imágenes en una sola pasada (tiles). Lista de (xyxy, conf, cls) por imagen."""
+        if isinstance(model, OnnxDetector):
+            return model.predict_batch(frames, conf=conf, max_det=1000)
+        out = []
+        for res in model.predict(frames, device=self.device, verbose=False, conf=conf, max_det=1000):
+            data = res.boxes.data.detach().cpu().numpy()
+            out.append((data[:, :4], data[:, 4], data[:, 5].astype(np.int32)))
+        return out
+
+    def tiling_settings(self):
+        """None si models.face_tiling está desactivado."""
+        if not self.config.get("models.face_tiling", False): return None
+        return {
+            "tile": int(self.config.get("models.tile_size", 640)),
+            "overlap": float(self.config.get("models.tile_overlap", 0.2)),
+            "around_persons": bool(self.config.get("models.tile_around_persons", False)),
+            "batch": max(1, int(self.config.get("models.tile_batch", 8)))
+        }
+
+    def _tiled_faces(self, full_frame, conf, persons_full, settings):
+        """
+        Caras en tiles de `full_frame` -> (xyxy en coords de full_frame, conf).
+        `persons_full` = cajas de personas en esas coords (None = rejilla completa).
+        """
+        h, w = full_frame.shape[:2]
+        tile = settings["tile"]
+        empty = (np.zeros((0, 4), np.float32), np.zeros(0, np.float32))
+        # Frame más chico que un tile: la pasada completa ya lo ve a resolución nativa
+        if max(h, w) <= tile: return empty
+        if persons_full is not None:
+            tiles = person_tiles(persons_full, w, h, tile, settings["overlap"])
+        else:
+            tiles = tile_grid(w, h, tile, settings["overlap"])
+
+        boxes, confs = [], []
+        for i in range(0, len(tiles), settings["batch"]):
+            chunk = tiles[i:i + settings["batch"]]
+            crops = [full_frame[y1:y2, x1:x2] for x1, y1, x2, y2 in chunk]
+            for (x1, y1, _, _), (xyxy, c, _) in zip(chunk, self._predict_batch_arrays(self.model_face, crops, conf)):
+                if len(xyxy):
+                    boxes.append(xyxy + np.array([x1, y1, x1, y1], np.float32))
+                    confs.append(c)
+        if not boxes: return empty
+        return np.concatenate(boxes).astype(np.float32), np.concatenate(confs).astype(np.float32)
+
+    def _cascade_faces(self, full_frame, persons_full, conf):
+        """
+        Caras en recortes (ampliados) de las personas, en lotes -> (xyxy en coords de full_frame, conf, parent).
+        `parent` = índice de la persona en `persons_full` (mismo orden que las filas person del DetectionSet).
+        """
+        h, w = full_frame.shape[:2]
+        expand = float(self.config.get("models.cascade_expand", 0.15))
+        batch = max(1, int(self.config.get("models.tile_batch", 8)))
+        xyxy = np.asarray(persons_full, np.float32).reshape(-1, 4)
+        wh = xyxy[:, 2:] - xyxy[:, :2]
+        crops_xyxy = np.concatenate([xyxy[:, :2] - wh * expand, xyxy[:, 2:] + wh * expand], axis=1)
+        crops_xyxy[:, [0, 2]] = crops_xyxy[:, [0, 2]].clip(0, w)
+        crops_xyxy[:, [1, 3]] = crops_xyxy[:, [1, 3]].clip(0, h)
+        crops_xyxy = crops_xyxy.astype(int)
+
+        valid = [i for i, (x1, y1, x2, y2) in enumerate(crops_xyxy.tolist()) if x2 > x1 and y2 > y1]
+        boxes, confs, parents = [], [], []
+        for k in range(0, len(valid), batch):
+            ids = valid[k:k + batch]
+            crops = [full_frame[crops_xyxy[i, 1]:crops_xyxy[i, 3], crops_xyxy[i, 0]:crops_xyxy[i, 2]] for i in ids]
+            for i, (fx, fc, _) in zip(ids, self._predict_batch_arrays(self.model_face, crops, conf)):
+                if not len(fx): continue
+                x1, y1 = crops_xyxy[i, :2]
+                boxes.append(fx + np.array([x1, y1, x1, y1], np.float32))
+                confs.append(fc)
+                parents.append(np.full(len(fx), i, np.int32))
+        if not boxes:
+            return np.zeros((0, 4), np.float32), np.zeros(0, np.float32), np.zeros(0, np.int32)
+        boxes, confs, parents = np.concatenate(boxes), np.concatenate(confs), np.concatenate(parents)
+        # Personas solapadas: la misma cara aparece en varios recortes
+        keep = merge_nms(boxes, confs)
+        return boxes[keep].astype(np.float32), confs[keep].astype(np.float32), parents[keep]
+
+    def _set_world_classes(self, classes):
+        # set_classes re-codifica los prompts con CLIP: sólo si cambian
+        key = tuple(sorted(classes))
+        if getattr(self, "_world_classes", None) != key:
+            self.model_yolo.set_classes(list(key))
+            self._world_classes = key
+
+    def detect_frame(self, frame, use_faces, use_persons, use_objects, custom_classes, scale=1.0,
+                     full_frame=None, full_scale=None):
+        """
+        `scale` = tamaño del frame recibido / tamaño de la fuente (p.ej. si ya viene
+        reducido desde el decoder). Las cajas siempre se devuelven en coordenadas de la fuente.
+        `full_frame` / `full_scale`: frame de mayor resolución para los tiles de caras (default: `frame`).
+        Devuelve {"detections": DetectionSet, "meta": {...}}; meta["timings"] trae ms por etapa.
+        """
+        start_time = time.perf_counter()
+        timings = {}
         
-        results = {"faces": [], "persons": [], "objects": [], "meta": {}}
+        results = {"detections": DetectionSet(), "meta": {}}
         if frame is None: return results
+        parts = []
+        if full_frame is None: full_frame, full_scale = frame, scale
 
-        avg_conf = []
+        frame, s = self.prepare_inference_frame(frame)
+        inv_scale = 1.0 / (scale * s)
+        t = time.perf_counter()
+        timings["preprocess"] = (t - start_time) * 1000
+
+        conf_chunks = []
 
         # Get dynamic confidences from config
         face_conf = self.config.get("models.face_confidence", 0.4)
         target_conf = self.config.get("models.person_confidence", 0.25)
 
-        if use_faces and self.model_face:
-            try:
-                # max_det increased to 1000 for crowds
-                res = self.model_face.predict(frame, device=self.device, verbose=False, conf=face_conf, max_det=1000)[0]
-                for box in res.boxes:
-                    x1, y1, x2, y2 = box.xyxy[0].detach().cpu().numpy().tolist()
-                    conf = float(box.conf.item())
-                    cx, cy = int((x1+x2)/2), int((y1+y2)/2)
-                    avg_conf.append(conf)
-                    
-                    results["faces"].append({
-                        "bbox": [x1, y1, x2, y2], 
-                        "label": "face", 
-                        "confidence": conf, 
-                        "center": (cx, cy),
-                        "track_id": None
-                    })
-            except Exception as e: pass
-
+        # YOLO-World primero: las personas delimitan los tiles de caras (models.tile_around_persons)
+        person_src = None
         active_tags = []
         if (use_persons or use_objects) and self.model_yolo:
             try:
@@ -139,57 +291,86 @@ class YOLOProcessor:
                 final_classes = list(set(active_prompts))
                 active_tags = final_classes
 
+                class_ids = None
+                if final_classes and isinstance(self.model_yolo, OnnxDetector):
+                    # Vocabulario fijo: sólo podemos filtrar las clases exportadas
+                    missing = [c for c in final_classes if c not in self.model_yolo.names.values()]
+                    for c in missing:
+                        if c not in self._warned_vocab:
+                            self._warned_vocab.add(c)
+                            print(f"⚠️ '{c}' no está en el vocabulario ONNX exportado. Re-exporta con tools/export_onnx.py")
+                    class_ids = self.model_yolo.class_ids_for(final_classes)
+                    if not class_ids: final_classes = []
+                elif final_classes:
+                    self._set_world_classes(final_classes)
+                    t2 = time.perf_counter(); timings["world_set_classes"] = (t2 - t) * 1000; t = t2
+
                 if final_classes:
-                    self.model_yolo.set_classes(final_classes)
-                    # max_det increased to 1000 for crowds
-                    res = self.model_yolo.predict(frame, device=self.device, verbose=False, conf=target_conf, max_det=1000)[0]
-                    
-                    for box in res.boxes:
-                        x1, y1, x2, y2 = box.xyxy[0].detach().cpu().numpy().tolist()
-                        conf = float(box.conf.item())
-                        avg_conf.append(conf)
-                        
-                        cls_id = int(box.cls.item())
-                        label = self.model_yolo.names[cls_id] if (self.model_yolo.names and cls_id in self.model_yolo.names) else "unknown"
-                        cx, cy = int((x1+x2)/2), int((y1+y2)/2)
-                        
-                        item = {
-                            "bbox": [x1, y1, x2, y2], 
-                            "label": label, 
-                            "confidence": conf, 
-                            "center": (cx, cy),
-                            "track_id": None
-                        }
-                        
-                        if label == "person":
-                            results["persons"].append(item)
-                        else:
-                            results["objects"].append(item)
-
-            except Exception as e: pass
-
-        latency_ms = (time.time() - start_time) * 1000
-        mean_conf = sum(avg_conf) / len(avg_conf) if avg_conf else 0.0
+                    xyxy, confs, cls = self._predict_arrays(self.model_yolo, frame, target_conf, class_ids)
+                    t2 = time.perf_counter(); timings["world_infer"] = (t2 - t) * 1000; t = t2
+
+                    # Vocabulario = nombres del modelo; "person" -> tipo person, resto -> object
+                    names = self.model_yolo.names or {}
+                    n_vocab = int(max(names.keys(), default=-1)) + 1
+                    vocab = [names.get(i, "unknown") for i in range(n_vocab)] + ["unknown"]
+                    label_id = np.where((cls >= 0) & (cls < n_vocab), cls, n_vocab).astype(np.int32)
+                    is_person = np.array([v == "person" for v in vocab])[label_id] if len(cls) else np.zeros(0, bool)
+                    type_code = np.where(is_person, TYPE_CODES["person"], TYPE_CODES["object"]).astype(np.uint8)
+                    if use_persons: person_src = xyxy[is_person] * inv_scale
+                    parts.append(DetectionSet(xyxy * inv_scale, confs, type_code, label_id, None, vocab))
+                    conf_chunks.append(confs)
+
+            except Exception as e: logging.error(f"[WORLD] {e}")
+            t2 = time.perf_counter(); timings["world_extract"] = (t2 - t) * 1000; t = t2
+
+        # Cascada: caras sólo dentro de las personas (models.face_cascade; requiere use_persons)
+        cascade = self.config.get("models.face_cascade", False) and person_src is not None
+        if use_faces and self.model_face and cascade:
+            try:
+                xyxy, confs, parent = self._cascade_faces(full_frame, person_src * full_scale, face_conf)
+                parts.append(DetectionSet.from_type("face", xyxy / full_scale, confs, ("face",), parent=parent))
+                conf_chunks.append(confs)
+            except Exception as e: logging.error(f"[FACE] {e}")
+            t2 = time.perf_counter(); timings["face_cascade"] = (t2 - t) * 1000; t = t2
+        elif use_faces and self.model_face:
+            try:
+                xyxy, confs, _ = self._predict_arrays(self.model_face, frame, face_conf)
+                t2 = time.perf_counter(); timings["face_infer"] = (t2 - t) * 1000; t = t2
+                xyxy = xyxy * inv_scale
+                tiling = self.tiling_settings()
+                if tiling:
+                    # Tiles sobre el frame completo: las caras lejanas no se pierden en el downscale del modelo
+                    persons_full = person_src * full_scale if tiling["around_persons"] and person_src is not None else None
+                    tile_xyxy, tile_conf = self._tiled_faces(full_frame, face_conf, persons_full, tiling)
+                    if len(tile_xyxy):
+                        xyxy = np.concatenate([xyxy, tile_xyxy / full_scale])
+                        confs = np.concatenate([confs, tile_conf])
+                        keep = merge_nms(xyxy, confs)
+                        xyxy, confs = xyxy[keep], confs[keep]
+                    t2 = time.perf_counter(); timings["face_tiles"] = (t2 - t) * 1000; t = t2
+                parts.append(DetectionSet.from_type("face", xyxy, confs, ("face",)))
+                conf_chunks.append(confs)
+            except Exception as e: logging.error(f"[FACE] {e}")
+            t2 = time.perf_counter(); timings["face_extract"] = (t2 - t) * 1000; t = t2
+
+        results["detections"] = DetectionSet.concat(parts)
+        all_conf = np.concatenate(conf_chunks) if conf_chunks else np.zeros(0, np.float32)
+        latency_ms = (time.perf_counter() - start_time) * 1000
+        mean_conf = float(all_conf.mean()) if len(all_conf) else 0.0
+        timings["total"] = latency_ms
         
         results["meta"] = {
             "latency": latency_ms,
-            "device": str(self.device).upper(),
+            "device": str(self.device).upper() if self.backend == "torch" else f"CPU/{self.backend.upper()}",
             "avg_conf": mean_conf,
-            "tags": active_tags
+            "tags": active_tags,
+            "timings": timings
         }
 
         return results
 
     def _make_frame_result(self, frame, raw_detections, frame_number):
-        flat = []
-        for d in raw_detections.get("faces", []): 
-            flat.append(Detection(d['bbox'], d['label'], d['confidence'], 'face', d['center'], d['track_id']))
-        for d in raw_detections.get("persons", []): 
-            flat.append(Detection(d['bbox'], d['label'], d['confidence'], 'person', d['center'], d['track_id']))
-        for d in raw_detections.get("objects", []): 
-            flat.append(Detection(d['bbox'], d['label'], d['confidence'], 'object', d['center'], d['track_id']))
-            
-        fr = FrameResult(frame, flat, frame_number)
+        fr = FrameResult(frame, raw_detections.get("detections"), frame_number)
         fr.stats_meta = raw_detections.get("meta", {})
         return fr
 
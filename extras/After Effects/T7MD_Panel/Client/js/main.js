@@ -5,6 +5,8 @@
     var fs = require('fs');
     var path = require('path');
     var child_process = require('child_process');
+    var zlib = require('zlib');
+    var os = require('os');
     
     // RUTA DEL PROYECTO
     var PROJECT_DIR = "/Users/dpvmx_1/Triplesiete Dropbox/APPS/T7DM";
@@ -78,6 +80,8 @@
                 if(document.getElementById('chkFaces').checked) flags += " --faces";
                 if(document.getElementById('chkPersons').checked) flags += " --persons";
                 if(document.getElementById('chkObjects').checked) flags += " --objects";
+                // Esquema compacto por track: AE lo lee línea a línea en vez de parsear todo el proyecto
+                flags += " --json_format minified --json_tracks";
 
                 var cmd = `"${LAUNCHER_PATH}" --input "${videoPath}" --output_dir "${outputDir}" ${flags}`;
                 
@@ -87,26 +91,41 @@
 
                 var options = { maxBuffer: 1024 * 1024 * 50 };
                 var proc = child_process.exec(cmd, options);
+                var statsText = "";
 
                 proc.stdout.on('data', function(data) {
                     var lines = data.toString().split('\n');
+                    var pct = null;
                     lines.forEach(function(line) {
                         line = line.trim();
-                        if (line.startsWith('PROGRESS|')) {
-                            var pct = line.split('|')[1];
-                            if(document.getElementById('fill')) document.getElementById('fill').style.width = pct + "%";
-                            updateStatus("Procesando... " + pct + "%");
+                        // Varias líneas por chunk: sólo pintamos el último progreso
+                        if (line.startsWith('PROGRESS|')) pct = line.split('|')[1];
+                        if (line.startsWith('STATS|')) {
+                            try {
+                                var st = JSON.parse(line.substring(6));
+                                statsText = " | " + st.fps.toFixed(1) + " FPS | ETA " + st.eta + " | " + Math.round(st.rss_mb) + " MB";
+                            } catch (e) { /* línea parcial */ }
                         }
                         if (line.startsWith('SUCCESS|')) {
                             var jsonPath = line.split('|')[1].trim();
+                            pct = null;
                             importJSON(jsonPath);
                         }
+                        if (line.startsWith('CANCELLED|')) {
+                            pct = null;
+                            updateStatus("⏹ Cancelado: " + line.split('|')[1]);
+                        }
                         if (line.startsWith('ERROR|')) {
                             var errMsg = line.split('|')[1];
+                            pct = null;
                             updateStatus("❌ Error IA: " + errMsg);
                             alert("Error en Python: " + errMsg);
                         }
                     });
+                    if (pct !== null) {
+                        if(document.getElementById('fill')) document.getElementById('fill').style.width = pct + "%";
+                        updateStatus("Procesando... " + pct + "%" + statsText);
+                    }
                 });
 
                 proc.stderr.on('data', function(data) {
@@ -123,6 +142,24 @@
     }
 
     function importJSON(jsonPath) {
+        // ExtendScript no sabe descomprimir: los .gz se descomprimen en Node (en streaming) a una carpeta temporal
+        if (/\.gz$/i.test(jsonPath)) {
+            updateStatus("🗜️ Descomprimiendo datos...");
+            var plainPath = path.join(os.tmpdir(), path.basename(jsonPath).replace(/\.gz$/i, ""));
+            var out = fs.createWriteStream(plainPath);
+            fs.createReadStream(jsonPath).pipe(zlib.createGunzip())
+                .on('error', function(e) {
+                    updateStatus("❌ Fallo al descomprimir");
+                    alert("No se pudo descomprimir " + jsonPath + ":\n" + e.message);
+                })
+                .pipe(out);
+            out.on('finish', function() { importIntoAE(plainPath); });
+            return;
+        }
+        importIntoAE(jsonPath);
+    }
+
+    function importIntoAE(jsonPath) {
         updateStatus("📥 Importando capas a AE...");
         var scriptCall = "importT7MDJson(" + JSON.stringify(jsonPath) + ")";
         
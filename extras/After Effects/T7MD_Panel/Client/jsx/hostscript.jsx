@@ -1,3 +1,6 @@
+var T7MD_TRACKS_SCHEMA = "modesys.tracks/1";
+var T7MD_MIN_CONF = 0.4; // Filtro de confianza
+
 function importT7MDJson(jsonPath) {
     try {
         // 1. Limpieza y Verificación
@@ -5,15 +8,36 @@ function importT7MDJson(jsonPath) {
         var path = decodeURI(jsonPath);
         var f = new File(path);
 
-        if (!f.exists) { 
-            return "ERROR: El archivo JSON no existe en: " + path; 
+        if (!f.exists) {
+            return "ERROR: El archivo JSON no existe en: " + path;
         }
-        
-        // 2. Leer archivo
+
+        // 2. Leer la primera línea: el esquema por track (.tracks.jsonl) trae ahí su cabecera
+        f.encoding = "UTF-8";
         f.open("r");
+        var first = f.readln();
+        var header = null;
+        try {
+            header = JSON.parse(first);
+        } catch(e) { /* JSON por frames indentado: la primera línea es sólo "{" */ }
+
+        if (header && header.schema === T7MD_TRACKS_SCHEMA) {
+            var res = importTracks(f, header);
+            f.close();
+            return res;
+        }
+
+        // JSON por frames minificado: la primera línea ya es el documento entero
+        if (header && header.metadata) {
+            f.close();
+            return importFrames(f, header);
+        }
+
+        // JSON por frames indentado: se lee y se parsea entero
+        f.seek(0);
         var content = f.read();
         f.close();
-        
+
         if (!content || content.length < 2) {
             return "ERROR: El archivo JSON está vacío.";
         }
@@ -25,81 +49,148 @@ function importT7MDJson(jsonPath) {
         } catch(e) {
             return "ERROR DE SINTAXIS: El archivo JSON está corrupto. " + e.toString();
         }
+        return importFrames(f, data);
 
-        // 4. Validar Metadata mínima
-        if (!data.metadata) {
-            return "ERROR DATA: El JSON no tiene metadatos.";
-        }
-        
-        // --- COMIENZO DE ACCIONES EN AE ---
-        app.beginUndoGroup("T7MD Import");
-
-        var meta = data.metadata;
-        var fps = meta.fps || 24; // Fallback a 24fps
-        
-        // Calcular duración
-        var duration = 10;
-        if (meta.total_frames && fps > 0) {
-            duration = meta.total_frames / fps;
+    } catch(e) {
+        // Capturar cualquier error inesperado de AE
+        return "ERROR CRÍTICO AE: " + e.toString() + " (Línea " + e.line + ")";
+    }
+}
+
+function makeComp(f, meta) {
+    var fps = meta.fps || 24; // Fallback a 24fps
+
+    // Calcular duración
+    var duration = 10;
+    if (meta.total_frames && fps > 0) {
+        duration = meta.total_frames / fps;
+    }
+
+    // Crear Composición
+    var compName = f.name.replace(/\.(tracks\.jsonl|json)(\.gz)?$/, "") + "_Comp";
+    var width = parseInt(meta.width) || 1920;
+    var height = parseInt(meta.height) || 1080;
+
+    var comp = app.project.items.addComp(compName, width, height, 1, duration, fps);
+    comp.openInViewer();
+    return comp;
+}
+
+function addBox(comp, name) {
+    var box = comp.layers.addShape();
+    box.name = name;
+
+    // Dibujar Rectángulo
+    var g = box.property("Contents").addProperty("ADBE Vector Group");
+    var r = g.property("Contents").addProperty("ADBE Vector Shape - Rect");
+
+    // Borde
+    var s = g.property("Contents").addProperty("ADBE Vector Graphic - Stroke");
+    s.property("Color").setValue([0, 1, 0]); // Verde
+    s.property("Stroke Width").setValue(4);
+    return { layer: box, size: r.property("Size") };
+}
+
+// Esquema por track: una capa por track con keyframes (setValuesAtTimes) en vez de una capa por detección
+function importTracks(f, header) {
+    if (!header.metadata) {
+        return "ERROR DATA: El JSON no tiene metadatos.";
+    }
+
+    // --- COMIENZO DE ACCIONES EN AE ---
+    app.beginUndoGroup("T7MD Import");
+
+    var meta = header.metadata;
+    var fps = meta.fps || 24;
+    var frameDuration = 1/fps;
+    var comp = makeComp(f, meta);
+
+    // Lectura en streaming: un track por línea
+    while (!f.eof) {
+        var line = f.readln();
+        if (!line || line.length < 2) continue;
+        var tr = JSON.parse(line);
+
+        // Tramos continuos: un hueco (track perdido o keyframe bajo el umbral) abre otra capa.
+        // setValuesAtTimes interpolaría a través del hueco y la caja se vería donde no hubo detección.
+        var segments = [], seg = null, lastFrame = -2;
+        for (var k = 0; k < tr.f.length; k++) {
+            if (tr.conf[k] < T7MD_MIN_CONF) continue;
+            if (seg === null || tr.f[k] - lastFrame > 1) {
+                seg = { times: [], pos: [], size: [] };
+                segments.push(seg);
+            }
+            seg.times.push(tr.f[k] * frameDuration);
+            seg.pos.push([tr.cx[k], tr.cy[k]]);
+            seg.size.push([tr.w[k], tr.h[k]]);
+            lastFrame = tr.f[k];
         }
-        
-        // Crear Composición
-        var compName = f.name.replace(".json", "_Comp");
-        var width = parseInt(meta.width) || 1920;
-        var height = parseInt(meta.height) || 1080;
-
-        var comp = app.project.items.addComp(compName, width, height, 1, duration, fps);
-        comp.openInViewer();
-        
-        var frames = data.frames;
-        if (!frames) {
-            app.endUndoGroup();
-            return "ERROR: No hay frames en el JSON.";
+
+        for (var n = 0; n < segments.length; n++) {
+            var sg = segments[n];
+            var box = addBox(comp, tr.label + "_" + tr.id + (segments.length > 1 ? "." + (n + 1) : ""));
+            box.layer.inPoint = sg.times[0];
+            box.layer.outPoint = sg.times[sg.times.length - 1] + frameDuration;
+            if (sg.times.length === 1) {
+                box.size.setValue(sg.size[0]);
+                box.layer.property("Position").setValue(sg.pos[0]);
+            } else {
+                box.size.setValuesAtTimes(sg.times, sg.size);
+                box.layer.property("Position").setValuesAtTimes(sg.times, sg.pos);
+            }
+            box.layer.moveToEnd();
         }
+    }
+
+    app.endUndoGroup();
+    return "SUCCESS"; // Señal de éxito para main.js
+}
+
+function importFrames(f, data) {
+    // 4. Validar Metadata mínima
+    if (!data.metadata) {
+        return "ERROR DATA: El JSON no tiene metadatos.";
+    }
+
+    var frames = data.frames;
+    if (!frames) {
+        return "ERROR: No hay frames en el JSON.";
+    }
 
-        var frameDuration = 1/fps;
-        
-        // Crear Capas (Bucle)
-        for (var i = 0; i < frames.length; i++) {
-            var fData = frames[i];
-            var dets = fData.detections;
-            
-            if (dets && dets.length > 0) {
-                for (var j = 0; j < dets.length; j++) {
-                    var d = dets[j];
-                    if (d.conf < 0.4) continue; // Filtro de confianza
-
-                    var box = comp.layers.addShape();
-                    box.name = d.label + "_" + i; // Nombre único
-                    
-                    // Tiempos
-                    box.inPoint = fData.timestamp;
-                    box.outPoint = fData.timestamp + frameDuration;
-                    
-                    // Dibujar Rectángulo
-                    var g = box.property("Contents").addProperty("ADBE Vector Group");
-                    var r = g.property("Contents").addProperty("ADBE Vector Shape - Rect");
-                    r.property("Size").setValue([d.rect.w, d.rect.h]);
-                    
-                    // Borde
-                    var s = g.property("Contents").addProperty("ADBE Vector Graphic - Stroke");
-                    s.property("Color").setValue([0, 1, 0]); // Verde
-                    s.property("Stroke Width").setValue(4);
-                    
-                    // Posición
-                    box.property("Position").setValue([d.rect.cx, d.rect.cy]);
-                    
-                    // Organizar
-                    box.moveToEnd();
-                }
+    // --- COMIENZO DE ACCIONES EN AE ---
+    app.beginUndoGroup("T7MD Import");
+
+    var fps = data.metadata.fps || 24;
+    var comp = makeComp(f, data.metadata);
+    var frameDuration = 1/fps;
+
+    // Crear Capas (Bucle)
+    for (var i = 0; i < frames.length; i++) {
+        var fData = frames[i];
+        var dets = fData.detections;
+
+        if (dets && dets.length > 0) {
+            for (var j = 0; j < dets.length; j++) {
+                var d = dets[j];
+                if (d.conf < T7MD_MIN_CONF) continue;
+
+                var box = addBox(comp, d.label + "_" + i); // Nombre único
+
+                // Tiempos
+                box.layer.inPoint = fData.timestamp;
+                box.layer.outPoint = fData.timestamp + frameDuration;
+
+                box.size.setValue([d.rect.w, d.rect.h]);
+
+                // Posición
+                box.layer.property("Position").setValue([d.rect.cx, d.rect.cy]);
+
+                // Organizar
+                box.layer.moveToEnd();
             }
         }
-        
-        app.endUndoGroup();
-        return "SUCCESS"; // Señal de éxito para main.js
-        
-    } catch(e) {
-        // Capturar cualquier error inesperado de AE
-        return "ERROR CRÍTICO AE: " + e.toString() + " (Línea " + e.line + ")";
     }
-}
\ No newline at end of file
+
+    app.endUndoGroup();
+    return "SUCCESS"; // Señal de éxito para main.js
+}
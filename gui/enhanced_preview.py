@@ -1,54 +1,97 @@
 """
-Preview de video T7MD - UI V3.4
+Preview de video T7MD - UI V3.5
 Fix: Eliminado botón loop (bucle infinito implícito).
+Feat: Detección asíncrona (señales encoladas al QThread del worker), latest-frame-wins
+      y resolución de inferencia reducida (preview.inference_size).
+Feat: Frames desde FrameCache (LRU a resolución de display + read-ahead + miniaturas para scrubbing).
+Feat: Cambios de config agrupados (debounce) y refresco incremental: los cambios sólo de render
+      (modules.*, style.*) redibujan el HUD sobre las últimas detecciones sin re-inferir.
 """
 
 from PySide6.QtWidgets import (
     QWidget, QLabel, QVBoxLayout, QPushButton, QHBoxLayout, QSizePolicy,
     QSlider, QStyle, QFrame
 )
-from PySide6.QtCore import Qt, QTimer, QThread, Signal, QObject
+from PySide6.QtCore import Qt, QTimer, QThread, Signal, QObject, Slot
 from PySide6.QtGui import QPixmap, QImage
 import cv2
 import numpy as np
 from core.yolo_processor import YOLOProcessor
+from gui.frame_cache import FrameCache
 from gui.styles import ACCENT_COLOR 
 
+# Claves que cambian el resultado de la detección; el resto (modules.*, style.*) sólo cambia el dibujo
+DETECTION_KEY_PREFIXES = ("models.", "preview.inference_size")
+RENDER_ONLY_KEYS = ("models.use_depth",)  # el preview no dibuja profundidad
+
+
+def affects_detection(key):
+    if not key: return True  # clave desconocida: refresco completo
+    if key in RENDER_ONLY_KEYS: return False
+    return key.startswith(DETECTION_KEY_PREFIXES)
+
+
 class DetectionWorker(QObject):
-    detection_done = Signal(np.ndarray, dict)
+    # (frame procesado, detecciones, índice del frame)
+    detection_done = Signal(object, object, int)
     
     def __init__(self, config_manager=None):
         super().__init__()
         self.processor = YOLOProcessor(config_manager)
         self.config_manager = config_manager
         self.active = False
+        # (frame, forma, detecciones) de la última inferencia: base de los redibujados sólo-HUD
+        self._last = None
     
     def update_config(self, config_manager):
         self.config_manager = config_manager
         self.processor.update_config(config_manager)
 
-    def process_frame(self, frame: np.ndarray, frame_number: int = 0, fps: float = 30.0):
+    def _preview_scale(self, frame):
+        # Inferencia del preview a resolución reducida; las cajas vuelven a coords del frame vía `scale`
+        size = int(self.config_manager.get("preview.inference_size", 640) or 0)
+        h, w = frame.shape[:2]
+        if size <= 0 or max(h, w) <= size: return frame, 1.0
+        s = size / float(max(h, w))
+        return cv2.resize(frame, (max(1, int(w * s)), max(1, int(h * s))), interpolation=cv2.INTER_AREA), s
+
+    @Slot(object, int, float, bool)
+    def process_frame(self, frame, frame_number=0, fps=30.0, redetect=True):
+        """
+        Corre en el hilo del worker (invocado con señal encolada desde el preview).
+        redetect=False reutiliza las detecciones del mismo frame si las hay (sólo se redibuja el HUD).
+        """
         if not self.active or frame is None:
-            self.detection_done.emit(frame, {})
+            self.detection_done.emit(frame, {}, frame_number)
             return
         try:
-            detections = self.processor.detect_frame(
-                frame, 
-                self.config_manager.get("models.use_faces", True),
-                self.config_manager.get("models.use_persons", True),
-                self.config_manager.get("models.use_objects", True),
-                self.config_manager.get("models.custom_classes", [])
-            )
+            last = self._last
+            if not redetect and last and last[0] == frame_number and last[1] == frame.shape:
+                detections = last[2]
+            else:
+                small, s = self._preview_scale(frame)
+                detections = self.processor.detect_frame(
+                    small, 
+                    self.config_manager.get("models.use_faces", True),
+                    self.config_manager.get("models.use_persons", True),
+                    self.config_manager.get("models.use_objects", True),
+                    self.config_manager.get("models.custom_classes", []),
+                    scale=s
+                )
+                self._last = (frame_number, frame.shape, detections)
             processed_frame = self.processor.draw_detections(frame, detections, frame_number, fps)
-            self.detection_done.emit(processed_frame, detections)
+            self.detection_done.emit(processed_frame, detections, frame_number)
         except Exception:
-            self.detection_done.emit(frame, {})
+            self.detection_done.emit(frame, {}, frame_number)
 
 class EnhancedVideoPreview(QWidget):
+    # GUI -> worker (conexión encolada: el worker vive en detection_thread)
+    detect_requested = Signal(object, int, float, bool)
+
     def __init__(self, config_manager=None):
         super().__init__()
         self.config = config_manager
-        self.cap = None
+        self.cache = None
         self.current_raw_frame = None
         self.current_processed_frame = None
         
@@ -58,10 +101,20 @@ class EnhancedVideoPreview(QWidget):
         self.fps = 30.0
         self.playback_direction = 1
         self.loop_mode = "loop" # Default loop ON
+        # Latest-frame-wins: un solo frame en vuelo + el más reciente en espera
+        self._detect_busy = False
+        self._detect_pending = None
         
         self.timer = QTimer()
         self.timer.timeout.connect(self.next_frame)
 
+        # Debounce de cambios de config (arrastre de sliders): un solo refresco al soltar/pausar
+        self._config_redetect = False
+        self.config_timer = QTimer(self)
+        self.config_timer.setSingleShot(True)
+        self.config_timer.setInterval(int(self.config.get("preview.config_debounce_ms", 80)) if self.config else 80)
+        self.config_timer.timeout.connect(self._apply_config_change)
+
         self.setup_ui()
         self.setup_workers()
         
@@ -135,21 +188,40 @@ class EnhancedVideoPreview(QWidget):
         self.detection_worker = DetectionWorker(self.config)
         self.detection_worker.moveToThread(self.detection_thread)
         self.detection_worker.detection_done.connect(self.on_detection_done)
+        self.detect_requested.connect(self.detection_worker.process_frame, Qt.QueuedConnection)
         self.detection_thread.start()
 
     def update_config_live(self):
         self.detection_worker.update_config(self.config)
 
+    def config_changed(self, key=None):
+        """Registra un cambio de config; el refresco sale tras `preview.config_debounce_ms` sin cambios."""
+        self._config_redetect = self._config_redetect or affects_detection(key)
+        self.config_timer.start()
+
+    def _apply_config_change(self):
+        redetect, self._config_redetect = self._config_redetect, False
+        self.update_config_live()
+        self.force_refresh(redetect)
+
     def load_video(self, path):
-        self.cap = cv2.VideoCapture(path)
-        if self.cap.isOpened():
-            self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        if self.cache: self.cache.release()
+        self.cache = FrameCache(path, self.config)
+        self.cache.frame_ready.connect(self.on_frame_ready)
+        self._update_display_size()
+        if self.cache.isOpened():
+            self.total_frames = self.cache.total_frames
+            self.fps = self.cache.fps
             self.slider.setRange(0, self.total_frames - 1)
             self.current_frame_idx = 0
             self.update_frame(0)
             self.timer.setInterval(int(1000/self.fps))
 
+    def _update_display_size(self):
+        if not self.cache: return
+        dpr = self.devicePixelRatioF()
+        self.cache.set_display_size(int(self.lbl_frame.width() * dpr), int(self.lbl_frame.height() * dpr))
+
     def next_frame(self):
         nxt = self.current_frame_idx + self.playback_direction
         if nxt >= self.total_frames:
@@ -165,26 +237,61 @@ class EnhancedVideoPreview(QWidget):
         self.slider.blockSignals(False)
 
     def update_frame(self, idx):
-        if not self.cap: return
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
-        ret, frame = self.cap.read()
-        if ret:
-            self.current_raw_frame = frame
-            if self.btn_ai.isChecked():
-                self.worker_process(frame)
-            else:
-                self.display(frame)
-            
-            cur = int(idx/self.fps)
-            tot = int(self.total_frames/self.fps)
-            self.lbl_time.setText(f"{cur//60:02}:{cur%60:02} / {tot//60:02}:{tot%60:02}")
+        if not self.cache: return
+        # El hilo de la cache decodifica idx (si falta) y lee por delante en la dirección de reproducción
+        self.cache.request(idx, self.playback_direction)
+        cur = int(idx/self.fps)
+        tot = int(self.total_frames/self.fps)
+        self.lbl_time.setText(f"{cur//60:02}:{cur%60:02} / {tot//60:02}:{tot%60:02}")
+
+        frame = self.cache.get(idx)
+        if frame is None:
+            # Aún no decodificado: al scrubbear mostramos la miniatura; on_frame_ready completa.
+            # En playback el frame simplemente se salta (el reloj manda).
+            if not self.is_playing:
+                thumb = self.cache.thumbnail(idx)
+                if thumb is not None: self.display(thumb)
+            return
+        self.show_frame(frame)
+
+    def on_frame_ready(self, idx):
+        if idx != self.current_frame_idx: return
+        frame = self.cache.get(idx)
+        if frame is not None: self.show_frame(frame)
+
+    def show_frame(self, frame):
+        self.current_raw_frame = frame
+        if self.btn_ai.isChecked():
+            # Scrubbing: el frame crudo al instante; el procesado lo reemplaza al llegar
+            if not self.is_playing: self.display(frame)
+            self.worker_process(frame)
+        else:
+            self.display(frame)
+
+    def worker_process(self, frame, redetect=True):
+        # Si el worker está ocupado, el frame reemplaza al pendiente (los intermedios se descartan).
+        # Un redibujado no pisa una re-inferencia pendiente del mismo frame.
+        idx = self.current_frame_idx
+        pending = self._detect_pending
+        if pending is not None and pending[1] == idx and pending[2]: redetect = True
+        self._detect_pending = (frame, idx, redetect)
+        if not self._detect_busy:
+            self._dispatch_detection()
 
-    def worker_process(self, frame):
-        self.detection_worker.process_frame(frame, self.current_frame_idx, self.fps)
+    def _dispatch_detection(self):
+        if self._detect_pending is None: return
+        frame, idx, redetect = self._detect_pending
+        self._detect_pending = None
+        self._detect_busy = True
+        self.detect_requested.emit(frame, idx, self.fps, redetect)
 
-    def on_detection_done(self, processed, dets):
-        self.current_processed_frame = processed
-        self.display(processed)
+    def on_detection_done(self, processed, dets, frame_number):
+        self._detect_busy = False
+        # En pausa sólo vale el resultado del frame visible (los de frames ya pasados se descartan)
+        if self.btn_ai.isChecked() and (self.is_playing or frame_number == self.current_frame_idx):
+            self.current_processed_frame = processed
+            self.display(processed)
+        self._dispatch_detection()
 
     def display(self, frame):
         if frame is None: return
@@ -196,6 +303,7 @@ class EnhancedVideoPreview(QWidget):
         ))
 
     def resizeEvent(self, e):
+        self._update_display_size()
         if self.btn_ai.isChecked() and self.current_processed_frame is not None:
             self.display(self.current_processed_frame)
         elif self.current_raw_frame is not None:
@@ -220,6 +328,7 @@ class EnhancedVideoPreview(QWidget):
     
     def toggle_ai(self, active):
         self.detection_worker.active = active
+        self._detect_pending = None
         if self.current_raw_frame is not None:
             if active:
                 self.worker_process(self.current_raw_frame)
@@ -238,12 +347,15 @@ class EnhancedVideoPreview(QWidget):
         self.current_frame_idx = v
         self.update_frame(v)
     
-    def force_refresh(self):
+    def force_refresh(self, redetect=True):
+        # En playback el siguiente frame ya sale con la config nueva
+        if self.is_playing: return
         if self.current_raw_frame is not None and self.btn_ai.isChecked():
-            self.worker_process(self.current_raw_frame)
+            self.worker_process(self.current_raw_frame, redetect)
             
     def close(self):
         self.timer.stop()
+        self.config_timer.stop()
         self.detection_thread.quit()
-        if self.cap:
-            self.cap.release()
\ No newline at end of file
+        if self.cache:
+            self.cache.release()
\ No newline at end of file
@@ -0,0 +1,174 @@
+"""
+Cache de frames del preview T7MD
+Feat: Ring buffer LRU de frames decodificados a resolución de display, alrededor del playhead.
+Feat: Read-ahead en segundo plano en la dirección de reproducción (decoder propio, fuera del hilo GUI).
+Feat: Índice de miniaturas de todo el clip para scrubbing instantáneo.
+Feat: Memoria acotada por preview.cache_mb (frames + miniaturas).
+"""
+
+import threading
+from collections import OrderedDict
+
+import cv2
+from PySide6.QtCore import QObject, Signal
+
+from core.video_decoder import open_video
+
+THUMB_SIDE = 160          # lado largo de las miniaturas
+THUMB_BUDGET_SHARE = 0.15  # fracción del presupuesto reservada al índice de miniaturas
+_SIZE_BUCKET = 256         # el tamaño de display se redondea hacia arriba (no invalidar en cada resize)
+
+
+def _fit(frame, max_side):
+    h, w = frame.shape[:2]
+    if not max_side or max(h, w) <= max_side: return frame
+    s = max_side / float(max(h, w))
+    return cv2.resize(frame, (max(1, int(w * s)), max(1, int(h * s))), interpolation=cv2.INTER_AREA)
+
+
+class FrameCache(QObject):
+    """
+    get(idx) -> frame a resolución de display o None; request(idx, direction) mueve el playhead
+    del hilo de decodificación, que emite frame_ready(idx) cuando el frame pedido está listo.
+    """
+    frame_ready = Signal(int)
+
+    def __init__(self, path, config_manager=None):
+        super().__init__()
+        self.config = config_manager
+        get = (lambda k, d: config_manager.get(k, d)) if config_manager else (lambda k, d: d)
+        max_side = get("preview.decode_max_side", 1280)
+        self.cap = open_video(path, config_manager, max_side=max_side or None)
+        self.total_frames = self.cap.total_frames if self.cap.isOpened() else 0
+        self.fps = (self.cap.fps or 30.0) if self.cap.isOpened() else 30.0
+
+        self.budget = int(get("preview.cache_mb", 512)) * 1024 * 1024
+        self.read_ahead = int(get("preview.read_ahead", 48))
+        self.display_side = None  # None = resolución de decodificación (hasta set_display_size)
+
+        self._frames = OrderedDict()
+        self._bytes = 0
+        self._bad = set()
+        self._thumbs = {}
+        self._thumb_bytes = 0
+        self._thumb_stride = 1
+        self._thumb_next = 0
+        self._plan_thumbnails()
+
+        self._target = 0
+        self._direction = 1
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name="preview-decode", daemon=True)
+        self._thread.start()
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    # --- Acceso (hilo GUI) ---
+    def get(self, idx):
+        with self._lock:
+            frame = self._frames.get(idx)
+            if frame is not None: self._frames.move_to_end(idx)
+            return frame
+
+    def thumbnail(self, idx):
+        """Miniatura más cercana por debajo de `idx` (None si aún no se generó)."""
+        with self._lock:
+            base = (idx // self._thumb_stride) * self._thumb_stride
+            for j in (base, base - self._thumb_stride):
+                if j in self._thumbs: return self._thumbs[j]
+            return None
+
+    def request(self, idx, direction=1):
+        with self._wake:
+            self._target = max(0, min(idx, self.total_frames - 1))
+            self._direction = 1 if direction >= 0 else -1
+            self._wake.notify()
+
+    def set_display_size(self, width, height):
+        """Los frames se guardan al tamaño de display (redondeado); si crece, se invalida la cache."""
+        side = -(-max(width, height) // _SIZE_BUCKET) * _SIZE_BUCKET
+        with self._lock:
+            if self.display_side is not None and side <= self.display_side: return
+            self.display_side = side
+            self._frames.clear()
+            self._bytes = 0
+
+    def release(self):
+        with self._wake:
+            self._running = False
+            self._wake.notify()
+        self._thread.join(timeout=2.0)
+        self.cap.release()
+
+    # --- Hilo de decodificación ---
+    def _plan_thumbnails(self):
+        if not self.total_frames: return
+        h, w = self.cap.height, self.cap.width
+        s = THUMB_SIDE / float(max(h, w, 1))
+        thumb_bytes = max(1, int(h * s) * int(w * s) * 3)
+        max_thumbs = max(1, int(self.budget * THUMB_BUDGET_SHARE) // thumb_bytes)
+        self._thumb_stride = max(1, -(-self.total_frames // max_thumbs))
+
+    def _store(self, idx, frame):
+        # Llamar con el lock tomado
+        if idx in self._frames: return
+        self._frames[idx] = frame
+        self._bytes += frame.nbytes
+        frame_budget = self.budget - self._thumb_bytes
+        while self._bytes > frame_budget and len(self._frames) > 1:
+            _, old = self._frames.popitem(last=False)
+            self._bytes -= old.nbytes
+
+    def _decode(self, idx, side):
+        ret, frame = self.cap.read_at(idx)
+        if not ret: return None, None
+        if idx % self._thumb_stride == 0 and idx not in self._thumbs:
+            thumb = _fit(frame, THUMB_SIDE)
+            with self._lock:
+                self._thumbs[idx] = thumb
+                self._thumb_bytes += thumb.nbytes
+        return frame, _fit(frame, side)
+
+    def _next_job(self):
+        """(idx, tipo) del siguiente frame a decodificar: "target", "ahead", "thumb"; None si no hay trabajo."""
+        if self._target not in self._frames and self._target not in self._bad: return self._target, "target"
+        # El read-ahead nunca supera lo que cabe en el presupuesto (si no, se expulsaría a sí mismo)
+        ahead = self.read_ahead
+        if self._frames:
+            frame_bytes = next(reversed(self._frames.values())).nbytes
+            ahead = min(ahead, max(0, (self.budget - self._thumb_bytes) // frame_bytes - 2))
+        for k in range(1, ahead + 1):
+            j = self._target + k * self._direction
+            if j < 0 or j >= self.total_frames: break
+            if j not in self._frames and j not in self._bad: return j, "ahead"
+        # Nada que leer alrededor del playhead: avanzamos el índice de miniaturas
+        while self._thumb_next < self.total_frames and (self._thumb_next in self._thumbs or self._thumb_next in self._bad):
+            self._thumb_next += self._thumb_stride
+        if self._thumb_next < self.total_frames: return self._thumb_next, "thumb"
+        return None
+
+    def _loop(self):
+        while True:
+            with self._wake:
+                job = self._next_job() if self._running else None
+                while self._running and job is None:
+                    self._wake.wait()
+                    job = self._next_job()
+                if not self._running: return
+                # Tamaño de display del trabajo: set_display_size puede cambiarlo mientras se decodifica
+                side = self.display_side
+            idx, kind = job
+
+            frame, display = self._decode(idx, side)
+            with self._lock:
+                if frame is None:
+                    self._bad.add(idx)  # frame ilegible: no reintentar en bucle
+                    continue
+                # Decodificado al tamaño anterior: se descarta y el frame se vuelve a pedir
+                if self.display_side != side: continue
+                if kind != "thumb": self._store(idx, display)
+            if kind == "target":
+                self.frame_ready.emit(idx)
@@ -23,7 +23,7 @@ from PySide6.QtGui import QColor, QCloseEvent, QFont
 
 from gui.enhanced_preview import EnhancedVideoPreview as VideoPreviewWidget
 from core.config_manager import ConfigManager
-from core.video_engine import VideoEngine
+from core.video_engine import VideoEngine, HudRerenderEngine
 
 class ColorBtn(QPushButton):
     def __init__(self, hex_col, cb):
@@ -50,6 +50,7 @@ class MainWindow(QMainWindow):
         super().__init__()
         self.config = ConfigManager()
         self.engine = VideoEngine(self.config)
+        self.hud_engine = HudRerenderEngine(self.config)
         self.setup_ui()
         self.setup_conns()
     
@@ -170,6 +171,21 @@ class MainWindow(QMainWindow):
         lay_sens.addWidget(self._lbl("Person & Object Sensitivity:"))
         lay_sens.addWidget(self._slider(10, 100, int(self.config.get("models.person_confidence", 0.25) * 100), lambda v: self.upd("models.person_confidence", v / 100.0), "%"))
         layout.addWidget(grp_sens)
+
+        grp_perf = QGroupBox("Inference Resolution")
+        lay_perf = QVBoxLayout(grp_perf)
+        cmb_infer = QComboBox()
+        for t, d in [("Native (Slowest)", 0), ("1920 px", 1920), ("1280 px", 1280), ("960 px", 960), ("640 px (Default, Fastest)", 640)]:
+            cmb_infer.addItem(t, d)
+        idx_infer = cmb_infer.findData(self.config.get("models.inference_size", 640))
+        if idx_infer >= 0: cmb_infer.setCurrentIndex(idx_infer)
+        cmb_infer.currentIndexChanged.connect(lambda idx, cb=cmb_infer: self.upd("models.inference_size", cb.itemData(idx)))
+        lay_perf.addWidget(cmb_infer)
+        lbl_infer = QLabel("Frames are downscaled once for all models; boxes are mapped back to source resolution.")
+        lbl_infer.setWordWrap(True)
+        lbl_infer.setStyleSheet("color: palette(dark); font-size: 11px;")
+        lay_perf.addWidget(lbl_infer)
+        layout.addWidget(grp_perf)
         
         grp_fx = QGroupBox("Depth Analysis")
         lay_fx = QVBoxLayout(grp_fx)
@@ -537,10 +553,54 @@ class MainWindow(QMainWindow):
         
         lbl_codec = QLabel("Codec:")
         self.cmb_cod = QComboBox()
-        self.cmb_cod.addItems(["H.264", "H.265"])
+        self.cmb_cod.addItems(["H.264", "H.265", "ProRes 422 HQ"])
+        idx_cod = self.cmb_cod.findText(self.config.get("output.codec", "H.264"))
+        if idx_cod >= 0: self.cmb_cod.setCurrentIndex(idx_cod)
         lay_settings.addWidget(lbl_codec)
         lay_settings.addWidget(self.cmb_cod)
         
+        lbl_layers = QLabel("Compositing Layers:")
+        cmb_layers = QComboBox()
+        for label, fmt in (("PNG Sequences", "png"), ("ProRes 4444 (alpha)", "prores4444"), ("QuickTime Animation (alpha)", "qtrle")):
+            cmb_layers.addItem(label, fmt)
+        idx_layers = cmb_layers.findData(self.config.get("output.layer_format", "png"))
+        if idx_layers >= 0: cmb_layers.setCurrentIndex(idx_layers)
+        cmb_layers.currentIndexChanged.connect(lambda idx, cb=cmb_layers: self.config.set("output.layer_format", cb.itemData(idx)))
+        lay_settings.addWidget(lbl_layers)
+        lay_settings.addWidget(cmb_layers)
+        
+        lbl_json = QLabel("JSON Format:")
+        cmb_json = QComboBox()
+        for label, fmt in (("Pretty (readable)", "pretty"), ("Minified", "minified"), ("Gzip (.json.gz)", "gzip")):
+            cmb_json.addItem(label, fmt)
+        idx_json = cmb_json.findData(self.config.get("output.json_format", "pretty"))
+        if idx_json >= 0: cmb_json.setCurrentIndex(idx_json)
+        cmb_json.currentIndexChanged.connect(lambda idx, cb=cmb_json: self.config.set("output.json_format", cb.itemData(idx)))
+        lay_settings.addWidget(lbl_json)
+        lay_settings.addWidget(cmb_json)
+        
+        chk_tracks = QCheckBox("Per-track JSON for After Effects (.tracks.jsonl)")
+        chk_tracks.setChecked(self.config.get("output.json_tracks", False))
+        chk_tracks.toggled.connect(lambda v: self.config.set("output.json_tracks", v))
+        lay_settings.addWidget(chk_tracks)
+        
+        lbl_preset = QLabel("Encoder Preset:")
+        self.cmb_preset = QComboBox()
+        self.cmb_preset.addItems(["ultrafast", "veryfast", "faster", "fast", "medium", "slow", "slower"])
+        idx_preset = self.cmb_preset.findText(self.config.get("output.preset", "medium"))
+        if idx_preset >= 0: self.cmb_preset.setCurrentIndex(idx_preset)
+        self.cmb_preset.currentTextChanged.connect(lambda t: self.config.set("output.preset", t))
+        lay_settings.addWidget(lbl_preset)
+        lay_settings.addWidget(self.cmb_preset)
+        
+        lay_settings.addWidget(self._lbl("Quality (CRF, lower = better):"))
+        lay_settings.addWidget(self._slider(0, 51, self.config.get("output.crf", 20), lambda v: self.config.set("output.crf", v)))
+        
+        chk_hw = QCheckBox("Hardware Encoder (VideoToolbox / NVENC)")
+        chk_hw.setChecked(self.config.get("output.hw_accel", False))
+        chk_hw.toggled.connect(lambda v: self.config.set("output.hw_accel", v))
+        lay_settings.addWidget(chk_hw)
+        
         lbl_name = QLabel("File Name:")
         self.txt_name = QLineEdit()
         self.txt_name.setPlaceholderText("Auto")
@@ -573,6 +633,11 @@ class MainWindow(QMainWindow):
         self.btn_render.clicked.connect(self.run_render)
         lay_action.addWidget(self.btn_render)
         
+        self.btn_hud_only = QPushButton("Re-render HUD Layers from JSON...")
+        self.btn_hud_only.setToolTip("Regenerates the Compositing Ready sequences from an exported JSON (no AI inference).")
+        self.btn_hud_only.clicked.connect(self.run_hud_only)
+        lay_action.addWidget(self.btn_hud_only)
+        
         self.btn_open_folder = QPushButton("Open Destination Folder")
         self.btn_open_folder.setVisible(False)
         self.btn_open_folder.clicked.connect(self.open_output_folder)
@@ -642,8 +707,8 @@ class MainWindow(QMainWindow):
     
     def upd(self, key, val): 
         self.config.set(key, val)
-        self.preview.update_config_live()
-        self.preview.force_refresh()
+        # Debounce + refresco incremental: sólo las claves de detección re-infieren
+        self.preview.config_changed(key)
     
     def upd_yolo(self, text_input): 
         tags_list = [x.strip() for x in text_input.split(",") if x.strip()]
@@ -657,8 +722,23 @@ class MainWindow(QMainWindow):
         self.upd("models.custom_classes", tags_list)
     
     def setup_conns(self):
-        self.engine.progress_updated.connect(lambda p, f, fps: self.lbl_prog.setText(f"Processing Frame {f} | {p}% | ~{int(fps)} FPS"))
+        self.engine.progress_updated.connect(lambda p, f, fps: self.show_progress("Processing", p, f, fps))
+        self.engine.stats_updated.connect(self.show_stats)
         self.engine.processing_finished.connect(self.end_render)
+        self.hud_engine.progress_updated.connect(lambda p, f, fps: self.show_progress("Re-rendering HUD", p, f, fps))
+        self.hud_engine.stats_updated.connect(self.show_stats)
+        self.hud_engine.processing_finished.connect(self.end_render)
+    
+    def show_progress(self, action, pct, frame, fps):
+        stats = getattr(self, "last_stats", None) or {}
+        eta = stats.get("eta", "--:--")
+        self.lbl_prog.setText(f"{action} Frame {frame} | {pct}% | {fps:.1f} FPS | ETA {eta}")
+    
+    def show_stats(self, stats):
+        self.last_stats = stats
+        busy = ", ".join(f"{k} {v * 100:.0f}%" for k, v in sorted(stats.get("utilisation", {}).items(), key=lambda kv: -kv[1])[:4])
+        self.sb.showMessage(f"Elapsed {stats.get('elapsed_s', 0):.0f}s | Avg {stats.get('avg_fps', 0):.1f} FPS | "
+                            f"RAM {stats.get('rss_mb', 0):.0f} MB (peak {stats.get('peak_rss_mb', 0):.0f}) | {busy}")
     
     def load_video(self):
         file_path, _ = QFileDialog.getOpenFileName(self, "Select Video", "", "Video Files (*.mp4 *.mov)")
@@ -689,11 +769,28 @@ class MainWindow(QMainWindow):
         self.engine.start()
         
         self.btn_render.setEnabled(False)
+        self.btn_hud_only.setEnabled(False)
+        self.btn_render.setText("PROCESSING...")
+        self.btn_open_folder.setVisible(False)
+
+    def run_hud_only(self):
+        json_path, _ = QFileDialog.getOpenFileName(self, "Select MODESYS JSON", self.config.get("output.output_dir", ""), "MODESYS JSON (*.json *.json.gz)")
+        if not json_path: return
+        
+        self.hud_engine.setup_render(json_path)
+        self.preview.pause_playback()
+        self.hud_engine.start()
+        
+        self.btn_render.setEnabled(False)
+        self.btn_hud_only.setEnabled(False)
         self.btn_render.setText("PROCESSING...")
         self.btn_open_folder.setVisible(False)
 
     def end_render(self, result_dict):
-        if "error" in result_dict:
+        self.last_stats = None
+        if result_dict.get("cancelled"):
+            self.sb.showMessage(result_dict["error"], 10000)
+        elif "error" in result_dict:
             QMessageBox.critical(self, "Error", result_dict["error"])
         else:
             out_dir = result_dict.get('output_dir', 'Unknown')
@@ -702,6 +799,7 @@ class MainWindow(QMainWindow):
             self.btn_open_folder.setVisible(True)
             
         self.btn_render.setEnabled(True)
+        self.btn_hud_only.setEnabled(True)
         self.btn_render.setText("START RENDER")
         self.lbl_prog.setText("Render Complete")
 
@@ -4,6 +4,7 @@ MODESYS Headless Runner - v1.6 (Diagnostic Mode)
 import sys
 import argparse
 import os
+import json
 import signal
 import time
 from PySide6.QtCore import QCoreApplication
@@ -18,15 +19,61 @@ from core.config_manager import ConfigManager
 
 signal.signal(signal.SIGINT, signal.SIG_DFL)
 
+def run_hud_only(args):
+    from core.layer_export import rerender_from_json
+    from core.progress import ProgressTracker, ProgressThrottle
+
+    config = ConfigManager()
+    last_pct = -1
+    tracker = None
+
+    def on_progress(done, total):
+        nonlocal last_pct, tracker
+        if tracker is None: tracker = ProgressTracker(total)
+        stats = tracker.update(done, force=done >= total)
+        if stats:
+            sys.stdout.write("STATS|" + json.dumps(stats, separators=(",", ":")) + "\n")
+            sys.stdout.flush()
+        pct = int(done / total * 100)
+        if pct > last_pct:
+            sys.stdout.write(f"PROGRESS|{pct}\n")
+            sys.stdout.flush()
+            last_pct = pct
+
+    # Una línea por intervalo como mucho (main.js parsea cada línea) + valor final exacto
+    progress_out = ProgressThrottle(on_progress, config.get("performance.progress_interval_ms", 250) / 1000.0)
+    try:
+        result = rerender_from_json(args.hud_only, config, project_dir=args.output_dir or None,
+                                    workers=args.workers, progress_cb=progress_out.update)
+        progress_out.flush()
+        if result.get("cancelled"): sys.stdout.write(f"CANCELLED|{result['error']}\n")
+        elif "error" in result: sys.stdout.write(f"ERROR|{result['error']}\n")
+        else: sys.stdout.write(f"SUCCESS|{result['json_file']}\n")
+    except Exception as e:
+        sys.stdout.write(f"ERROR|{e}\n")
+    sys.stdout.flush()
+
 def run_headless():
     parser = argparse.ArgumentParser()
-    parser.add_argument("--input", required=True)
-    parser.add_argument("--output_dir", required=True)
+    parser.add_argument("--input")
+    parser.add_argument("--output_dir")
     parser.add_argument("--faces", action="store_true")
     parser.add_argument("--persons", action="store_true")
     parser.add_argument("--objects", action="store_true")
+    parser.add_argument("--backend", choices=["torch", "onnx", "openvino"], default=None)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--profile", action="store_true", help="Tiempos por etapa (CSV/JSON/Chrome trace en la carpeta del proyecto)")
+    parser.add_argument("--hud_only", default="", help="JSON exportado: regenera las capas sin inferencia")
+    parser.add_argument("--workers", type=int, default=0, help="Procesos para --hud_only (0 = todos los núcleos)")
+    parser.add_argument("--motion_gate", action="store_true", help="Reutilizar detecciones en frames sin movimiento")
+    parser.add_argument("--json_format", choices=["pretty", "minified", "gzip"], default=None)
+    parser.add_argument("--json_tracks", action="store_true", help="Esquema compacto por track (.tracks.jsonl) para el importador de AE")
     
     args = parser.parse_args()
+    if args.hud_only:
+        return run_hud_only(args)
+    if not args.input or not args.output_dir:
+        parser.error("--input y --output_dir son obligatorios (salvo con --hud_only)")
     
     app = QCoreApplication(sys.argv)
     
@@ -35,6 +82,12 @@ def run_headless():
     config.set("models.use_persons", args.persons)
     config.set("models.use_objects", args.objects)
     config.set("output.output_dir", args.output_dir)
+    if args.backend: config.set("models.backend", args.backend)
+    if args.threads is not None: config.set("models.cpu_threads", args.threads)
+    if args.profile: config.set("performance.profile", True)
+    if args.motion_gate: config.set("performance.motion_gate", True)
+    if args.json_format: config.set("output.json_format", args.json_format)
+    if args.json_tracks: config.set("output.json_tracks", True)
     config.set("output.skip_video", True) # Seguimos saltando el video para velocidad
 
     base_name = os.path.splitext(os.path.basename(args.input))[0]
@@ -54,7 +107,8 @@ def run_headless():
 
     def on_finished(result):
         if result and 'json_file' in result:
-            sys.stdout.write(f"SUCCESS|{result['json_file']}\n")
+            # Con --json_tracks AE importa el esquema por track (lectura en streaming)
+            sys.stdout.write(f"SUCCESS|{result.get('tracks_file') or result['json_file']}\n")
         else:
             # Extraer el mensaje real del error
             error_msg = "Error desconocido"
@@ -70,7 +124,13 @@ def run_headless():
         time.sleep(1.0)
         os._exit(0)
 
+    def on_stats(stats):
+        # STATS|{"fps": .., "eta_s": .., "utilisation": {..}, "rss_mb": ..}
+        sys.stdout.write("STATS|" + json.dumps(stats, separators=(",", ":")) + "\n")
+        sys.stdout.flush()
+
     engine.progress_updated.connect(on_progress)
+    engine.stats_updated.connect(on_stats)
     engine.processing_finished.connect(on_finished)
 
     engine.setup_render(args.input)
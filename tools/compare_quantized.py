@@ -0,0 +1,165 @@
+"""
+MODESYS Quantization Check
+Compara detecciones FP32 vs INT8 sobre un clip de referencia (backend ONNX/OpenVINO).
+Toma FP32 como referencia: mean IoU de las cajas emparejadas, recall y su delta,
+variación en número de cajas y speed-up. Con --depth compara también el pase Z.
+
+Uso:
+    python tools/compare_quantized.py --input ref.mp4 --frames 300
+    python tools/compare_quantized.py --input ref.mp4 --min_iou 0.85 --max_recall_drop 0.03
+Sale con código 1 si se violan los umbrales (apto para CI / render farm) y con 3 si la pasada
+INT8 no cargó los modelos cuantizados (fallback a FP32: no habría nada que comparar).
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(CURRENT_DIR)
+os.chdir(ROOT_DIR)
+sys.path.append(ROOT_DIR)
+
+import numpy as np
+
+from core.config_manager import ConfigManager
+from core.video_decoder import open_video
+from core.detection_metrics import MatchAccumulator
+
+KEYS = ("faces", "persons", "objects")
+
+
+def _config(backend, precision, threads):
+    config = ConfigManager(config_dir=tempfile.mkdtemp(prefix="modesys_quant_"))
+    config.set("models.backend", backend)
+    config.set("models.precision", precision)
+    config.set("models.cpu_threads", threads)
+    return config
+
+
+def _int8_detectors(proc):
+    """True si todos los modelos cargados son los .int8 (YOLOProcessor cae a FP32 sin avisar al llamador)."""
+    from core.onnx_backend import int8_model_name
+    from core.yolo_processor import FACE_ONNX_NAME, WORLD_ONNX_NAME
+    expected = {int8_model_name(FACE_ONNX_NAME), int8_model_name(WORLD_ONNX_NAME)}
+    names = [p.name for p in proc.model_files]
+    return bool(names) and all(n in expected for n in names)
+
+
+def _run_detector(config, frames, classes, expect_int8=False):
+    from core.yolo_processor import YOLOProcessor
+    proc = YOLOProcessor(config)
+    proc.hud = None
+    if expect_int8 and not _int8_detectors(proc):
+        return None, 0.0
+    out, t = [], []
+    for f in frames:
+        t0 = time.perf_counter()
+        out.append(proc.detect_frame(f, True, True, bool(classes), classes))
+        t.append(time.perf_counter() - t0)
+    return out, float(np.mean(t[1:] or t) * 1000)
+
+
+def _run_depth(config, frames, expect_int8=False):
+    from core.depth_processor import DepthProcessor
+    dp = DepthProcessor(config)
+    if expect_int8 and not dp.int8_loaded:
+        return None, 0.0
+    dp.alpha = 1.0  # sin suavizado temporal: comparamos frame a frame
+    out, t = [], []
+    for f in frames:
+        t0 = time.perf_counter()
+        out.append(dp.process_frame(f)[..., 0].astype(np.float32))
+        t.append(time.perf_counter() - t0)
+    return out, float(np.mean(t[1:] or t) * 1000)
+
+
+def _abort_not_int8(args, report, msg):
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    print(f"❌ {msg}")
+    sys.exit(3)
+
+
+def _boxes(dets, key):
+    # "faces" -> DetectionSet.of_type("face")
+    return dets["detections"].of_type(key[:-1]).bbox
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", required=True)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--backend", choices=["onnx", "openvino"], default="onnx")
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--classes", default="")
+    parser.add_argument("--iou", type=float, default=0.5, help="IoU mínimo para emparejar")
+    parser.add_argument("--depth", action="store_true")
+    parser.add_argument("--min_iou", type=float, default=0.0)
+    parser.add_argument("--max_recall_drop", type=float, default=1.0)
+    parser.add_argument("--out", default="")
+    args = parser.parse_args()
+
+    cap = open_video(args.input)
+    frames = []
+    while len(frames) < args.frames:
+        ret, f = cap.read()
+        if not ret: break
+        frames.append(f)
+    cap.release()
+    if not frames:
+        print("❌ No se pudieron leer frames del clip")
+        sys.exit(2)
+
+    classes = [c.strip() for c in args.classes.split(",") if c.strip()]
+    ref, ms_ref = _run_detector(_config(args.backend, "fp32", args.threads), frames, classes)
+    qnt, ms_q = _run_detector(_config(args.backend, "int8", args.threads), frames, classes, expect_int8=True)
+    if qnt is None:
+        _abort_not_int8(args, {"input": args.input, "frames": len(frames), "int8_loaded": False},
+                        "Los detectores INT8 no se cargaron (¿falta *.int8.onnx?): la pasada sería FP32 contra FP32")
+
+    report = {"input": args.input, "frames": len(frames), "int8_loaded": True, "fp32_ms": ms_ref, "int8_ms": ms_q,
+              "speedup": ms_ref / ms_q if ms_q else 0.0, "detections": {}}
+    failed = False
+
+    print(f"\n{'TYPE':<8} {'FP32':>7} {'INT8':>7} {'MEAN IoU':>9} {'RECALL':>7} {'ΔRECALL':>8} {'ΔBOXES':>8}")
+    for key in KEYS:
+        acc = MatchAccumulator(args.iou)
+        for r, q in zip(ref, qnt): acc.add(_boxes(r, key), _boxes(q, key))
+        sm = acc.summary()
+        if not sm["ref_boxes"] and not sm["test_boxes"]: continue
+        sm["recall_delta"] = sm["recall"] - 1.0
+        sm["box_delta"] = (sm["test_boxes"] - sm["ref_boxes"]) / max(1, sm["ref_boxes"])
+        report["detections"][key] = sm
+        print(f"{key:<8} {sm['ref_boxes']:>7} {sm['test_boxes']:>7} {sm['mean_iou']:>9.3f} "
+              f"{sm['recall']:>7.3f} {sm['recall_delta']*100:>7.1f}% {sm['box_delta']*100:>7.1f}%")
+        if sm["ref_boxes"] and (sm["mean_iou"] < args.min_iou or -sm["recall_delta"] > args.max_recall_drop):
+            failed = True
+
+    print(f"\nLatencia detectores: FP32 {ms_ref:.1f} ms | INT8 {ms_q:.1f} ms | x{report['speedup']:.2f}")
+
+    if args.depth:
+        d_ref, dms_ref = _run_depth(_config(args.backend, "fp32", args.threads), frames)
+        d_q, dms_q = _run_depth(_config(args.backend, "int8", args.threads), frames, expect_int8=True)
+        if d_q is None:
+            report["depth"] = {"int8_loaded": False}
+            from core.depth_processor import DEPTH_INT8_PATH
+            _abort_not_int8(args, report, f"El modelo de profundidad INT8 ({DEPTH_INT8_PATH}) no se cargó")
+        mae = float(np.mean([np.abs(a - b).mean() for a, b in zip(d_ref, d_q)]))
+        report["depth"] = {"int8_loaded": True, "fp32_ms": dms_ref, "int8_ms": dms_q, "mae_0_255": mae}
+        print(f"Depth: FP32 {dms_ref:.1f} ms | INT8 {dms_q:.1f} ms | MAE {mae:.2f} / 255")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if failed:
+        print("❌ La versión INT8 no cumple los umbrales de precisión")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
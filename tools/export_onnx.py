@@ -0,0 +1,91 @@
+"""
+MODESYS ONNX Export
+Exporta el modelo de caras y un YOLO-World de vocabulario fijo a ONNX para el
+backend CPU (models.backend = "onnx" | "openvino").
+
+Uso:
+    python tools/export_onnx.py --classes "person, cell phone, laptop"
+    python tools/export_onnx.py --world models/yolov8m-worldv2.pt --dynamic
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+from pathlib import Path
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(CURRENT_DIR)
+os.chdir(ROOT_DIR)
+sys.path.append(ROOT_DIR)
+
+import torch
+from ultralytics import YOLO
+
+from core.yolo_processor import FACE_ONNX_NAME, WORLD_ONNX_NAME
+
+
+def _patched_torch_load():
+    # Mismo parche que YOLOProcessor para pesos antiguos en PyTorch 2.6+
+    original = torch.load
+    def safe_load_patch(*args, **kwargs):
+        if 'weights_only' not in kwargs: kwargs['weights_only'] = False
+        return original(*args, **kwargs)
+    torch.load = safe_load_patch
+    return original
+
+
+def export_model(model, target, imgsz, dynamic, names):
+    exported = Path(model.export(format="onnx", imgsz=imgsz, dynamic=dynamic, simplify=True, opset=17))
+    target = Path(target)
+    if exported.resolve() != target.resolve():
+        shutil.move(str(exported), str(target))
+    sidecar = target.with_suffix(".json")
+    sidecar.write_text(json.dumps({"names": {int(k): v for k, v in names.items()}, "imgsz": imgsz}, indent=2), encoding="utf-8")
+    print(f"✅ {target} ({len(names)} clases)")
+    return target
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta los detectores de MODESYS a ONNX")
+    parser.add_argument("--models_dir", default="models")
+    parser.add_argument("--face", default="models/yolov8m-face-lindevs.pt")
+    parser.add_argument("--world", default="models/yolov8m-world.pt")
+    parser.add_argument("--classes", default="person", help="Vocabulario fijo de YOLO-World, separado por comas")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--dynamic", action="store_true", help="Batch/tamaño dinámicos (necesario para inferencia por tiles en lote)")
+    parser.add_argument("--skip_face", action="store_true")
+    parser.add_argument("--skip_world", action="store_true")
+    args = parser.parse_args()
+
+    models_dir = Path(args.models_dir)
+    models_dir.mkdir(exist_ok=True)
+    original_load = _patched_torch_load()
+
+    try:
+        if not args.skip_face:
+            if os.path.exists(args.face):
+                m = YOLO(args.face)
+                export_model(m, models_dir / FACE_ONNX_NAME, args.imgsz, args.dynamic, m.names)
+            else:
+                print(f"⚠️ Modelo de caras no encontrado: {args.face}")
+
+        if not args.skip_world:
+            classes = [c.strip().lower() for c in args.classes.split(",") if c.strip()]
+            if "person" not in classes: classes.insert(0, "person")
+            if os.path.exists(args.world):
+                m = YOLO(args.world)
+                m.set_classes(classes)
+                try:
+                    export_model(m, models_dir / WORLD_ONNX_NAME, args.imgsz, args.dynamic, {i: c for i, c in enumerate(classes)})
+                except Exception as e:
+                    print(f"❌ Export de YOLO-World falló: {e}")
+                    print("   Ultralytics sólo exporta YOLO-World v2: prueba con --world models/yolov8m-worldv2.pt")
+            else:
+                print(f"⚠️ Modelo YOLO-World no encontrado: {args.world}")
+    finally:
+        torch.load = original_load
+
+
+if __name__ == "__main__":
+    main()
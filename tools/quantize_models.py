@@ -0,0 +1,128 @@
+"""
+MODESYS INT8 Quantization
+Genera versiones INT8 de los modelos para CPU (models.precision = "int8"):
+  - Detectores ONNX: cuantización estática QDQ calibrada con frames de un clip de referencia
+    (o dinámica si no se pasa clip). La cabeza Detect se deja en FP32.
+  - Depth Anything V2 (opcional): torch dynamic quantization de las capas Linear (ViT).
+
+Uso:
+    python tools/quantize_models.py --calib clip.mp4 --frames 64
+    python tools/quantize_models.py --calib clip.mp4 --depth
+Después, verifica la precisión con tools/compare_quantized.py.
+"""
+import os
+import re
+import sys
+import shutil
+import argparse
+from pathlib import Path
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(CURRENT_DIR)
+os.chdir(ROOT_DIR)
+sys.path.append(ROOT_DIR)
+
+from core.onnx_backend import OnnxDetector, int8_model_name
+from core.video_decoder import open_video
+from core.yolo_processor import FACE_ONNX_NAME, WORLD_ONNX_NAME
+
+
+def _calibration_frames(path, n):
+    cap = open_video(path)
+    total = max(1, cap.total_frames)
+    step = max(1, total // n)
+    frames = []
+    for idx in range(0, total, step):
+        ret, f = cap.read_at(idx)
+        if not ret: break
+        frames.append(f)
+        if len(frames) >= n: break
+    cap.release()
+    return frames
+
+
+def _detect_head_nodes(onnx_path):
+    """Nodos no-Conv del último bloque (Detect/DFL): cuantizarlos degrada mucho las cajas."""
+    import onnx
+    model = onnx.load(str(onnx_path))
+    blocks = [int(m.group(1)) for n in model.graph.node for m in [re.match(r"/model\.(\d+)/", n.name)] if m]
+    if not blocks: return []
+    head = f"/model.{max(blocks)}/"
+    return [n.name for n in model.graph.node if n.name.startswith(head) and n.op_type != "Conv"]
+
+
+def quantize_detector(src, frames):
+    from onnxruntime.quantization import (
+        quantize_static, quantize_dynamic, QuantType, QuantFormat, CalibrationDataReader
+    )
+    dst = Path(int8_model_name(src))
+
+    if frames:
+        det = OnnxDetector(src)
+
+        class _Reader(CalibrationDataReader):
+            def __init__(self):
+                self._it = iter(frames)
+            def get_next(self):
+                f = next(self._it, None)
+                if f is None: return None
+                batch, _ = det._preprocess([f])
+                return {det._session.get_inputs()[0].name: batch}
+
+        quantize_static(
+            str(src), str(dst), _Reader(),
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8,
+            per_channel=True,
+            nodes_to_exclude=_detect_head_nodes(src)
+        )
+    else:
+        print("   (sin clip de calibración: cuantización dinámica de pesos)")
+        quantize_dynamic(str(src), str(dst), weight_type=QuantType.QUInt8)
+
+    sidecar = Path(src).with_suffix(".json")
+    if sidecar.exists(): shutil.copy(sidecar, dst.with_suffix(".json"))
+    print(f"✅ {dst}")
+
+
+def quantize_depth():
+    import torch
+    from transformers import AutoModelForDepthEstimation
+    from core.depth_processor import DEPTH_MODEL_ID, DEPTH_INT8_PATH
+
+    model = AutoModelForDepthEstimation.from_pretrained(DEPTH_MODEL_ID).eval()
+    qmodel = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    DEPTH_INT8_PATH.parent.mkdir(exist_ok=True)
+    torch.save(qmodel, str(DEPTH_INT8_PATH))
+    print(f"✅ {DEPTH_INT8_PATH}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cuantiza los modelos de MODESYS a INT8")
+    parser.add_argument("--models_dir", default="models")
+    parser.add_argument("--calib", default="", help="Clip de referencia para calibración estática")
+    parser.add_argument("--frames", type=int, default=64)
+    parser.add_argument("--depth", action="store_true", help="Cuantiza también Depth Anything V2")
+    parser.add_argument("--skip_detectors", action="store_true")
+    args = parser.parse_args()
+
+    if not args.skip_detectors:
+        frames = _calibration_frames(args.calib, args.frames) if args.calib else []
+        for name in (FACE_ONNX_NAME, WORLD_ONNX_NAME):
+            src = Path(args.models_dir) / name
+            if not src.exists():
+                print(f"⚠️ {src} no existe. Ejecuta antes tools/export_onnx.py")
+                continue
+            print(f"⏳ Cuantizando {src.name} ...")
+            try:
+                quantize_detector(src, frames)
+            except Exception as e:
+                print(f"❌ Error cuantizando {src.name}: {e}")
+
+    if args.depth:
+        print("⏳ Cuantizando Depth Anything V2 ...")
+        quantize_depth()
+
+
+if __name__ == "__main__":
+    main()